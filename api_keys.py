@@ -0,0 +1,170 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import db
+
+PERMISSIONS = ('read', 'write', 'admin')
+
+_MISSING = object()
+
+
+def hash_key(api_key):
+    """Keys are only ever stored and cached by their SHA-256 digest"""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()
+
+
+def make_key_info(key_hash, name, permissions):
+    """Precompute everything the per-request auth check needs"""
+    permissions = [perm for perm in PERMISSIONS if perm in permissions]
+    return {
+        'key_hash': key_hash,
+        'name': name,
+        'permissions': permissions,
+        'permission_set': frozenset(permissions),
+        # Highest permission held, used for per-tier policies such as rate limits
+        'tier': permissions[-1] if permissions else 'read'
+    }
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire after a per-entry TTL"""
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped outside the lock: a lost increment under contention only blurs the hit rate
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            with self._lock:
+                self._data.pop(key, None)
+            self.misses += 1
+            return default
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class MemoryKeyBackend:
+    """Process-local backend, useful for tests and single-process demos"""
+
+    def __init__(self):
+        self._keys = {}
+
+    def get(self, key_hash):
+        return self._keys.get(key_hash)
+
+    def add(self, key_hash, name, permissions):
+        self._keys.setdefault(key_hash, (name, list(permissions)))
+
+    def revoke(self, key_hash):
+        return self._keys.pop(key_hash, None) is not None
+
+
+class SQLiteKeyBackend:
+    """Default backend storing key hashes in the application database"""
+
+    def get(self, key_hash):
+        row = db.get_db().execute(
+            'SELECT name, permissions FROM api_keys WHERE key_hash = ? AND revoked_at IS NULL', (key_hash,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row['name'], row['permissions'].split(',') if row['permissions'] else []
+
+    def add(self, key_hash, name, permissions):
+        conn = db.get_db()
+        with conn:
+            conn.execute(
+                'INSERT OR IGNORE INTO api_keys (key_hash, name, permissions, created_at) VALUES (?, ?, ?, ?)',
+                (key_hash, name, ','.join(permissions), datetime.now().isoformat())
+            )
+
+    def revoke(self, key_hash):
+        conn = db.get_db()
+        with conn:
+            cursor = conn.execute(
+                'UPDATE api_keys SET revoked_at = ? WHERE key_hash = ? AND revoked_at IS NULL',
+                (datetime.now().isoformat(), key_hash)
+            )
+        return cursor.rowcount > 0
+
+
+class KeyStore:
+    """Resolve API keys through an LRU cache in front of a pluggable backend.
+
+    Invalid keys are cached too (for a shorter ``negative_ttl``) so that a
+    client hammering with a bad key does not hit the backend each time.
+    Revocations made by another process become visible after ``ttl``.
+    """
+
+    def __init__(self, backend=None, maxsize=10000, ttl=60.0, negative_ttl=5.0):
+        self.backend = backend or SQLiteKeyBackend()
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.cache = TTLCache(maxsize)
+
+    def lookup(self, api_key):
+        """Return the precomputed key info, or None for unknown/revoked keys"""
+        key_hash = hash_key(api_key)
+        info = self.cache.get(key_hash, _MISSING)
+        if info is not _MISSING:
+            return info
+        record = self.backend.get(key_hash)
+        if record is None:
+            self.cache.set(key_hash, None, self.negative_ttl)
+            return None
+        info = make_key_info(key_hash, *record)
+        self.cache.set(key_hash, info, self.ttl)
+        return info
+
+    def add(self, api_key, name, permissions):
+        key_hash = hash_key(api_key)
+        self.backend.add(key_hash, name, [perm for perm in PERMISSIONS if perm in permissions])
+        self.cache.discard(key_hash)
+
+    def revoke(self, api_key):
+        key_hash = hash_key(api_key)
+        revoked = self.backend.revoke(key_hash)
+        self.cache.discard(key_hash)
+        return revoked
@@ -0,0 +1,320 @@
+"""ASGI entry point: ``uvicorn asgi:application`` (or any ASGI server).
+
+Every request still runs through the Flask app, on a bounded pool of
+worker threads, so routing, auth, rate limits, caching and metrics are
+unchanged. What moves to the event loop is the part of a request that
+only waits on the client or on an event:
+
+* Views that mostly wait (SSE, long polls) hand an async body to
+  ``environ['asgi.defer']`` and return at once; the loop runs the body.
+* File responses (``send_file``: downloads, blobs, report and export
+  artifacts) are sent by the loop in chunks read off-loop, so a slow
+  client holds a socket, not a thread.
+* Small request bodies are read by the loop before a thread is taken.
+
+Under plain WSGI (``python main.py``, gunicorn) none of this is used.
+"""
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from werkzeug.exceptions import ClientDisconnected
+
+from main import app
+
+DEFER_KEY = 'asgi.defer'
+# Bodies up to this size are read on the loop before the request gets a thread
+PREREAD_BYTES = 64 * 1024
+# Chunk size for file responses, and for coalescing streamed WSGI bodies
+CHUNK_BYTES = 256 * 1024
+
+
+class RequestBody(io.RawIOBase):
+    """``wsgi.input`` for a worker thread, pulling the rest of the body from the event loop"""
+
+    def __init__(self, loop, receive, buffered, more_body):
+        self._loop = loop
+        self._receive = receive
+        self._buffer = bytearray(buffered)
+        self._more = more_body
+
+    def readable(self):
+        return True
+
+    def _fill(self):
+        message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+        if message['type'] == 'http.disconnect':
+            self._more = False
+            raise ClientDisconnected()
+        self._buffer += message.get('body', b'')
+        self._more = message.get('more_body', False)
+
+    def readinto(self, b):
+        while not self._buffer and self._more:
+            self._fill()
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        del self._buffer[:size]
+        return size
+
+    def read(self, size=-1):
+        while self._more and (size is None or size < 0 or len(self._buffer) < size):
+            self._fill()
+        if size is None or size < 0 or size >= len(self._buffer):
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        else:
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+        return data
+
+
+class FileResponse:
+    """``wsgi.file_wrapper`` that leaves the sending to the event loop.
+
+    It stays an ordinary iterable, so anything that iterates it (a
+    middleware, a HEAD request) still gets the file's bytes.
+    """
+
+    def __init__(self, environ, file, block_size=CHUNK_BYTES):
+        self.file = file
+        self.block_size = block_size
+        environ['asgi.file'] = self
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        data = self.file.read(self.block_size)
+        if not data:
+            raise StopIteration
+        return data
+
+    def seekable(self):
+        return self.file.seekable()
+
+    def seek(self, *args):
+        self.file.seek(*args)
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def _content_range(headers):
+    """(first byte, length) of a 206 response from its Content-Range header"""
+    for name, value in headers:
+        if name == b'content-range':
+            first, last = value.split(b' ', 1)[1].split(b'/', 1)[0].split(b'-')
+            return int(first), int(last) - int(first) + 1
+    return None
+
+
+class _Handoff:
+    """What a worker thread hands back to the loop once the Flask app has returned"""
+
+    __slots__ = ('status', 'headers', 'body', 'deferred', 'file', 'range', 'app_iter', 'sent')
+
+    def __init__(self):
+        self.status = 500
+        self.headers = []
+        self.body = b''
+        self.deferred = None
+        self.file = None
+        self.range = None
+        self.app_iter = None
+        self.sent = False
+
+
+class AsgiAdapter:
+    """Serve a WSGI app over ASGI, keeping waits on the event loop.
+
+    The app runs on up to ``threads`` worker threads. A request holds one
+    only while Flask is working on it, never while its response waits on
+    an event or drains to a slow client.
+    """
+
+    def __init__(self, wsgi_app, threads=32):
+        self.wsgi_app = wsgi_app
+        self.threads = threads
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='asgi-worker')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type {scope['type']!r}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        loop = asyncio.get_running_loop()
+        buffered, more_body = bytearray(), True
+        while more_body and len(buffered) < PREREAD_BYTES:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            buffered += message.get('body', b'')
+            more_body = message.get('more_body', False)
+        environ = self._environ(scope, RequestBody(loop, receive, buffered, more_body))
+        handoff = await loop.run_in_executor(self._executor, self._run_app, environ, loop, send)
+        if handoff.sent:
+            return
+        start = {'type': 'http.response.start', 'status': handoff.status, 'headers': handoff.headers}
+        if handoff.deferred is None and handoff.file is None:
+            await send(start)
+            await send({'type': 'http.response.body', 'body': handoff.body})
+            return
+        try:
+            await send(start)
+            body = self._send_deferred(handoff.deferred, send) if handoff.deferred is not None \
+                else self._send_file(handoff, send)
+            await self._until_disconnect(body, receive)
+        finally:
+            if handoff.app_iter is not None and hasattr(handoff.app_iter, 'close'):
+                handoff.app_iter.close()
+
+    def _environ(self, scope, body):
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]) if server[1] is not None else '80',
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.input_terminated': True,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope['headers']:
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                name = 'HTTP_' + name
+            environ[name] = f'{environ[name]},{value}' if name in environ else value
+        environ['wsgi.file_wrapper'] = partial(FileResponse, environ)
+        environ[DEFER_KEY] = lambda deferred: environ.__setitem__('asgi.deferred', deferred)
+        return environ
+
+    def _run_app(self, environ, loop, send):
+        """Run the Flask app on a worker thread; stream its body from here only if it must"""
+        handoff = _Handoff()
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info is not None and handoff.sent:
+                raise exc_info[1].with_traceback(exc_info[2])
+            handoff.status = int(status.split(' ', 1)[0])
+            handoff.headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+            return self._write_unsupported
+
+        app_iter = self.wsgi_app(environ, start_response)
+        # A view that failed after deferring its body gets its error response instead
+        if 200 <= handoff.status < 300:
+            handoff.deferred = environ.get('asgi.deferred')
+        file = environ.get('asgi.file')
+        if handoff.deferred is None and file is not None and handoff.status in (200, 206) \
+                and environ['REQUEST_METHOD'] != 'HEAD':
+            handoff.file = file
+            if handoff.status == 206:
+                handoff.range = _content_range(handoff.headers)
+        if handoff.deferred is not None or handoff.file is not None:
+            # Closed by the loop once it has sent the body
+            handoff.app_iter = app_iter
+            return handoff
+        try:
+            if any(name == b'content-length' for name, _ in handoff.headers):
+                # The whole body is already in memory; hand it over in one piece
+                handoff.body = b''.join(app_iter)
+                return handoff
+            # A generated body of unknown length: send it from this thread as it is produced
+            self._call(loop, send({'type': 'http.response.start', 'status': handoff.status,
+                                   'headers': handoff.headers}))
+            handoff.sent = True
+            chunk = bytearray()
+            for data in app_iter:
+                chunk += data
+                if len(chunk) >= CHUNK_BYTES:
+                    self._call(loop, send({'type': 'http.response.body', 'body': bytes(chunk), 'more_body': True}))
+                    chunk.clear()
+            self._call(loop, send({'type': 'http.response.body', 'body': bytes(chunk)}))
+            return handoff
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+    @staticmethod
+    def _call(loop, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+    @staticmethod
+    def _write_unsupported(data):
+        raise NotImplementedError('The ASGI adapter does not support the WSGI write() callable')
+
+    async def _send_deferred(self, deferred, send):
+        async for data in deferred:
+            if isinstance(data, str):
+                data = data.encode()
+            await send({'type': 'http.response.body', 'body': data, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def _send_file(self, handoff, send):
+        loop = asyncio.get_running_loop()
+        fd = handoff.file.file.fileno()
+        offset, remaining = handoff.range or (0, None)
+        while remaining is None or remaining > 0:
+            size = CHUNK_BYTES if remaining is None else min(CHUNK_BYTES, remaining)
+            data = await loop.run_in_executor(None, os.pread, fd, size, offset)
+            if not data:
+                break
+            offset += len(data)
+            if remaining is not None:
+                remaining -= len(data)
+            await send({'type': 'http.response.body', 'body': data, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def _until_disconnect(self, body, receive):
+        """Run ``body`` to completion, cancelling it if the client goes away first"""
+        sending = asyncio.ensure_future(body)
+        watching = asyncio.ensure_future(_disconnected(receive))
+        try:
+            await asyncio.wait((sending, watching), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            watching.cancel()
+            if not sending.done():
+                sending.cancel()
+                await asyncio.gather(sending, return_exceptions=True)
+        if not sending.cancelled():
+            sending.result()
+
+
+async def _disconnected(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+application = AsgiAdapter(app, threads=app.config['ASGI_THREADS'])
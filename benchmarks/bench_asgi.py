@@ -0,0 +1,183 @@
+"""Load test of the ASGI entry point against the threaded WSGI servers.
+
+With HELD long polls parked on /api/notifications/poll, 16 concurrent
+clients send short GET /api/products/<id> requests for SECONDS and
+their throughput and p50/p99 latency are recorded (a request taking
+over 5s counts as an error at 5s); then one notification is sent and
+the time until every held poll has answered is measured. Each server
+runs in its own process:
+
+* wsgi-pool: a fixed pool of ASGI_THREADS threads (as gunicorn gthread)
+* wsgi-threaded: a thread per connection (werkzeug threaded=True)
+* asgi: uvicorn running asgi:application with ASGI_THREADS threads
+
+Needs uvicorn for the asgi case.
+
+    python benchmarks/bench_asgi.py [held] [seconds]
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SERVE = sys.argv[1:2] == ['--serve']
+HELD = int(sys.argv[1]) if len(sys.argv) > 1 and not SERVE else 1_000
+SECONDS = float(sys.argv[2]) if len(sys.argv) > 2 and not SERVE else 10.0
+CLIENTS = 16
+REQUEST_TIMEOUT = 5.0
+THREADS = 32
+POLL_TIMEOUT = 30
+HEADERS = 'Host: localhost\r\nX-API-Key: demo-key-123\r\nConnection: close\r\n'
+
+
+def serve(kind, port):
+    os.environ['ASGI_THREADS'] = str(THREADS)
+    import logging
+
+    from main import app, rate_limiter, response_cache
+
+    rate_limiter.limits = {tier: (1e9, 1e9) for tier in rate_limiter.limits}
+    response_cache.enabled = False
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    if kind == 'asgi':
+        import uvicorn
+
+        from asgi import application
+        uvicorn.run(application, host='127.0.0.1', port=port, log_level='error', backlog=4096)
+        return
+    from werkzeug.serving import BaseWSGIServer, make_server
+
+    class PooledWSGIServer(BaseWSGIServer):
+        multithread = True
+        request_queue_size = 4096
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.workers = ThreadPoolExecutor(max_workers=THREADS)
+
+        def process_request(self, request, client_address):
+            self.workers.submit(self._handle, request, client_address)
+
+        def _handle(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    if kind == 'wsgi-pool':
+        server = PooledWSGIServer('127.0.0.1', port, app)
+    else:
+        server = make_server('127.0.0.1', port, app, threaded=True)
+        server.socket.listen(4096)
+    server.serve_forever()
+
+
+async def fetch(port, path, method='GET', body=b'', timeout=60):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        head = f'{method} {path} HTTP/1.1\r\n{HEADERS}Content-Length: {len(body)}\r\n'
+        if body:
+            head += 'Content-Type: application/json\r\n'
+        writer.write(head.encode() + b'\r\n' + body)
+        response = await asyncio.wait_for(reader.read(), timeout)
+        return int(response.split(b' ', 2)[1])
+    finally:
+        writer.close()
+
+
+async def status_of(port, path, method='GET', body=b'', timeout=REQUEST_TIMEOUT):
+    """Response status, or None for a refused, reset or timed-out request"""
+    try:
+        return await fetch(port, path, method, body, timeout)
+    except (OSError, asyncio.TimeoutError):
+        return None
+
+
+def thread_count(pid):
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('Threads:'):
+                return int(line.split()[1])
+    return None
+
+
+async def run(kind, port, pid):
+    # Wait for the server to come up
+    for _ in range(300):
+        try:
+            await fetch(port, '/api/system/health/live', timeout=5)
+            break
+        except OSError:
+            await asyncio.sleep(0.1)
+    else:
+        raise RuntimeError(f'{kind} server did not start')
+
+    polls = [
+        asyncio.ensure_future(status_of(port, f'/api/notifications/poll?timeout={POLL_TIMEOUT}',
+                                        timeout=POLL_TIMEOUT + 10))
+        for _ in range(HELD)
+    ]
+    await asyncio.sleep(2)
+    threads = thread_count(pid)
+
+    latencies, errors = [], 0
+
+    async def client(slot):
+        nonlocal errors
+        sent = 0
+        while time.perf_counter() < deadline:
+            sent += 1
+            started = time.perf_counter()
+            status = await status_of(port, f'/api/products/{(slot + sent) % 2 + 1}')
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    deadline = started + SECONDS
+    await asyncio.gather(*(client(slot) for slot in range(CLIENTS)))
+    elapsed = time.perf_counter() - started
+
+    published = time.perf_counter()
+    send_status = await status_of(port, '/api/notifications/send', 'POST',
+                                  b'{"user_id": 1, "message": "go", "type": "push"}')
+    statuses = await asyncio.gather(*polls)
+    fan_out = time.perf_counter() - published
+    answered = statuses.count(200)
+
+    latencies.sort()
+    print(
+        f'{kind:>14}: {(len(latencies) - errors) / elapsed:>7,.0f} req/s  '
+        f'p50 {latencies[len(latencies) // 2] * 1000:>8.1f} ms  '
+        f'p99 {latencies[int(len(latencies) * 0.99)] * 1000:>8.1f} ms  '
+        f'errors {errors:>4}  server threads {threads:>5}  '
+        f'{answered}/{HELD} polls answered in {fan_out:.2f}s' + (' (send timed out)' if send_status is None else '')
+    )
+
+
+def main():
+    print(f'{HELD} held long polls, short GETs from {CLIENTS} clients for {SECONDS:g}s, {THREADS} worker threads')
+    for port, kind in enumerate(('wsgi-pool', 'wsgi-threaded', 'asgi'), start=18_700):
+        env = dict(os.environ, DATA_DIR=tempfile.mkdtemp(prefix=f'bench-{kind}-'))
+        server = subprocess.Popen([sys.executable, __file__, '--serve', kind, str(port)], env=env, cwd=ROOT,
+                                  stderr=subprocess.DEVNULL)
+        try:
+            asyncio.run(run(kind, port, server.pid))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    if SERVE:
+        serve(sys.argv[2], int(sys.argv[3]))
+    else:
+        main()
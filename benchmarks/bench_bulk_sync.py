@@ -0,0 +1,58 @@
+"""Catalog sync throughput: per-item POST/PUT against /api/products/bulk.
+
+Creates N products and then updates all of them, once with one request
+per item and once with a single bulk request (JSON and NDJSON).
+
+    python benchmarks/bench_bulk_sync.py [products]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PRODUCTS = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+HEADERS = {'X-API-Key': 'demo-key-123'}
+
+
+def catalog(count, offset=0):
+    return [{'name': f'Product {i}', 'price': 10.0 + i % 90, 'category': 'Books', 'stock': i % 40,
+             'sku': f'SKU{offset + i:07d}'} for i in range(count)]
+
+
+def report(label, count, elapsed):
+    print(f'{label:>22}: {count / elapsed:>10,.0f} items/s ({elapsed:.2f}s)')
+
+
+def main():
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='bench-bulk-')
+    from main import app, rate_limiter
+
+    rate_limiter.limits = {tier: (1e9, 1e9) for tier in rate_limiter.limits}
+    client = app.test_client()
+
+    items = catalog(PRODUCTS)
+    start = time.perf_counter()
+    ids = [client.post('/api/products/', json=item, headers=HEADERS).json['id'] for item in items]
+    report('per-item POST', PRODUCTS, time.perf_counter() - start)
+    start = time.perf_counter()
+    for product_id in ids:
+        client.put(f'/api/products/{product_id}', json={'price': 1.0}, headers=HEADERS)
+    report('per-item PUT', PRODUCTS, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    response = client.post('/api/products/bulk', json=catalog(PRODUCTS, PRODUCTS), headers=HEADERS)
+    report('bulk create (JSON)', PRODUCTS, time.perf_counter() - start)
+    created = [result['id'] for result in response.json['results']]
+
+    body = '\n'.join(json.dumps({'id': product_id, 'price': 2.0}) for product_id in created)
+    start = time.perf_counter()
+    response = client.post('/api/products/bulk', data=body, content_type='application/x-ndjson', headers=HEADERS)
+    report('bulk update (NDJSON)', PRODUCTS, time.perf_counter() - start)
+    assert response.json['failed'] == 0
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Bytes on the wire for a client re-polling unchanged resources.
+
+Replays a mobile client that refreshes the same product, user, order
+and category payloads, once downloading in full every time and once
+revalidating with If-None-Match.
+
+    python benchmarks/bench_conditional_get.py [rounds]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ROUNDS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+HEADERS = {'X-API-Key': 'demo-key-123'}
+RESOURCES = ['/api/products/?limit=100', '/api/products/1', '/api/users/1', '/api/orders/1',
+             '/api/products/categories']
+
+
+def main():
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='bench-etag-')
+    import db
+
+    db.init_db(os.path.join(os.environ['DATA_DIR'], 'app.db'))
+    for i in range(200):
+        db.create_product({'name': f'Product {i}', 'price': i, 'category': 'Books', 'stock': i})
+    db.create_order({'user_id': 1, 'total_amount': 10.0})
+    from main import app, rate_limiter
+
+    rate_limiter.limits = {tier: (1e9, 1e9) for tier in rate_limiter.limits}
+    client = app.test_client()
+
+    for revalidate in (False, True):
+        etags = {}
+        transferred = not_modified = 0
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            for url in RESOURCES:
+                headers = dict(HEADERS)
+                if revalidate and url in etags:
+                    headers['If-None-Match'] = etags[url]
+                response = client.get(url, headers=headers)
+                transferred += len(response.data)
+                not_modified += response.status_code == 304
+                etags[url] = response.headers.get('ETag')
+        elapsed = time.perf_counter() - start
+        label = 'If-None-Match' if revalidate else 'full download'
+        print(f'{label:>14}: {transferred / 1024:>9,.1f} KiB body, {not_modified:>5} x 304, '
+              f'{ROUNDS * len(RESOURCES) / elapsed:,.0f} req/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Requests/sec of the by-id lookups over HTTP with concurrent clients,
+with the connection pool on and with a connection opened per request.
+
+Runs the app in a threaded werkzeug server (one thread per request, as
+in development) with the response cache off, so every request reaches
+the database.
+
+    python benchmarks/bench_db_pool.py [requests] [clients]
+"""
+import http.client
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 4_000
+CLIENTS = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+ROWS = 2_000
+HEADERS = {'X-API-Key': 'demo-key-123'}
+
+
+def run_clients(port, paths):
+    per_client = [paths[i::CLIENTS] for i in range(CLIENTS)]
+    errors = []
+
+    def client(batch):
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        for path in batch:
+            conn.request('GET', path, headers=HEADERS)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(batch,)) for batch in per_client]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, errors
+
+
+def main():
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='bench-pool-')
+    import db
+
+    db.init_db(os.path.join(os.environ['DATA_DIR'], 'app.db'))
+    for i in range(ROWS):
+        db.create_user({'username': f'user_{i}', 'email': f'user{i}@example.com'})
+        db.create_product({'name': f'Product {i}', 'price': i, 'category': 'Books', 'stock': i})
+        db.create_order({'user_id': i + 1, 'total_amount': i, 'items': [{'product_id': i + 1, 'quantity': 1}]})
+    db.release()
+    from werkzeug.serving import make_server
+
+    from main import app, rate_limiter, response_cache
+    from pool import ConnectionPool
+
+    rate_limiter.limits = {tier: (1e9, 1e9) for tier in rate_limiter.limits}
+    response_cache.enabled = False
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    rng = random.Random(7)
+    paths = [f'/api/{kind}/{rng.randint(1, ROWS)}' for kind in ('users', 'products', 'orders')
+             for _ in range(REQUESTS // 3)]
+    rng.shuffle(paths)
+
+    print(f'{REQUESTS} GETs by id, {CLIENTS} concurrent clients')
+    pooled = db._pool
+    # size 0: every checkout opens a connection and closes it on release, like the
+    # thread-local connections did under a thread-per-request server
+    unpooled = ConnectionPool(db.connect, size=0, max_overflow=10_000, pre_ping=False)
+    for label, pool in (('connection per request', unpooled), ('pooled', pooled)):
+        db._pool = pool
+        run_clients(server.port, paths[:200])
+        elapsed, errors = run_clients(server.port, paths)
+        print(f'{label:>24}: {len(paths) / elapsed:>8,.0f} req/s ({elapsed:.2f}s, {len(errors)} errors)')
+    print('pool stats:', pooled.stats())
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Upload/download throughput and peak RSS for the files namespace.
+
+Starts the app on a local threaded server, streams a file of each size
+through POST /api/files/upload and back through the download endpoint,
+and reports MB/s plus the process high-water RSS (which should stay flat
+as the file size grows).
+
+    python benchmarks/bench_file_transfer.py [size_mb...]
+"""
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SIZES_MB = [int(arg) for arg in sys.argv[1:]] or [16, 64, 256]
+HEADERS = {'X-API-Key': 'demo-key-123'}
+BLOCK = 1024 * 1024
+
+
+def peak_rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+
+def reset_peak_rss():
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def main():
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='bench-files-')
+    os.environ['RATE_LIMIT_BACKEND'] = 'memory'
+    from werkzeug.serving import make_server
+    from main import app
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+
+    print(f'{"size MB":>8} {"upload MB/s":>12} {"download MB/s":>14} {"peak RSS MB":>12}')
+    for size_mb in SIZES_MB:
+        source = tempfile.NamedTemporaryFile(delete=False)
+        chunk = os.urandom(BLOCK)
+        for _ in range(size_mb):
+            source.write(chunk)
+        source.close()
+        reset_peak_rss()
+
+        conn = http.client.HTTPConnection('127.0.0.1', port, blocksize=BLOCK)
+        start = time.perf_counter()
+        with open(source.name, 'rb') as body:
+            conn.request('POST', '/api/files/upload?filename=bench.bin', body=body, headers={
+                **HEADERS, 'Content-Type': 'application/octet-stream', 'Content-Length': str(size_mb * BLOCK)
+            })
+            file_id = json.loads(conn.getresponse().read())['file_id']
+        upload = size_mb / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        conn.request('GET', f'/api/files/{file_id}/download', headers=HEADERS)
+        response = conn.getresponse()
+        while response.read(BLOCK):
+            pass
+        download = size_mb / (time.perf_counter() - start)
+        conn.close()
+        os.remove(source.name)
+
+        print(f'{size_mb:>8} {upload:>12.1f} {download:>14.1f} {peak_rss_mb():>12.1f}')
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Hundreds of simultaneous buyers for one SKU: no overselling, and how fast.
+
+Each buyer thread reserves one unit and then places an order consuming
+the reservation (or orders directly with --direct). Stock starts below
+the number of buyers, so the run checks that exactly ``stock`` orders
+succeed, everyone else gets 409, and stock ends at zero. For contrast
+it also runs a naive read-then-write decrement with the same threads.
+
+    python benchmarks/bench_flash_sale.py [buyers] [stock] [--direct]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ARGS = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+BUYERS = int(ARGS[0]) if ARGS else 300
+STOCK = int(ARGS[1]) if len(ARGS) > 1 else 100
+DIRECT = '--direct' in sys.argv
+HEADERS = {'X-API-Key': 'demo-key-123'}
+
+
+def run_buyers(buy):
+    results = []
+    barrier = threading.Barrier(BUYERS)
+
+    def buyer():
+        barrier.wait()
+        results.append(buy())
+
+    threads = [threading.Thread(target=buyer) for _ in range(BUYERS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+def main():
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='bench-flash-')
+    import db
+    from main import app, rate_limiter
+
+    rate_limiter.limits = {tier: (1e9, 1e9) for tier in rate_limiter.limits}
+    product_id = db.create_product({'name': 'Limited edition', 'price': 99.0, 'stock': STOCK})['id']
+    db.release()
+
+    def buy():
+        client = app.test_client()
+        reservation_ids = []
+        if not DIRECT:
+            response = client.post(f'/api/products/{product_id}/reservations', json={'quantity': 1}, headers=HEADERS)
+            if response.status_code != 201:
+                return response.status_code
+            reservation_ids.append(response.json['reservation_id'])
+        response = client.post('/api/orders/', headers=HEADERS, json={
+            'user_id': 1, 'items': [{'product_id': product_id, 'quantity': 1}], 'reservation_ids': reservation_ids
+        })
+        return response.status_code
+
+    results, elapsed = run_buyers(buy)
+    sold = results.count(201)
+    left = db.get_product(product_id)['stock']
+    orders = db.get_db().execute('SELECT COUNT(*) FROM orders').fetchone()[0]
+    db.release()
+    flow = 'order' if DIRECT else 'reserve + order'
+    print(f'{BUYERS} buyers, stock {STOCK}, {flow}: {elapsed:.2f}s, {BUYERS / elapsed:,.0f} buyers/s')
+    print(f'  sold {sold}, refused {results.count(409)}, other {len(results) - sold - results.count(409)}, '
+          f'orders written {orders}, stock left {left}')
+    assert sold == min(STOCK, BUYERS) and left == STOCK - sold and orders == sold, 'oversold or lost stock'
+
+    # The read-modify-write the old inventory endpoint invited
+    db.get_db().execute('UPDATE products SET stock = ? WHERE id = ?', (STOCK, product_id))
+    db.get_db().commit()
+    db.release()
+
+    def naive_buy():
+        with db.connection() as conn:
+            stock = conn.execute('SELECT stock FROM products WHERE id = ?', (product_id,)).fetchone()[0]
+            if stock < 1:
+                return 409
+            time.sleep(0.001)  # stands in for the rest of the request
+            with conn:
+                conn.execute('UPDATE products SET stock = ? WHERE id = ?', (stock - 1, product_id))
+            return 201
+
+    results, elapsed = run_buyers(naive_buy)
+    with db.connection() as conn:
+        left = conn.execute('SELECT stock FROM products WHERE id = ?', (product_id,)).fetchone()[0]
+    print(f'  naive read-then-write: sold {results.count(201)} of {STOCK} (stock left {left})')
+
+
+if __name__ == '__main__':
+    main()
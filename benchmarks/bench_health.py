@@ -0,0 +1,46 @@
+"""Per-call cost of the health probes against running the dependency
+checks inline, which is what a deep health check per probe would cost,
+with local dependencies and with a blob volume answering in 20 ms (a
+stand-in for a slow network mount).
+
+    python benchmarks/bench_health.py [iterations]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+
+
+def timed(label, func, iterations):
+    func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f'{label:>32}: {elapsed / iterations * 1e6:>8.1f} µs')
+
+
+def main():
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='bench-health-')
+    from main import app, blob_store, health_checker
+
+    client = app.test_client()
+    health_checker.run_checks()
+    timed('GET /api/system/health/live', lambda: client.get('/api/system/health/live'), ITERATIONS)
+    timed('GET /api/system/health/ready', lambda: client.get('/api/system/health/ready'), ITERATIONS)
+    timed('GET /api/system/health', lambda: client.get('/api/system/health'), ITERATIONS)
+    timed('dependency checks, inline', health_checker.run_checks, ITERATIONS)
+
+    check = blob_store.check
+    blob_store.check = lambda: (time.sleep(0.02), check())[1]
+    print('blob volume answering in 20 ms:')
+    timed('GET /api/system/health/ready', lambda: client.get('/api/system/health/ready'), ITERATIONS)
+    timed('dependency checks, inline', health_checker.run_checks, ITERATIONS // 20)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Connection count vs. memory for the notification SSE channel.
+
+Opens N idle SSE subscribers against a local threaded server, reports
+resident memory per held connection, then publishes one event and
+measures how long it takes to reach every subscriber.
+
+    python benchmarks/bench_notification_push.py [connections...]
+"""
+import os
+import selectors
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+COUNTS = [int(arg) for arg in sys.argv[1:]] or [100, 500, 1000]
+REQUEST = (
+    'GET /api/notifications/stream HTTP/1.1\r\n'
+    'Host: localhost\r\nX-API-Key: demo-key-123\r\nAccept: text/event-stream\r\n\r\n'
+).encode()
+
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+
+def read_until(sock, marker, timeout=10):
+    sock.settimeout(timeout)
+    data = b''
+    while marker not in data:
+        chunk = sock.recv(65536)
+        if not chunk:
+            raise ConnectionError('subscriber closed')
+        data += chunk
+    return data
+
+
+def main():
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='bench-sse-')
+    import logging
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    from werkzeug.serving import make_server
+    from main import app, notification_events, rate_limiter
+
+    # Every subscriber uses the same demo key; lift its limits for the test
+    rate_limiter.limits = {tier: (1e6, 1e6) for tier in rate_limiter.limits}
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    server.socket.listen(4096)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print(f'{"subscribers":>12} {"RSS MB":>8} {"KB/conn":>8} {"threads":>8} {"fan-out ms":>11}')
+    for count in COUNTS:
+        baseline = rss_mb()
+        sockets = []
+        for _ in range(count):
+            sock = socket.create_connection(('127.0.0.1', server.server_port))
+            sock.sendall(REQUEST)
+            read_until(sock, b'retry:')
+            sockets.append(sock)
+        held = rss_mb()
+
+        selector = selectors.DefaultSelector()
+        for sock in sockets:
+            sock.setblocking(False)
+            selector.register(sock, selectors.EVENT_READ)
+        pending = set(sockets)
+        start = time.perf_counter()
+        notification_events.publish('bench', {'n': count})
+        while pending:
+            for key, _ in selector.select(timeout=10):
+                if b'event: bench' in key.fileobj.recv(65536):
+                    pending.discard(key.fileobj)
+                    selector.unregister(key.fileobj)
+        fan_out = (time.perf_counter() - start) * 1000
+
+        print(f'{count:>12} {held:>8.1f} {(held - baseline) * 1024 / count:>8.1f} '
+              f'{threading.active_count():>8} {fan_out:>11.1f}')
+        for sock in sockets:
+            sock.close()
+        time.sleep(0.5)
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
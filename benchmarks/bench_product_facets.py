@@ -0,0 +1,69 @@
+"""Latency of faceted product queries against the secondary indexes.
+
+Compares FacetIndex.query with filtering the full product list in
+Python, which is what clients did before the filters existed.
+
+    python benchmarks/bench_product_facets.py [products]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from facets import FacetIndex  # noqa: E402
+
+PRODUCTS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+CATEGORIES = ['Electronics', 'Clothing', 'Books', 'Home & Garden', 'Toys', 'Sports', 'Beauty', 'Grocery']
+STATUSES = ['active', 'active', 'active', 'draft', 'discontinued']
+
+QUERIES = {
+    'category': ({'category': ['Books']}, {}, 'id'),
+    'category+status+price': ({'category': ['Books', 'Toys'], 'status': ['active']}, {'price': (20.0, 80.0)}, 'id'),
+    'in stock, by -price': ({'status': ['active']}, {'stock': (1, None)}, '-price'),
+    'narrow price, by price': ({}, {'price': (49.0, 50.0)}, 'price'),
+}
+
+
+def main():
+    rng = random.Random(3)
+    products = [
+        (i, {'category': rng.choice(CATEGORIES), 'status': rng.choice(STATUSES),
+             'price': round(rng.uniform(1, 500), 2), 'stock': rng.choice([0, 0, rng.randint(1, 200)])})
+        for i in range(1, PRODUCTS + 1)
+    ]
+    index = FacetIndex(('category', 'status'), ranges=('price', 'stock'), thresholds={'stock': (1, 10)})
+    start = time.perf_counter()
+    index.load(products)
+    print(f'{PRODUCTS:,} products indexed in {time.perf_counter() - start:.1f}s')
+
+    def scan(filters, ranges, sort):
+        matches = [
+            (doc_id, doc) for doc_id, doc in products
+            if all(doc[field] in values for field, values in filters.items())
+            and all((low is None or doc[field] >= low) and (high is None or doc[field] <= high)
+                    for field, (low, high) in ranges.items())
+        ]
+        if sort != 'id':
+            matches.sort(key=lambda item: item[1][sort.lstrip('-')], reverse=sort.startswith('-'))
+        return matches[:100]
+
+    # Index timings include one uncached range build amortised over 20 queries
+    print(f'{"query":>24} {"matches":>9} {"index ms":>9} {"+facets ms":>11} {"scan ms":>9}')
+    for name, (filters, ranges, sort) in QUERIES.items():
+        timings = []
+        for facets in (False, True):
+            index._range_cache.clear()
+            start = time.perf_counter()
+            for _ in range(20):
+                _, total, _ = index.query(filters, ranges, sort=sort, limit=100, facets=facets)
+            timings.append((time.perf_counter() - start) / 20 * 1000)
+        start = time.perf_counter()
+        scan(filters, ranges, sort)
+        scanned = (time.perf_counter() - start) * 1000
+        print(f'{name:>24} {total:>9,} {timings[0]:>9.2f} {timings[1]:>11.2f} {scanned:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Build time, memory and queries/sec of the product full-text index.
+
+Indexes synthetic products (1M by default) and runs exact, prefix,
+multi-token and misspelled queries against it, both uncached and with
+the index's query cache (hot queries repeat, as they do in real traffic).
+
+    python benchmarks/bench_product_search.py [products] [queries]
+"""
+import os
+import random
+import sys
+import time
+import resource
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search import InvertedIndex  # noqa: E402
+
+PRODUCTS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+QUERIES = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+
+ADJECTIVES = ['wireless', 'portable', 'gaming', 'ergonomic', 'compact', 'premium', 'smart', 'rugged',
+              'ultralight', 'waterproof', 'refurbished', 'professional', 'mechanical', 'bluetooth']
+NOUNS = ['laptop', 'phone', 'keyboard', 'mouse', 'monitor', 'headphones', 'speaker', 'camera', 'tablet',
+         'charger', 'router', 'printer', 'microphone', 'smartwatch', 'projector', 'backpack']
+CATEGORIES = ['Electronics', 'Accessories', 'Audio', 'Computers', 'Office', 'Outdoor', 'Photography']
+BRANDS = [f'brand{i}' for i in range(2_000)]
+
+
+def products(count, rng):
+    for i in range(1, count + 1):
+        noun = rng.choice(NOUNS)
+        yield i, {
+            'name': f'{rng.choice(BRANDS)} {rng.choice(ADJECTIVES)} {noun}',
+            'sku': f'SKU{i:07d}',
+            'category': rng.choice(CATEGORIES),
+            'description': f'{rng.choice(ADJECTIVES)} {noun} with {rng.choice(ADJECTIVES)} design',
+            'price': round(rng.uniform(5, 2_000), 2)
+        }
+
+
+def queries(kind, rng):
+    if kind == 'exact':
+        return lambda: rng.choice(NOUNS)
+    if kind == 'prefix':
+        return lambda: rng.choice(NOUNS)[:3]
+    if kind == 'multi-token':
+        return lambda: f'{rng.choice(BRANDS)} {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}'
+
+    def typo():
+        word = rng.choice(NOUNS)
+        position = rng.randrange(1, len(word) - 1)
+        return word[:position] + word[position + 1] + word[position] + word[position + 2:]
+    return typo
+
+
+def main():
+    rng = random.Random(42)
+    index = InvertedIndex(
+        {'name': 3.0, 'sku': 2.0, 'category': 1.5, 'description': 1.0},
+        stored_fields=('name', 'category', 'price', 'sku')
+    )
+    start = time.perf_counter()
+    index.load(products(PRODUCTS, rng))
+    build = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'{len(index):,} products indexed in {build:.1f}s, '
+          f'peak RSS {peak:.0f} MiB, {len(index.vocabulary):,} terms')
+
+    print(f'{"query":>12} {"cold q/s":>10} {"cached q/s":>11} {"avg hits":>9}')
+    for kind in ('exact', 'prefix', 'multi-token', 'typo'):
+        make_query = queries(kind, rng)
+        batch = [make_query() for _ in range(QUERIES)]
+        rates = []
+        for cache_size in (0, 1024):
+            index.cache_size = cache_size
+            hits = 0
+            start = time.perf_counter()
+            for query in batch:
+                hits += len(index.search(query, limit=10))
+            rates.append(QUERIES / (time.perf_counter() - start))
+        print(f'{kind:>12} {rates[0]:>10,.0f} {rates[1]:>11,.0f} {hits / QUERIES:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Throughput cost of the on-demand stack sampler.
+
+Runs client threads against the app for a fixed time with no profile
+running, then with /api/system/profile sampling every thread at 5 ms
+(and at 1 ms), and reports requests/sec for each.
+
+    python benchmarks/bench_profiler.py [seconds] [threads]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SECONDS = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+THREADS = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+HEADERS = {'X-API-Key': 'demo-key-123'}
+
+
+def main():
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='bench-profiler-')
+    from main import app, rate_limiter, response_cache
+
+    rate_limiter.limits = {tier: (1e9, 1e9) for tier in rate_limiter.limits}
+    response_cache.enabled = False
+
+    def load(interval_ms):
+        done = threading.Event()
+        counts = [0] * THREADS
+
+        def client(slot):
+            test_client = app.test_client()
+            while not done.is_set():
+                test_client.get('/api/products/1', headers=HEADERS)
+                counts[slot] += 1
+
+        threads = [threading.Thread(target=client, args=(slot,)) for slot in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        samples = None
+        if interval_ms:
+            response = app.test_client().get(
+                f'/api/system/profile?seconds={SECONDS}&interval_ms={interval_ms}', headers=HEADERS
+            )
+            samples = int(response.headers['X-Profile-Samples'])
+        else:
+            time.sleep(SECONDS)
+        done.set()
+        for thread in threads:
+            thread.join()
+        return sum(counts) / SECONDS, samples
+
+    load(0)
+    baseline, _ = load(0)
+    print(f'{THREADS} client threads, {SECONDS:.0f}s per run')
+    print(f'{"no profiler":>22}: {baseline:8,.0f} req/s')
+    for interval_ms in (5, 1):
+        rate, samples = load(interval_ms)
+        print(f'{f"sampling every {interval_ms} ms":>22}: {rate:8,.0f} req/s '
+              f'({rate / baseline - 1:+.1%}, {samples} stack samples)')
+
+
+if __name__ == '__main__':
+    main()
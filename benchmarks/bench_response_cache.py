@@ -0,0 +1,46 @@
+"""Requests/sec of cached read endpoints with the response cache on and off.
+
+    python benchmarks/bench_response_cache.py [requests]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+HEADERS = {'X-API-Key': 'demo-key-123'}
+ENDPOINTS = ['/api/products/?limit=100', '/api/products/1', '/api/users/?limit=100', '/api/analytics/sales']
+
+
+def main():
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='bench-cache-')
+    import db
+
+    # Seed before importing the app so its in-memory indexes load these rows
+    db.init_db(os.path.join(os.environ['DATA_DIR'], 'app.db'))
+    for i in range(500):
+        db.create_product({'name': f'Product {i}', 'price': i, 'category': 'Books', 'stock': i})
+        db.create_user({'username': f'user_{i}', 'email': f'user{i}@example.com'})
+    from main import app, rate_limiter, response_cache
+
+    # Bench traffic must not trip the per-key rate limits
+    rate_limiter.limits = {tier: (1e9, 1e9) for tier in rate_limiter.limits}
+    client = app.test_client()
+
+    print(f'{"endpoint":>26} {"uncached r/s":>13} {"cached r/s":>11}')
+    for endpoint in ENDPOINTS:
+        rates = []
+        for enabled in (False, True):
+            response_cache.enabled = enabled
+            response_cache.clear()
+            start = time.perf_counter()
+            for _ in range(REQUESTS):
+                client.get(endpoint, headers=HEADERS)
+            rates.append(REQUESTS / (time.perf_counter() - start))
+        print(f'{endpoint:>26} {rates[0]:>13,.0f} {rates[1]:>11,.0f}')
+
+
+if __name__ == '__main__':
+    main()
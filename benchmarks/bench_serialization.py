@@ -0,0 +1,69 @@
+"""Rows/sec of flask_restx marshalling against the compiled serializers.
+
+For the user, product and order models, times marshal() followed by
+json.dumps (the marshal_with path), the compiled model with the stdlib
+encoder, and the compiled model with orjson when it is installed.
+
+    python benchmarks/bench_serialization.py [rows]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+
+
+def sample_rows(model_name, count):
+    now = datetime.now().isoformat()
+    for i in range(1, count + 1):
+        if model_name == 'User':
+            yield {'id': i, 'username': f'user_{i}', 'email': f'user{i}@example.com', 'first_name': 'First',
+                   'last_name': 'Last', 'phone': None, 'role': 'user', 'status': 'active', 'created_at': now,
+                   'last_login': now, 'avatar': None}
+        elif model_name == 'Product':
+            yield {'id': i, 'name': f'Product {i}', 'description': 'A product', 'price': i * 1.25,
+                   'category': 'Books', 'stock': i % 50, 'sku': f'SKU{i}', 'status': 'active', 'created_at': now}
+        else:
+            yield {'id': i, 'user_id': i % 100, 'total_amount': i * 3.5, 'status': 'pending',
+                   'shipping_address': '1 Main St', 'payment_method': 'card', 'source': 'web', 'items': [],
+                   'created_at': now, 'updated_at': now}
+
+
+def rate(fn, rows):
+    start = time.perf_counter()
+    fn(rows)
+    return len(rows) / (time.perf_counter() - start)
+
+
+def main():
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='bench-serialize-')
+    import serializers
+    from flask_restx import marshal
+    from main import order_model, product_model, user_model
+    from serializers import compile_model
+
+    print(f'{"model":>8} {"marshal rows/s":>15} {"compiled+json":>14} {"compiled+orjson":>16}')
+    for model in (user_model, product_model, order_model):
+        rows = list(sample_rows(model.name, ROWS))
+        compiled = compile_model(model)
+
+        def stdlib(rows):
+            orjson, serializers.orjson = serializers.orjson, None
+            try:
+                return compiled.dumps(rows)
+            finally:
+                serializers.orjson = orjson
+
+        baseline = rate(lambda rows: json.dumps(marshal(rows, model)), rows)
+        plain = rate(stdlib, rows)
+        fast = f'{rate(compiled.dumps, rows):>16,.0f}' if serializers.orjson else f'{"n/a":>16}'
+        print(f'{model.name:>8} {baseline:>15,.0f} {plain:>14,.0f} {fast}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Cost of the telemetry collector: one background reading, and the
+request-path cost of /api/system/info and /api/system/health, which
+only read what the collector already sampled.
+
+    python benchmarks/bench_telemetry.py [iterations]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+HEADERS = {'X-API-Key': 'demo-key-123'}
+
+
+def timed(label, func, iterations):
+    func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f'{label:>28}: {elapsed / iterations * 1e6:>8.1f} µs')
+
+
+def main():
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='bench-telemetry-')
+    from main import app, rate_limiter, telemetry
+
+    rate_limiter.limits = {tier: (1e9, 1e9) for tier in rate_limiter.limits}
+    client = app.test_client()
+
+    timed('collector reading', telemetry.sample, ITERATIONS)
+    # Fill the ring buffer; these readings all fall inside every window, the worst case for /info
+    for _ in range(telemetry._samples.maxlen):
+        telemetry.sample()
+    timed('GET /api/system/health', lambda: client.get('/api/system/health'), ITERATIONS)
+    timed('GET /api/system/info', lambda: client.get('/api/system/info', headers=HEADERS), ITERATIONS)
+    timed('GET /api/products/1', lambda: client.get('/api/products/1', headers=HEADERS), ITERATIONS)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Peak memory of GET /api/users/ as the users table grows.
+
+Compares building the whole JSON array in memory (the old behaviour)
+against the streamed NDJSON mode and a single keyset page.
+
+    python benchmarks/bench_user_listing.py [sizes...]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SIZES = [int(arg) for arg in sys.argv[1:]] or [5_000, 20_000, 80_000]
+HEADERS = {'X-API-Key': 'demo-key-123'}
+
+
+def fill(conn, count):
+    rows = ((f'user_{i}', f'user{i}@example.com', 'First', 'Last', '2025-01-07T10:00:00') for i in range(count))
+    with conn:
+        conn.execute('DELETE FROM users')
+        conn.executemany(
+            'INSERT INTO users (username, email, first_name, last_name, created_at) VALUES (?, ?, ?, ?, ?)', rows
+        )
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024, elapsed, size
+
+
+def main():
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='bench-users-')
+    import db
+    from main import app
+    from main import user_model
+    from flask_restx import marshal
+
+    client = app.test_client()
+
+    def materialized():
+        body = json.dumps(marshal(db.list_users(0, -1), user_model))
+        return len(body)
+
+    def streamed():
+        response = client.get('/api/users/?stream=ndjson', headers=HEADERS, buffered=False)
+        total = sum(len(chunk) for chunk in response.response)
+        response.close()
+        return total
+
+    def paged():
+        response = client.get('/api/users/?limit=1000', headers=HEADERS)
+        return len(response.data)
+
+    print(f'{"rows":>10} {"mode":>12} {"peak MiB":>10} {"seconds":>9} {"bytes":>12}')
+    for count in SIZES:
+        fill(db.get_db(), count)
+        for name, fn in (('full list', materialized), ('ndjson', streamed), ('page 1000', paged)):
+            peak, elapsed, size = measure(fn)
+            print(f'{count:>10} {name:>12} {peak:>10.2f} {elapsed:>9.3f} {size:>12}')
+
+
+if __name__ == '__main__':
+    main()
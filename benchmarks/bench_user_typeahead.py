@@ -0,0 +1,79 @@
+"""Latency of /api/users/search prefix lookups against the user index.
+
+Compares the in-memory prefix index with the LIKE scan it replaces, one
+keystroke at a time, as the admin console issues them.
+
+    python benchmarks/bench_user_typeahead.py [users]
+"""
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search import PrefixIndex  # noqa: E402
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+FIRST = ['john', 'jane', 'alex', 'maria', 'li', 'omar', 'sofia', 'ivan', 'noor', 'kenji', 'ana', 'pete']
+LAST = ['smith', 'doe', 'garcia', 'chen', 'khan', 'novak', 'silva', 'tanaka', 'okafor', 'berg']
+
+
+def users(count, rng):
+    for i in range(1, count + 1):
+        first, last = rng.choice(FIRST), rng.choice(LAST)
+        yield i, {
+            'username': f'{first}_{last}{i}',
+            'email': f'{first}.{last}{i}@example.com',
+            'first_name': first.title(),
+            'last_name': last.title()
+        }
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main():
+    rng = random.Random(7)
+    rows = list(users(USERS, rng))
+    index = PrefixIndex(
+        ('username', 'email', 'first_name', 'last_name', ('first_name', 'last_name')),
+        stored_fields=('username', 'email', 'first_name', 'last_name')
+    )
+    start = time.perf_counter()
+    index.load(rows)
+    print(f'{USERS:,} users indexed in {time.perf_counter() - start:.2f}s')
+
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, username, email, first_name, last_name)')
+    conn.executemany('INSERT INTO users VALUES (?, ?, ?, ?, ?)', (
+        (i, u['username'], u['email'], u['first_name'], u['last_name']) for i, u in rows
+    ))
+
+    def scan(prefix):
+        pattern = prefix + '%'
+        return conn.execute(
+            'SELECT id, username, email, first_name, last_name FROM users WHERE username LIKE ? OR email LIKE ? '
+            'OR first_name LIKE ? OR last_name LIKE ? LIMIT 10', (pattern,) * 4
+        ).fetchall()
+
+    # Every keystroke of a few full usernames
+    targets = [rng.choice(rows)[1]['username'] for _ in range(50)]
+    keystrokes = [name[:end] for name in targets for end in range(1, len(name) + 1)]
+    print(f'{"":>14} {"us/query":>9}')
+    print(f'{"prefix index":>14} {timed(lambda q: index.search(q, 10), keystrokes):>9.1f}')
+    print(f'{"LIKE scan":>14} {timed(scan, keystrokes[::20]):>9.1f}')
+
+    start = time.perf_counter()
+    for doc_id, doc in rows[:1000]:
+        index.add(doc_id, {**doc, 'username': doc['username'] + 'x'})
+    print(f'update: {(time.perf_counter() - start) / 1000 * 1e6:.1f} us/user')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+import hashlib
+import os
+import secrets
+import shutil
+from contextlib import contextmanager
+from datetime import datetime
+
+import db
+from file_store import copy_stream
+
+
+class BlobStore:
+    """Content-addressed, reference-counted storage for uploaded bodies.
+
+    Blobs live at ``<root>/<aa>/<bb>/<sha256>`` and are shared by every
+    file, avatar or product image with the same content, so a duplicate
+    upload costs one hash pass and no extra disk (and identical downloads
+    hit the same page-cache pages). Reference counts are kept in the
+    ``blobs`` table and updated under an immediate transaction so that
+    concurrent writers across processes agree on when a blob can go.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.tmp_dir = os.path.join(root, 'tmp')
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def relative_path(self, digest):
+        return os.path.join(digest[:2], digest[2:4], digest)
+
+    def path(self, digest):
+        return os.path.join(self.root, self.relative_path(digest))
+
+    @contextmanager
+    def _transaction(self):
+        conn = db.get_db()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def temp_path(self):
+        return os.path.join(self.tmp_dir, secrets.token_hex(16))
+
+    def put_stream(self, stream):
+        """Store the body read from ``stream``; return (sha256, size)"""
+        tmp_path = self.temp_path()
+        hasher = hashlib.sha256()
+        try:
+            with open(tmp_path, 'wb') as f:
+                size = copy_stream(stream, f, hasher)
+            digest = hasher.hexdigest()
+            self.adopt(tmp_path, digest, size)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return digest, size
+
+    def adopt(self, tmp_path, digest, size):
+        """Take ownership of an already hashed file, deduplicating against existing blobs"""
+        with self._transaction() as conn:
+            updated = conn.execute('UPDATE blobs SET refcount = refcount + 1 WHERE sha256 = ?', (digest,)).rowcount
+            if updated:
+                os.remove(tmp_path)
+                return False
+            target = self.path(digest)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(tmp_path, target)
+            conn.execute(
+                'INSERT INTO blobs (sha256, size, refcount, created_at) VALUES (?, ?, 1, ?)',
+                (digest, size, datetime.now().isoformat())
+            )
+        return True
+
+    def check(self):
+        """Write, read back and remove a probe file; return the blob volume's free space"""
+        probe = self.temp_path()
+        try:
+            with open(probe, 'wb') as f:
+                f.write(b'probe')
+            with open(probe, 'rb') as f:
+                if f.read() != b'probe':
+                    raise OSError(f'Probe file {probe} read back altered')
+        finally:
+            if os.path.exists(probe):
+                os.remove(probe)
+        usage = shutil.disk_usage(self.root)
+        return {'free_bytes': usage.free, 'total_bytes': usage.total}
+
+    def exists(self, digest):
+        return db.get_db().execute('SELECT 1 FROM blobs WHERE sha256 = ?', (digest,)).fetchone() is not None
+
+    def release(self, digest):
+        """Drop one reference; the blob is deleted with its last reference"""
+        with self._transaction() as conn:
+            conn.execute('UPDATE blobs SET refcount = refcount - 1 WHERE sha256 = ?', (digest,))
+            row = conn.execute('SELECT refcount FROM blobs WHERE sha256 = ?', (digest,)).fetchone()
+            if row is not None and row['refcount'] <= 0:
+                conn.execute('DELETE FROM blobs WHERE sha256 = ?', (digest,))
+                if os.path.exists(self.path(digest)):
+                    os.remove(self.path(digest))
@@ -0,0 +1,683 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from pool import ConnectionPool
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    email TEXT NOT NULL,
+    first_name TEXT,
+    last_name TEXT,
+    phone TEXT,
+    role TEXT,
+    status TEXT,
+    created_at TEXT,
+    last_login TEXT,
+    avatar TEXT
+);
+
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    description TEXT,
+    price REAL NOT NULL,
+    category TEXT,
+    stock INTEGER NOT NULL DEFAULT 0,
+    sku TEXT,
+    status TEXT,
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    total_amount REAL,
+    status TEXT,
+    shipping_address TEXT,
+    payment_method TEXT,
+    source TEXT,
+    items TEXT,
+    created_at TEXT,
+    updated_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS files (
+    file_id TEXT PRIMARY KEY,
+    filename TEXT,
+    content_type TEXT,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    owner TEXT,
+    uploaded_at TEXT
+);
+CREATE INDEX IF NOT EXISTS files_owner ON files (owner, file_id);
+
+CREATE TABLE IF NOT EXISTS uploads (
+    upload_id TEXT PRIMARY KEY,
+    filename TEXT,
+    content_type TEXT,
+    total_size INTEGER NOT NULL,
+    offset INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    refcount INTEGER NOT NULL,
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS product_images (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_id INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    content_type TEXT,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS product_images_product ON product_images (product_id);
+
+CREATE TABLE IF NOT EXISTS reservations (
+    reservation_id TEXT PRIMARY KEY,
+    product_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    created_at TEXT,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reservations_product ON reservations (product_id, expires_at);
+CREATE INDEX IF NOT EXISTS reservations_expiry ON reservations (expires_at);
+
+CREATE TABLE IF NOT EXISTS notifications (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT,
+    message TEXT,
+    read INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS deliveries (
+    tracking_id TEXT PRIMARY KEY,
+    channel TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    delivered INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    created_at TEXT,
+    finished_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS api_keys (
+    key_hash TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    permissions TEXT NOT NULL,
+    created_at TEXT,
+    revoked_at TEXT
+);
+'''
+
+USER_COLUMNS = ('username', 'email', 'first_name', 'last_name', 'phone', 'role', 'status', 'created_at', 'last_login')
+PRODUCT_COLUMNS = ('name', 'description', 'price', 'category', 'stock', 'sku', 'status', 'created_at')
+# Once a product exists only the inventory store changes its stock, so it never drops below what is reserved
+PRODUCT_UPDATE_COLUMNS = tuple(column for column in PRODUCT_COLUMNS if column != 'stock')
+ORDER_COLUMNS = (
+    'user_id', 'total_amount', 'status', 'shipping_address', 'payment_method', 'source', 'items',
+    'created_at', 'updated_at'
+)
+
+SAMPLE_USERS = [
+    {'username': 'john_doe', 'email': 'john@example.com', 'first_name': 'John', 'last_name': 'Doe'},
+    {'username': 'jane_smith', 'email': 'jane@example.com', 'first_name': 'Jane', 'last_name': 'Smith'}
+]
+
+SAMPLE_PRODUCTS = [
+    {'name': 'Laptop', 'price': 999.99, 'category': 'Electronics', 'stock': 50, 'status': 'active'},
+    {'name': 'Phone', 'price': 599.99, 'category': 'Electronics', 'stock': 100, 'status': 'active'}
+]
+
+# Hot single-row lookups; every pooled connection compiles them once when it is opened
+GET_USER = 'SELECT * FROM users WHERE id = ?'
+GET_PRODUCT = 'SELECT * FROM products WHERE id = ?'
+GET_ORDER = 'SELECT * FROM orders WHERE id = ?'
+PREPARED_STATEMENTS = (GET_USER, GET_PRODUCT, GET_ORDER)
+
+_local = threading.local()
+_database_path = None
+_pool = None
+
+
+def connect():
+    """Open a new connection to the configured database"""
+    conn = sqlite3.connect(_database_path, timeout=30, check_same_thread=False, cached_statements=256)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+def _connect_prepared():
+    conn = connect()
+    # sqlite3 keeps compiled statements per connection, keyed by SQL text;
+    # running each hot lookup once puts it in that cache before first use
+    for statement in PREPARED_STATEMENTS:
+        conn.execute(statement, (None,)).fetchone()
+    return conn
+
+
+def get_db():
+    """Return the connection checked out to the current thread, checking one out on first use.
+
+    Request threads give it back through ``release`` at teardown; other
+    threads should prefer the ``connection()`` context manager.
+    """
+    slot = getattr(_local, 'slot', None)
+    if slot is not None and _local.pool is not _pool:
+        release()
+        slot = None
+    if slot is None:
+        slot = _local.slot = _pool.acquire()
+        _local.pool = _pool
+    return slot.conn
+
+
+def release():
+    """Return the current thread's connection (if any) to the pool"""
+    slot = getattr(_local, 'slot', None)
+    if slot is not None:
+        _local.slot = None
+        _local.pool.release(slot)
+
+
+@contextmanager
+def connection():
+    """Yield a pooled connection for the duration of the block.
+
+    Reuses the thread's connection when it already holds one, so it nests
+    safely inside request handlers.
+    """
+    if getattr(_local, 'slot', None) is not None and _local.pool is _pool:
+        yield _local.slot.conn
+        return
+    with _pool.connection() as conn:
+        yield conn
+
+
+def pool_stats():
+    return _pool.stats() if _pool is not None else None
+
+
+def ping():
+    """Check a connection out of the pool, run a trivial query on it and return the pool stats"""
+    with _pool.connection() as conn:
+        conn.execute('SELECT 1').fetchone()
+    return _pool.stats()
+
+
+def init_db(path, **pool_options):
+    """Create the schema, seed sample data into an empty database and open the connection pool.
+
+    ``pool_options`` are passed to ConnectionPool (size, max_overflow,
+    timeout, recycle, pre_ping).
+    """
+    global _database_path, _pool
+    _database_path = path
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = connect()
+    try:
+        conn.executescript(SCHEMA)
+    finally:
+        conn.close()
+    if _pool is not None:
+        _pool.dispose()
+    _pool = ConnectionPool(_connect_prepared, **pool_options)
+    conn = get_db()
+    if conn.execute('SELECT 1 FROM users LIMIT 1').fetchone() is None:
+        for user in SAMPLE_USERS:
+            create_user(user)
+    if conn.execute('SELECT 1 FROM products LIMIT 1').fetchone() is None:
+        for product in SAMPLE_PRODUCTS:
+            create_product(product)
+    release()
+
+
+def _insert(table, columns, row, conn=None):
+    """Insert ``row`` and return its id; pass ``conn`` to join the caller's open transaction"""
+    sql = f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})'
+    if conn is not None:
+        return conn.execute(sql, [row[column] for column in columns]).lastrowid
+    conn = get_db()
+    with conn:
+        cursor = conn.execute(sql, [row[column] for column in columns])
+    return cursor.lastrowid
+
+
+def _iter_table(table, after=0, limit=None, batch_size=500, decode=dict):
+    """Yield rows ordered by id straight from the cursor.
+
+    Checks out its own pooled connection so that an abandoned stream
+    never leaves a cursor open on the thread's connection; it goes back
+    to the pool when the generator is closed.
+    """
+    with _pool.connection() as conn:
+        cursor = conn.execute(
+            f'SELECT * FROM {table} WHERE id > ? ORDER BY id LIMIT ?',
+            (after, -1 if limit is None else limit)
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield decode(row)
+
+
+def _update_row(table, columns, row_id, data, check=None):
+    changes = {column: data[column] for column in columns if column in data and column != 'created_at'}
+    conn = get_db()
+    with conn:
+        row = conn.execute(f'SELECT * FROM {table} WHERE id = ?', (row_id,)).fetchone()
+        if row is None:
+            return None
+        if check is not None:
+            # Raising here aborts the update inside the same transaction
+            check(dict(row))
+        if changes:
+            conn.execute(
+                f'UPDATE {table} SET {", ".join(f"{column} = ?" for column in changes)} WHERE id = ?',
+                [*changes.values(), row_id]
+            )
+    previous = dict(row)
+    return previous, {**previous, **changes}
+
+
+def _delete_row(table, row_id):
+    conn = get_db()
+    with conn:
+        row = conn.execute(f'SELECT * FROM {table} WHERE id = ?', (row_id,)).fetchone()
+        if row is not None:
+            conn.execute(f'DELETE FROM {table} WHERE id = ?', (row_id,))
+    return dict(row) if row is not None else None
+
+
+# Users
+
+def _user_row(data):
+    row = {column: data.get(column) for column in USER_COLUMNS}
+    row['created_at'] = row['created_at'] or datetime.now().isoformat()
+    return row
+
+
+def create_user(data):
+    row = _user_row(data)
+    return {'id': _insert('users', USER_COLUMNS, row), **row}
+
+
+def list_users(after=0, limit=100):
+    """Return one keyset page of users ordered by id"""
+    rows = get_db().execute(
+        'SELECT * FROM users WHERE id > ? ORDER BY id LIMIT ?', (after, limit)
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def iter_users(after=0, limit=None, batch_size=500):
+    return _iter_table('users', after, limit, batch_size)
+
+
+def get_user(user_id):
+    row = get_db().execute(GET_USER, (user_id,)).fetchone()
+    return dict(row) if row is not None else None
+
+
+def update_user(user_id, data, check=None):
+    """Apply ``data`` to a user; return (previous, updated) or None if it does not exist.
+
+    ``check`` is called with the current row before writing and may raise to abort.
+    """
+    return _update_row('users', USER_COLUMNS, user_id, data, check)
+
+
+def delete_user(user_id):
+    """Delete a user and return it, or None if it does not exist"""
+    return _delete_row('users', user_id)
+
+
+def set_user_avatar(user_id, digest):
+    """Point the user's avatar at a blob; return the digest it replaced"""
+    conn = get_db()
+    with conn:
+        row = conn.execute('SELECT avatar FROM users WHERE id = ?', (user_id,)).fetchone()
+        conn.execute('UPDATE users SET avatar = ? WHERE id = ?', (digest, user_id))
+    return row['avatar'] if row is not None else None
+
+
+# Products
+
+def _product_row(data):
+    row = {column: data.get(column) for column in PRODUCT_COLUMNS}
+    row['stock'] = row['stock'] or 0
+    row['status'] = row['status'] or 'active'
+    row['created_at'] = row['created_at'] or datetime.now().isoformat()
+    return row
+
+
+def create_product(data):
+    row = _product_row(data)
+    return {'id': _insert('products', PRODUCT_COLUMNS, row), **row}
+
+
+def get_product(product_id):
+    row = get_db().execute(GET_PRODUCT, (product_id,)).fetchone()
+    return dict(row) if row is not None else None
+
+
+def list_products(after=0, limit=100):
+    rows = get_db().execute(
+        'SELECT * FROM products WHERE id > ? ORDER BY id LIMIT ?', (after, limit)
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_products(product_ids):
+    """Fetch products by id, returned in the order of ``product_ids``"""
+    if not product_ids:
+        return []
+    rows = get_db().execute(
+        f'SELECT * FROM products WHERE id IN ({", ".join("?" * len(product_ids))})', list(product_ids)
+    ).fetchall()
+    by_id = {row['id']: dict(row) for row in rows}
+    return [by_id[product_id] for product_id in product_ids if product_id in by_id]
+
+
+def iter_products(after=0, limit=None, batch_size=500):
+    return _iter_table('products', after, limit, batch_size)
+
+
+def update_product(product_id, data, check=None):
+    """Apply ``data`` to a product; return (previous, updated) or None if it does not exist.
+
+    ``check`` is called with the current row before writing and may raise to abort.
+    """
+    return _update_row('products', PRODUCT_UPDATE_COLUMNS, product_id, data, check)
+
+
+def delete_product(product_id):
+    """Delete a product and return it, or None if it does not exist"""
+    return _delete_row('products', product_id)
+
+
+# Product images
+
+def add_product_image(product_id, digest, content_type):
+    row = {
+        'product_id': product_id,
+        'sha256': digest,
+        'content_type': content_type,
+        'created_at': datetime.now().isoformat()
+    }
+    return {'id': _insert('product_images', tuple(row), row), **row}
+
+
+def delete_product_images(product_ids):
+    """Delete the images of deleted products; return the blob digests they referenced"""
+    product_ids = list(product_ids)
+    if not product_ids:
+        return []
+    conn = get_db()
+    with conn:
+        digests = []
+        chunk = _MAX_VARIABLES
+        for start in range(0, len(product_ids), chunk):
+            ids = product_ids[start:start + chunk]
+            placeholders = ", ".join("?" * len(ids))
+            digests += [row['sha256'] for row in conn.execute(
+                f'SELECT sha256 FROM product_images WHERE product_id IN ({placeholders})', ids
+            )]
+            conn.execute(f'DELETE FROM product_images WHERE product_id IN ({placeholders})', ids)
+    return digests
+
+
+# Orders
+
+def _decode_order(row):
+    order = dict(row)
+    try:
+        order['items'] = json.loads(order['items']) if order['items'] else []
+    except ValueError:
+        pass  # left as stored, for readers to reject, rather than failing every scan of the table
+    return order
+
+
+def _order_row(data):
+    now = datetime.now().isoformat()
+    row = {column: data.get(column) for column in ORDER_COLUMNS}
+    row['status'] = row['status'] or 'pending'
+    row['created_at'] = row['created_at'] or now
+    row['updated_at'] = now
+    row['items'] = row['items'] or []
+    return row
+
+
+def _encode_order(row):
+    if 'items' not in row:
+        return row
+    return {**row, 'items': json.dumps(row['items'] or [])}
+
+
+def _touch_order(changes):
+    return {**changes, 'updated_at': datetime.now().isoformat()}
+
+
+def create_order(data, conn=None):
+    row = _order_row(data)
+    return {'id': _insert('orders', ORDER_COLUMNS, _encode_order(row), conn), **row}
+
+
+def list_orders(after=0, limit=100):
+    """Return one keyset page of orders ordered by id"""
+    rows = get_db().execute(
+        'SELECT * FROM orders WHERE id > ? ORDER BY id LIMIT ?', (after, limit)
+    ).fetchall()
+    return [_decode_order(row) for row in rows]
+
+
+def iter_orders(after=0, limit=None, batch_size=500):
+    return _iter_table('orders', after, limit, batch_size, decode=_decode_order)
+
+
+def get_order(order_id):
+    row = get_db().execute(GET_ORDER, (order_id,)).fetchone()
+    return _decode_order(row) if row is not None else None
+
+
+def update_order(order_id, data, check=None):
+    """Apply ``data`` to an order; return (previous, updated) or None if it does not exist.
+
+    ``check`` is called with the current order before writing and may raise to abort.
+    """
+    changes = {column: data[column] for column in ORDER_COLUMNS if column in data and column != 'created_at'}
+    if 'items' in changes:
+        changes['items'] = json.dumps(changes['items'] or [])
+    changes['updated_at'] = datetime.now().isoformat()
+    conn = get_db()
+    with conn:
+        row = conn.execute('SELECT * FROM orders WHERE id = ?', (order_id,)).fetchone()
+        if row is None:
+            return None
+        if check is not None:
+            check(_decode_order(row))
+        conn.execute(
+            f'UPDATE orders SET {", ".join(f"{column} = ?" for column in changes)} WHERE id = ?',
+            [*changes.values(), order_id]
+        )
+    previous = _decode_order(row)
+    return previous, get_order(order_id)
+
+
+def count_orders_by_status():
+    """Authoritative {status: count}; a full scan, so only for reconciling live counters"""
+    with connection() as conn:
+        rows = conn.execute("SELECT COALESCE(status, 'pending'), COUNT(*) FROM orders GROUP BY 1").fetchall()
+    return {status: count for status, count in rows}
+
+
+# Notifications
+
+def _decode_notification(row):
+    notification = dict(row)
+    notification['read'] = bool(notification['read'])
+    return notification
+
+
+def create_notification(data):
+    row = {
+        'title': data.get('title'),
+        'message': data.get('message'),
+        'read': 0,
+        'created_at': datetime.now().isoformat()
+    }
+    return _decode_notification({'id': _insert('notifications', tuple(row), row), **row})
+
+
+def list_notifications(after=0, limit=100):
+    rows = get_db().execute(
+        'SELECT * FROM notifications WHERE id > ? ORDER BY id LIMIT ?', (after, limit)
+    ).fetchall()
+    return [_decode_notification(row) for row in rows]
+
+
+def mark_notification_read(notification_id):
+    conn = get_db()
+    with conn:
+        updated = conn.execute('UPDATE notifications SET read = 1 WHERE id = ?', (notification_id,)).rowcount
+    return bool(updated)
+
+
+# Bulk writes
+
+def _identity(row):
+    return row
+
+
+# table -> (columns, columns an update may change, new row from data, row/changes to stored form,
+#           changes hook, stored row to dict)
+_BULK_TABLES = {
+    'users': (USER_COLUMNS, USER_COLUMNS, _user_row, _identity, _identity, dict),
+    'products': (PRODUCT_COLUMNS, PRODUCT_UPDATE_COLUMNS, _product_row, _identity, _identity, dict),
+    'orders': (ORDER_COLUMNS, ORDER_COLUMNS, _order_row, _encode_order, _touch_order, _decode_order),
+}
+
+# Keep each multi-row INSERT under SQLite's default bound-parameter limit
+_MAX_VARIABLES = 32766
+
+
+def bulk_write(table, operations):
+    """Apply ``(op, row_id, data)`` operations to ``table`` in one transaction.
+
+    ``op`` is ``create``, ``update`` or ``delete``. Runs of creates are
+    written with multi-row INSERTs; an operation that fails (unknown id,
+    constraint violation, changing product stock) is reported without affecting the others.
+    Returns one ``(status, row_id, previous, current)`` tuple per
+    operation, where status is an HTTP-style code and, for failures,
+    ``current`` holds the error message.
+    """
+    columns, updatable, new_row, encode, touch, decode = _BULK_TABLES[table]
+    results = [None] * len(operations)
+    conn = get_db()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        existing = {}
+        wanted = list({row_id for op, row_id, _ in operations if op != 'create'})
+        chunk = _MAX_VARIABLES // 2
+        for start in range(0, len(wanted), chunk):
+            ids = wanted[start:start + chunk]
+            rows = conn.execute(f'SELECT * FROM {table} WHERE id IN ({", ".join("?" * len(ids))})', ids)
+            existing.update((row['id'], decode(row)) for row in rows)
+
+        pending = []
+
+        def flush():
+            per_statement = _MAX_VARIABLES // len(columns)
+            for start in range(0, len(pending), per_statement):
+                _insert_many(conn, table, columns, pending[start:start + per_statement], encode, results)
+            # Later operations in the batch may refer to rows created here
+            for index, _ in pending:
+                status, row_id, _, current = results[index]
+                if status == 201:
+                    existing[row_id] = current
+            pending.clear()
+
+        for index, (op, row_id, data) in enumerate(operations):
+            if op == 'create':
+                pending.append((index, new_row(data)))
+                continue
+            flush()
+            previous = existing.get(row_id)
+            if previous is None:
+                results[index] = (404, row_id, None, f'{table[:-1].capitalize()} {row_id} not found')
+                continue
+            if op == 'delete':
+                conn.execute(f'DELETE FROM {table} WHERE id = ?', (row_id,))
+                del existing[row_id]
+                results[index] = (200, row_id, previous, None)
+                continue
+            fixed = [column for column in columns
+                     if column not in updatable and column in data and data[column] != previous[column]]
+            if fixed:
+                results[index] = (409, row_id, previous, f'{", ".join(fixed)} cannot be changed by an update')
+                continue
+            changes = {column: data[column] for column in updatable if column in data and column != 'created_at'}
+            changes = touch(changes) if changes else changes
+            if changes:
+                stored = encode(changes)
+                try:
+                    conn.execute(
+                        f'UPDATE {table} SET {", ".join(f"{column} = ?" for column in stored)} WHERE id = ?',
+                        [*stored.values(), row_id]
+                    )
+                except sqlite3.IntegrityError as e:
+                    results[index] = (422, row_id, previous, str(e))
+                    continue
+            current = existing[row_id] = {**previous, **changes}
+            results[index] = (200, row_id, previous, current)
+        flush()
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+    return results
+
+
+def _insert_many(conn, table, columns, pending, encode, results):
+    stored = [encode(row) for _, row in pending]
+    placeholders = f'({", ".join("?" * len(columns))})'
+    try:
+        cursor = conn.execute(
+            f'INSERT INTO {table} ({", ".join(columns)}) VALUES {", ".join([placeholders] * len(stored))}',
+            [row[column] for row in stored for column in columns]
+        )
+    except sqlite3.IntegrityError:
+        # One bad row fails the whole statement; redo them one by one to find it
+        for (index, row), values in zip(pending, stored):
+            try:
+                cursor = conn.execute(
+                    f'INSERT INTO {table} ({", ".join(columns)}) VALUES {placeholders}',
+                    [values[column] for column in columns]
+                )
+            except sqlite3.IntegrityError as e:
+                results[index] = (422, None, None, str(e))
+                continue
+            results[index] = (201, cursor.lastrowid, None, {'id': cursor.lastrowid, **row})
+        return
+    # Under the write lock a multi-row INSERT assigns consecutive ids
+    first_id = cursor.lastrowid - len(pending) + 1
+    for offset, (index, row) in enumerate(pending):
+        results[index] = (201, first_id + offset, None, {'id': first_id + offset, **row})
@@ -0,0 +1,123 @@
+import random
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import db
+
+CHANNELS = ('email', 'sms', 'push')
+
+# Channel -> batches allowed in flight at once (provider connection limits)
+DEFAULT_CHANNEL_LIMITS = {'email': 8, 'sms': 4, 'push': 16}
+
+
+class TransientDeliveryError(Exception):
+    """A batch failed in a way that is worth retrying"""
+
+
+class StubTransport:
+    """Local transport for development and offline benchmarks.
+
+    Sleeps ``latency`` seconds per batch and fails a batch with
+    probability ``failure_rate`` so that retries get exercised.
+    """
+
+    def __init__(self, latency=0.0, failure_rate=0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.delivered = 0
+        self._lock = threading.Lock()
+
+    def send(self, channel, recipients, payload):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise TransientDeliveryError(f'{channel} provider unavailable')
+        with self._lock:
+            self.delivered += len(recipients)
+
+
+TRANSPORTS = {'stub': StubTransport}
+
+
+class DeliveryPipeline:
+    """Fan a send out in batches over a thread pool.
+
+    Each channel has its own concurrency limit, failed batches are retried
+    with exponential backoff and jitter, and progress is recorded in the
+    deliveries table so any worker can answer a status query.
+    """
+
+    def __init__(self, transports, workers=16, batch_size=500, channel_limits=None,
+                 max_attempts=4, backoff=0.5):
+        self.transports = transports
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        limits = dict(DEFAULT_CHANNEL_LIMITS, **(channel_limits or {}))
+        self._slots = {channel: threading.BoundedSemaphore(limit) for channel, limit in limits.items()}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='delivery')
+
+    def submit(self, channel, recipients, payload):
+        """Record the delivery, queue its batches and return immediately"""
+        delivery = {
+            'tracking_id': 'DLV' + secrets.token_hex(8).upper(),
+            'channel': channel,
+            'total': len(recipients),
+            'delivered': 0,
+            'failed': 0,
+            'status': 'queued' if recipients else 'completed',
+            'created_at': datetime.now().isoformat()
+        }
+        conn = db.get_db()
+        with conn:
+            conn.execute(
+                'INSERT INTO deliveries (tracking_id, channel, total, delivered, failed, status, created_at) '
+                'VALUES (:tracking_id, :channel, :total, :delivered, :failed, :status, :created_at)',
+                delivery
+            )
+        for start in range(0, len(recipients), self.batch_size):
+            batch = recipients[start:start + self.batch_size]
+            self._executor.submit(self._deliver_batch, delivery['tracking_id'], channel, batch, payload)
+        return delivery
+
+    def status(self, tracking_id):
+        row = db.get_db().execute('SELECT * FROM deliveries WHERE tracking_id = ?', (tracking_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def _deliver_batch(self, tracking_id, channel, batch, payload):
+        transport = self.transports[channel]
+        delivered = False
+        for attempt in range(self.max_attempts):
+            if attempt:
+                # Back off outside the channel slot so other batches keep flowing
+                time.sleep(self.backoff * 2 ** (attempt - 1) * (0.5 + random.random()))
+            with self._slots[channel]:
+                try:
+                    transport.send(channel, batch, payload)
+                    delivered = True
+                    break
+                except TransientDeliveryError:
+                    continue
+                except Exception:
+                    break
+        self._record(tracking_id, len(batch) if delivered else 0, 0 if delivered else len(batch))
+
+    def _record(self, tracking_id, delivered, failed):
+        # Worker threads borrow a pooled connection per batch instead of pinning one each
+        with db.connection() as conn, conn:
+            conn.execute(
+                "UPDATE deliveries SET delivered = delivered + ?, failed = failed + ?, status = 'sending' "
+                "WHERE tracking_id = ?",
+                (delivered, failed, tracking_id)
+            )
+            conn.execute(
+                "UPDATE deliveries SET status = CASE WHEN failed = 0 THEN 'completed' ELSE 'completed_with_errors' END, "
+                "finished_at = ? WHERE tracking_id = ? AND delivered + failed >= total",
+                (datetime.now().isoformat(), tracking_id)
+            )
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+
+
+class Event:
+    __slots__ = ('id', 'type', 'data', 'created_at')
+
+    def __init__(self, event_id, event_type, data):
+        self.id = event_id
+        self.type = event_type
+        # Serialized once at publish time, shared by every subscriber
+        self.data = json.dumps(data)
+        self.created_at = time.time()
+
+    def to_sse(self):
+        return f'id: {self.id}\nevent: {self.type}\ndata: {self.data}\n\n'
+
+    def to_dict(self):
+        return {'id': self.id, 'type': self.type, 'data': json.loads(self.data)}
+
+
+class EventBroker:
+    """In-process fan-out of events to SSE and long-poll subscribers.
+
+    Events go into a bounded ring buffer with increasing ids. Subscribers
+    hold nothing but the id of the last event they saw and block on a
+    shared condition, so an idle subscriber costs no per-subscriber queue
+    and a publish is O(1) regardless of how many are listening. Async
+    subscribers (``wait_async``/``astream``) likewise share one future per
+    event loop, which a publish from any thread resolves.
+    """
+
+    def __init__(self, capacity=1024):
+        self._events = deque(maxlen=capacity)
+        self._last_id = 0
+        self._cond = threading.Condition()
+        # event loop -> future resolved by the next publish
+        self._loop_waiters = {}
+
+    @property
+    def last_id(self):
+        return self._last_id
+
+    def publish(self, event_type, data):
+        with self._cond:
+            self._last_id += 1
+            event = Event(self._last_id, event_type, data)
+            self._events.append(event)
+            self._cond.notify_all()
+            waiters, self._loop_waiters = self._loop_waiters, {}
+        for loop, future in waiters.items():
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                # That loop has been closed; its subscribers are gone with it
+                pass
+        return event
+
+    def since(self, last_id):
+        """Events newer than ``last_id``; ``None`` if some were already evicted"""
+        with self._cond:
+            return self._since(last_id)
+
+    def _since(self, last_id):
+        events = self._events
+        if last_id >= self._last_id:
+            return []
+        if not events or last_id < events[0].id - 1:
+            return None
+        # New events sit at the right end, so walk back only over those
+        newer = []
+        for event in reversed(events):
+            if event.id <= last_id:
+                break
+            newer.append(event)
+        newer.reverse()
+        return newer
+
+    def wait(self, last_id, timeout):
+        """Block until an event newer than ``last_id`` exists or ``timeout`` expires"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._last_id > last_id, timeout)
+            return self._since(last_id)
+
+    async def wait_async(self, last_id, timeout):
+        """``wait`` for coroutines: suspends the task instead of blocking a thread"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            with self._cond:
+                remaining = deadline - loop.time()
+                if self._last_id > last_id or remaining <= 0:
+                    return self._since(last_id)
+                future = self._loop_waiters.get(loop)
+                if future is None:
+                    future = self._loop_waiters[loop] = loop.create_future()
+            # asyncio.wait leaves the shared future alone on timeout, unlike wait_for
+            await asyncio.wait((future,), timeout=remaining)
+
+    def stream(self, last_id, heartbeat=15.0, retry_ms=3000):
+        """Yield Server-Sent Events text until the client goes away"""
+        yield f'retry: {retry_ms}\n\n'
+        # An id from before a restart may be ahead of this process's sequence
+        last_id = min(last_id, self._last_id)
+        while True:
+            events = self.wait(last_id, heartbeat)
+            if events is None:
+                # The client fell too far behind; tell it to resync and continue from now
+                last_id = self._last_id
+                yield f'event: reset\ndata: {{"last_event_id": {last_id}}}\n\n'
+                continue
+            if not events:
+                yield ': keepalive\n\n'
+                continue
+            for event in events:
+                yield event.to_sse()
+            last_id = events[-1].id
+
+    async def astream(self, last_id, heartbeat=15.0, retry_ms=3000):
+        """``stream`` as an async generator, for the ASGI entry point"""
+        yield f'retry: {retry_ms}\n\n'
+        last_id = min(last_id, self._last_id)
+        while True:
+            events = await self.wait_async(last_id, heartbeat)
+            if events is None:
+                last_id = self._last_id
+                yield f'event: reset\ndata: {{"last_event_id": {last_id}}}\n\n'
+                continue
+            if not events:
+                yield ': keepalive\n\n'
+                continue
+            yield ''.join(event.to_sse() for event in events)
+            last_id = events[-1].id
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,250 @@
+import re
+import threading
+from collections import OrderedDict
+from bisect import bisect_left, bisect_right, insort
+
+_NONZERO_BYTE = re.compile(rb'[^\x00]')
+
+
+def bitmap_of(ids):
+    """Build an int bitmap with bit ``id`` set for every id"""
+    ids = list(ids)
+    if not ids:
+        return 0
+    buf = bytearray(max(ids) // 8 + 1)
+    for doc_id in ids:
+        buf[doc_id >> 3] |= 1 << (doc_id & 7)
+    return int.from_bytes(buf, 'little')
+
+
+def iter_bits(bitmap):
+    """Yield the set bit positions of ``bitmap`` in ascending order"""
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    # The regex engine skips runs of empty bytes in C
+    for match in _NONZERO_BYTE.finditer(data):
+        base = match.start() * 8
+        byte = data[match.start()]
+        while byte:
+            low = byte & -byte
+            yield base + low.bit_length() - 1
+            byte ^= low
+
+
+def _number(value):
+    """``value`` as a range field value, or None if it is not a number"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        number = value
+    else:
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None
+    # NaN compares false both ways and would corrupt the sorted arrays
+    return number if number == number else None
+
+
+class FacetIndex:
+    """Secondary indexes for filtering and sorting a collection in memory.
+
+    Categorical fields map each value to an int bitmap of document ids,
+    so combining filters is a handful of big-int ANDs/ORs and a facet
+    count is one AND plus ``bit_count()``. Range fields keep a sorted
+    ``(value, doc_id)`` array for bisected range queries and ordered
+    walks, plus precomputed ``value >= threshold`` bitmaps for the
+    thresholds clients ask for most. Range values that are not numbers
+    are indexed as missing.
+    """
+
+    range_cache_size = 64
+
+    def __init__(self, categorical, ranges=(), thresholds=None):
+        self.categorical = categorical
+        self.ranges = ranges
+        self.thresholds = thresholds or {}
+        # (field, low, high) -> bitmap for arbitrary ranges; emptied by every write
+        self._range_cache = OrderedDict()
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self):
+        self._range_cache.clear()
+        self.all = 0
+        self.docs = {}
+        self.values = {field: {} for field in self.categorical}
+        self.sorted = {field: [] for field in self.ranges}
+        # Documents that have a value for each range field
+        self.present = {field: 0 for field in self.ranges}
+        self.at_least = {field: {threshold: 0 for threshold in self.thresholds.get(field, ())} for field in self.ranges}
+
+    def __len__(self):
+        return len(self.docs)
+
+    def _row(self, doc):
+        row = {field: doc.get(field) for field in self.categorical}
+        row.update((field, _number(doc.get(field))) for field in self.ranges)
+        return row
+
+    def add(self, doc_id, doc):
+        """Index ``doc``, replacing any previous version of ``doc_id``"""
+        row = self._row(doc)
+        bit = 1 << doc_id
+        with self._lock:
+            self._remove(doc_id)
+            self._range_cache.clear()
+            self.docs[doc_id] = row
+            self.all |= bit
+            for field in self.categorical:
+                if row[field] is not None:
+                    values = self.values[field]
+                    values[row[field]] = values.get(row[field], 0) | bit
+            for field in self.ranges:
+                value = row[field]
+                if value is None:
+                    continue
+                insort(self.sorted[field], (value, doc_id))
+                self.present[field] |= bit
+                for threshold in self.at_least[field]:
+                    if value >= threshold:
+                        self.at_least[field][threshold] |= bit
+
+    def load(self, docs):
+        """Replace the index contents with ``(doc_id, doc)`` pairs, building each bitmap once"""
+        with self._lock:
+            self._clear()
+            members = {field: {} for field in self.categorical}
+            for doc_id, doc in docs:
+                row = self.docs[doc_id] = self._row(doc)
+                for field in self.categorical:
+                    if row[field] is not None:
+                        members[field].setdefault(row[field], []).append(doc_id)
+                for field in self.ranges:
+                    if row[field] is not None:
+                        self.sorted[field].append((row[field], doc_id))
+            self.all = bitmap_of(self.docs)
+            for field in self.categorical:
+                self.values[field] = {value: bitmap_of(ids) for value, ids in members[field].items()}
+            for field in self.ranges:
+                entries = self.sorted[field]
+                entries.sort()
+                self.present[field] = bitmap_of(doc_id for _, doc_id in entries)
+                for threshold in self.at_least[field]:
+                    start = bisect_left(entries, (threshold,))
+                    self.at_least[field][threshold] = bitmap_of(doc_id for _, doc_id in entries[start:])
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        row = self.docs.pop(doc_id, None)
+        if row is None:
+            return
+        self._range_cache.clear()
+        mask = ~(1 << doc_id)
+        self.all &= mask
+        for field in self.categorical:
+            values = self.values[field]
+            if row[field] in values:
+                values[row[field]] &= mask
+                if not values[row[field]]:
+                    del values[row[field]]
+        for field in self.ranges:
+            if row[field] is None:
+                continue
+            entries = self.sorted[field]
+            index = bisect_left(entries, (row[field], doc_id))
+            if index < len(entries) and entries[index] == (row[field], doc_id):
+                del entries[index]
+            self.present[field] &= mask
+            for threshold in self.at_least[field]:
+                self.at_least[field][threshold] &= mask
+
+    def _range_bitmap(self, field, low, high):
+        if high is None and low in self.at_least[field]:
+            return self.at_least[field][low]
+        key = (field, low, high)
+        bitmap = self._range_cache.get(key)
+        if bitmap is not None:
+            self._range_cache.move_to_end(key)
+            return bitmap
+        entries = self.sorted[field]
+        start = bisect_left(entries, (low,)) if low is not None else 0
+        end = bisect_right(entries, (high, float('inf'))) if high is not None else len(entries)
+        bitmap = self._range_cache[key] = bitmap_of(doc_id for _, doc_id in entries[start:end])
+        if len(self._range_cache) > self.range_cache_size:
+            self._range_cache.popitem(last=False)
+        return bitmap
+
+    def _match(self, filters, ranges, skip=None):
+        result = self.all
+        for field, wanted in filters.items():
+            if field == skip or not wanted:
+                continue
+            values = self.values[field]
+            union = 0
+            for value in wanted:
+                union |= values.get(value, 0)
+            result &= union
+        for field, (low, high) in ranges.items():
+            if low is not None or high is not None:
+                result &= self._range_bitmap(field, low, high)
+        return result
+
+    def _ordered(self, result, total, sort):
+        descending = sort.startswith('-')
+        field = sort.lstrip('-')
+        if field == 'id':
+            yield from reversed(list(iter_bits(result))) if descending else iter_bits(result)
+            return
+        entries = self.sorted[field]
+        if total * 16 < len(entries):
+            # A selective filter: sorting the few matches beats walking the whole array
+            docs = self.docs
+            with_value = [doc_id for doc_id in iter_bits(result) if docs[doc_id][field] is not None]
+            with_value.sort(key=lambda doc_id: (docs[doc_id][field], doc_id), reverse=descending)
+            yield from with_value
+            yield from iter_bits(result & ~self.present[field])
+            return
+        data = result.to_bytes((result.bit_length() + 7) // 8, 'little')
+        size = len(data)
+        for _, doc_id in reversed(entries) if descending else entries:
+            if doc_id >> 3 < size and data[doc_id >> 3] >> (doc_id & 7) & 1:
+                yield doc_id
+        # Documents without a value sort last
+        yield from iter_bits(result & ~self.present[field])
+
+    def query(self, filters=None, ranges=None, sort='id', after=None, offset=0, limit=100, facets=False):
+        """Return (ids, total, facet_counts) for the matching documents.
+
+        ``filters`` maps a categorical field to the values to accept (OR
+        within a field, AND across fields); ``ranges`` maps a range field
+        to an inclusive ``(low, high)`` pair, either side None. ``sort`` is
+        ``id`` or a range field, prefixed with ``-`` for descending. Facet
+        counts for a field apply every filter except that field's own,
+        so they show how the result would change by picking another value.
+        """
+        filters = filters or {}
+        ranges = ranges or {}
+        with self._lock:
+            result = self._match(filters, ranges)
+            total = result.bit_count()
+            # Keyset pagination applies to id order only; other orders use offset
+            if after is not None and sort == 'id':
+                result &= ~((1 << (after + 1)) - 1)
+            elif after is not None and sort == '-id':
+                result &= (1 << after) - 1
+            ids = []
+            if offset < total and limit:
+                for position, doc_id in enumerate(self._ordered(result, total, sort)):
+                    if position >= offset + limit:
+                        break
+                    if position >= offset:
+                        ids.append(doc_id)
+            counts = None
+            if facets:
+                counts = {}
+                for field in self.categorical:
+                    base = self._match(filters, ranges, skip=field)
+                    field_counts = {value: (base & bitmap).bit_count() for value, bitmap in self.values[field].items()}
+                    counts[field] = {value: count for value, count in field_counts.items() if count}
+        return ids, total, counts
@@ -0,0 +1,196 @@
+import hashlib
+import os
+import secrets
+import threading
+from datetime import datetime
+
+import db
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadError(Exception):
+    """Raised when an upload chunk does not fit the upload's current state"""
+
+
+def _new_id(prefix):
+    return prefix + secrets.token_hex(8).upper()
+
+
+def copy_stream(stream, f, hasher, limit=None):
+    """Copy ``stream`` into ``f`` in CHUNK_SIZE pieces, hashing as it goes"""
+    written = 0
+    while limit is None or written < limit:
+        chunk = stream.read(CHUNK_SIZE if limit is None else min(CHUNK_SIZE, limit - written))
+        if not chunk:
+            break
+        f.write(chunk)
+        hasher.update(chunk)
+        written += len(chunk)
+    return written
+
+
+class FileStore:
+    """File metadata in the application database, bodies in a BlobStore.
+
+    Bodies are never held in memory: uploads are streamed to disk in fixed
+    size chunks while the SHA-256 is computed incrementally, and resumable
+    uploads append ranges to a partial file until it is complete.
+    """
+
+    def __init__(self, root, blobs):
+        self.root = root
+        self.blobs = blobs
+        self.uploads_dir = os.path.join(root, 'uploads')
+        os.makedirs(self.uploads_dir, exist_ok=True)
+        # upload_id -> (offset, hasher); lets sequential chunks skip re-hashing
+        self._hashers = {}
+        self._lock = threading.Lock()
+
+    def path(self, record):
+        return self.blobs.path(record['sha256'])
+
+    def _record(self, file_id, filename, content_type, size, digest, owner):
+        record = {
+            'file_id': file_id,
+            'filename': filename,
+            'content_type': content_type,
+            'size': size,
+            'sha256': digest,
+            'owner': owner,
+            'uploaded_at': datetime.now().isoformat()
+        }
+        conn = db.get_db()
+        with conn:
+            conn.execute(
+                'INSERT INTO files (file_id, filename, content_type, size, sha256, owner, uploaded_at) '
+                'VALUES (:file_id, :filename, :content_type, :size, :sha256, :owner, :uploaded_at)',
+                record
+            )
+        return record
+
+    def save_stream(self, stream, filename, content_type=None, owner=None):
+        """Store a complete body read from ``stream``"""
+        digest, size = self.blobs.put_stream(stream)
+        return self._record(_new_id('FILE'), filename, content_type, size, digest, owner)
+
+    def get(self, file_id):
+        row = db.get_db().execute('SELECT * FROM files WHERE file_id = ?', (file_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def list(self, after='', limit=100, owner=None):
+        """One page of files ordered by file_id; only ``owner``'s when given"""
+        if owner is None:
+            rows = db.get_db().execute(
+                'SELECT * FROM files WHERE file_id > ? ORDER BY file_id LIMIT ?', (after, limit)
+            ).fetchall()
+        else:
+            rows = db.get_db().execute(
+                'SELECT * FROM files WHERE owner = ? AND file_id > ? ORDER BY file_id LIMIT ?', (owner, after, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def delete(self, file_id):
+        conn = db.get_db()
+        with conn:
+            row = conn.execute('SELECT sha256 FROM files WHERE file_id = ?', (file_id,)).fetchone()
+            if row is not None:
+                conn.execute('DELETE FROM files WHERE file_id = ?', (file_id,))
+        if row is None:
+            return False
+        self.blobs.release(row['sha256'])
+        return True
+
+    # Resumable uploads
+
+    def _upload_path(self, upload_id):
+        return os.path.join(self.uploads_dir, upload_id + '.part')
+
+    def create_upload(self, filename, total_size, content_type=None, owner=None):
+        upload = {
+            'upload_id': _new_id('UPL'),
+            'filename': filename,
+            'content_type': content_type,
+            'total_size': total_size,
+            'offset': 0,
+            'owner': owner,
+            'created_at': datetime.now().isoformat()
+        }
+        open(self._upload_path(upload['upload_id']), 'wb').close()
+        conn = db.get_db()
+        with conn:
+            conn.execute(
+                'INSERT INTO uploads (upload_id, filename, content_type, total_size, offset, owner, created_at) '
+                'VALUES (:upload_id, :filename, :content_type, :total_size, :offset, :owner, :created_at)',
+                upload
+            )
+        with self._lock:
+            self._hashers[upload['upload_id']] = (0, hashlib.sha256())
+        return upload
+
+    def get_upload(self, upload_id):
+        row = db.get_db().execute('SELECT * FROM uploads WHERE upload_id = ?', (upload_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def append(self, upload_id, stream, start, length):
+        """Append ``length`` bytes at ``start``; chunks must arrive in order"""
+        upload = self.get_upload(upload_id)
+        if upload is None:
+            raise KeyError(upload_id)
+        if start != upload['offset']:
+            raise UploadError(f'Expected chunk starting at byte {upload["offset"]}')
+        if start + length > upload['total_size']:
+            raise UploadError('Chunk extends past the declared upload size')
+
+        with self._lock:
+            offset, hasher = self._hashers.pop(upload_id, (None, None))
+        if offset != start:
+            # Another worker received earlier chunks; hashing restarts at completion
+            hasher = None
+        with open(self._upload_path(upload_id), 'r+b') as f:
+            f.seek(start)
+            f.truncate()
+            written = copy_stream(stream, f, hasher or _NullHasher(), limit=length)
+        if written != length:
+            raise UploadError(f'Received {written} of {length} bytes')
+
+        conn = db.get_db()
+        with conn:
+            conn.execute('UPDATE uploads SET offset = ? WHERE upload_id = ?', (start + written, upload_id))
+        if hasher is not None:
+            with self._lock:
+                self._hashers[upload_id] = (start + written, hasher)
+        upload['offset'] = start + written
+        return upload
+
+    def complete(self, upload_id):
+        upload = self.get_upload(upload_id)
+        if upload is None:
+            raise KeyError(upload_id)
+        if upload['offset'] != upload['total_size']:
+            raise UploadError(f'Upload has {upload["offset"]} of {upload["total_size"]} bytes')
+        with self._lock:
+            offset, hasher = self._hashers.pop(upload_id, (None, None))
+        part_path = self._upload_path(upload_id)
+        if offset != upload['total_size']:
+            hasher = hashlib.sha256()
+            with open(part_path, 'rb') as f:
+                copy_stream(f, _NullWriter(), hasher)
+        digest = hasher.hexdigest()
+        self.blobs.adopt(part_path, digest, upload['total_size'])
+        conn = db.get_db()
+        with conn:
+            conn.execute('DELETE FROM uploads WHERE upload_id = ?', (upload_id,))
+        return self._record(
+            _new_id('FILE'), upload['filename'], upload['content_type'], upload['total_size'], digest, upload['owner']
+        )
+
+
+class _NullHasher:
+    def update(self, data):
+        pass
+
+
+class _NullWriter:
+    def write(self, data):
+        pass
@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# Dependency states, best first; a dependency's state is the worst condition it is in
+OK, DEGRADED, DOWN = 'ok', 'degraded', 'down'
+# Overall readiness; only READY and PARTIAL mean the process should receive traffic
+READY, PARTIAL, UNAVAILABLE, STARTING, STALE = 'ready', 'degraded', 'unavailable', 'starting', 'stale'
+
+
+class Degraded(Exception):
+    """Raised by a check whose dependency works but should not be relied on (slow, nearly full, backed up)"""
+
+    def __init__(self, reason, detail=None):
+        super().__init__(reason)
+        self.detail = detail
+
+
+class _Dependency:
+    __slots__ = ('name', 'check', 'critical', 'state', 'detail', 'error', 'latencies', 'failures', 'checked_at',
+                 'last_ok')
+
+    def __init__(self, name, check, critical):
+        self.name = name
+        self.check = check
+        self.critical = critical
+        self.state = None
+        self.detail = None
+        self.error = None
+        self.latencies = deque(maxlen=20)
+        self.failures = 0
+        self.checked_at = None
+        self.last_ok = None
+
+    def report(self):
+        return {
+            'state': self.state,
+            'critical': self.critical,
+            'latency_ms': round(self.latencies[-1] * 1000, 3) if self.latencies else None,
+            'latency_ms_max': round(max(self.latencies) * 1000, 3) if self.latencies else None,
+            'consecutive_failures': self.failures,
+            'error': self.error,
+            'detail': self.detail,
+            'checked_at': datetime.fromtimestamp(self.checked_at).isoformat() if self.checked_at else None,
+            'last_ok': datetime.fromtimestamp(self.last_ok).isoformat() if self.last_ok else None
+        }
+
+
+class HealthChecker:
+    """Dependency checks run by a background thread; readers get the last result.
+
+    ``checks`` maps a name to ``(callable, critical)``. Every
+    ``interval`` seconds each callable is run in turn and timed; it
+    returns a detail dict, raises Degraded when the dependency works but
+    is impaired, or raises anything else when it does not work. A check
+    slower than ``slow`` seconds is degraded too, and a failing one is
+    only ``down`` after ``failures`` consecutive failures (degraded
+    before that), so a single blip does not pull the process out of
+    rotation. The process is unavailable while a critical dependency is
+    down, and its result goes stale if a round has not finished within
+    ``stale_after`` seconds, e.g. because a check is hanging. ``report``
+    does no I/O.
+    """
+
+    def __init__(self, checks, interval=5.0, slow=0.25, failures=2, stale_after=None):
+        self.interval = interval
+        self.slow = slow
+        self.failures = failures
+        self.stale_after = stale_after if stale_after is not None else max(3 * interval, interval + 30.0)
+        self._dependencies = [_Dependency(name, check, critical) for name, (check, critical) in checks.items()]
+        self._lock = threading.Lock()
+        self._thread = None
+        self._report = None
+        self._completed_at = None
+
+    def run_checks(self):
+        """Run every check once and publish the result"""
+        for dependency in self._dependencies:
+            started = time.perf_counter()
+            degraded = None
+            try:
+                detail = dependency.check()
+            except Degraded as e:
+                detail, degraded = e.detail, str(e)
+            except Exception as e:
+                detail, degraded = None, None
+                dependency.failures += 1
+                dependency.error = f'{type(e).__name__}: {e}'
+            else:
+                dependency.failures = 0
+                dependency.error = None
+            elapsed = time.perf_counter() - started
+            dependency.latencies.append(elapsed)
+            dependency.checked_at = time.time()
+            dependency.detail = detail
+            if dependency.failures >= self.failures:
+                dependency.state = DOWN
+            elif dependency.failures:
+                dependency.state = DEGRADED
+            elif degraded is not None:
+                dependency.state, dependency.error = DEGRADED, degraded
+            elif elapsed > self.slow:
+                dependency.state, dependency.error = DEGRADED, f'Check took {elapsed * 1000:.0f}ms'
+            else:
+                dependency.state = OK
+                dependency.last_ok = dependency.checked_at
+        report = {dependency.name: dependency.report() for dependency in self._dependencies}
+        with self._lock:
+            self._report = report
+            self._completed_at = time.monotonic()
+
+    def report(self):
+        """(overall state, seconds since the last completed round, {name: dependency report})"""
+        self.start()
+        with self._lock:
+            report, completed_at = self._report, self._completed_at
+        if report is None:
+            return STARTING, None, {}
+        age = time.monotonic() - completed_at
+        if age > self.stale_after:
+            return STALE, age, report
+        states = [(entry['state'], entry['critical']) for entry in report.values()]
+        if any(state == DOWN and critical for state, critical in states):
+            return UNAVAILABLE, age, report
+        if any(state != OK for state, _ in states):
+            return PARTIAL, age, report
+        return READY, age, report
+
+    def start(self):
+        """Start the checker lazily so forking servers do not inherit it"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._check_loop, name='health-checker', daemon=True)
+                self._thread.start()
+
+    def _check_loop(self):
+        while True:
+            self.run_checks()
+            time.sleep(self.interval)
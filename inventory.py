@@ -0,0 +1,212 @@
+import secrets
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+
+import db
+
+ACTIVE_RESERVED = 'SELECT COALESCE(SUM(quantity), 0) FROM reservations WHERE product_id = ? AND expires_at > ?'
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product_id, requested, available, message=None):
+        super().__init__(message or f'Product {product_id}: {requested} requested, {available} available')
+        self.product_id = product_id
+        self.requested = requested
+        self.available = available
+
+
+class UnknownProduct(LookupError):
+    def __init__(self, product_id):
+        super().__init__(f'Product {product_id} not found')
+        self.product_id = product_id
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def order_lines(items):
+    """Sum ``[{"product_id": .., "quantity": ..}]`` into {product_id: quantity}; raises ValueError.
+
+    Items without a product_id (free-form lines) do not touch stock, but
+    every line's quantity, price and category must be well formed.
+    """
+    if items is not None and not isinstance(items, list):
+        raise ValueError('Order items must be a list')
+    lines = {}
+    for item in items or ():
+        if not isinstance(item, dict):
+            raise ValueError('Order items must be objects')
+        product_id = item.get('product_id')
+        quantity = item.get('quantity', 1)
+        if (product_id is not None and not _is_int(product_id)) or not _is_int(quantity) or quantity <= 0:
+            raise ValueError('Order items need an integer product_id and a positive integer quantity')
+        price = item.get('price')
+        if price is not None and (not isinstance(price, (int, float)) or isinstance(price, bool) or price < 0):
+            raise ValueError('Order item prices must be non-negative numbers')
+        if item.get('category') is not None and not isinstance(item['category'], str):
+            raise ValueError('Order item categories must be strings')
+        if product_id is not None:
+            lines[product_id] = lines.get(product_id, 0) + quantity
+    return lines
+
+
+def _format_expiry(expires_at):
+    return datetime.fromtimestamp(expires_at).isoformat()
+
+
+class InventoryStore:
+    """Stock levels and time-limited reservations with no overselling.
+
+    ``available`` is ``stock`` minus the quantities held by unexpired
+    reservations. Every check-and-write runs inside one ``BEGIN
+    IMMEDIATE`` transaction, so it is atomic across worker processes
+    sharing the database. Within a process, writers to the same product
+    first queue on one of ``stripes`` locks (by product id) rather than
+    all spinning on SQLite's busy handler, which is what a flash sale on
+    one SKU would otherwise do. Expired reservations stop counting at
+    once and their rows are purged by later writes.
+    """
+
+    def __init__(self, stripes=64, default_ttl=600, max_ttl=3600):
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self.default_ttl = default_ttl
+        self.max_ttl = max_ttl
+
+    @contextmanager
+    def _locked(self, product_ids):
+        # Always in stripe order, so multi-product orders cannot deadlock
+        stripes = sorted({product_id % len(self._locks) for product_id in product_ids})
+        with ExitStack() as stack:
+            for stripe in stripes:
+                stack.enter_context(self._locks[stripe])
+            yield
+
+    @contextmanager
+    def _transaction(self):
+        conn = db.get_db()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def _available(self, conn, product_id, now):
+        row = conn.execute('SELECT stock FROM products WHERE id = ?', (product_id,)).fetchone()
+        if row is None:
+            return None
+        reserved = conn.execute(ACTIVE_RESERVED, (product_id, now)).fetchone()[0]
+        return row['stock'], reserved
+
+    def status(self, product_id):
+        """Return {'product_id', 'stock', 'reserved', 'available'} or None for an unknown product"""
+        levels = self._available(db.get_db(), product_id, time.time())
+        if levels is None:
+            return None
+        stock, reserved = levels
+        return {'product_id': product_id, 'stock': stock, 'reserved': reserved, 'available': stock - reserved}
+
+    def reserve(self, product_id, quantity, ttl=None):
+        """Hold ``quantity`` units for ``ttl`` seconds; None for an unknown product.
+
+        Raises InsufficientStock when fewer units are available.
+        """
+        ttl = min(self.default_ttl if ttl is None else ttl, self.max_ttl)
+        now = time.time()
+        with self._locked((product_id,)), self._transaction() as conn:
+            conn.execute('DELETE FROM reservations WHERE expires_at <= ?', (now,))
+            levels = self._available(conn, product_id, now)
+            if levels is None:
+                return None
+            stock, reserved = levels
+            if stock - reserved < quantity:
+                raise InsufficientStock(product_id, quantity, stock - reserved)
+            reservation = {
+                'reservation_id': 'RSV' + secrets.token_hex(8).upper(),
+                'product_id': product_id,
+                'quantity': quantity,
+                'created_at': datetime.fromtimestamp(now).isoformat(),
+                'expires_at': now + ttl
+            }
+            conn.execute(
+                'INSERT INTO reservations (reservation_id, product_id, quantity, created_at, expires_at) '
+                'VALUES (:reservation_id, :product_id, :quantity, :created_at, :expires_at)',
+                reservation
+            )
+        return {**reservation, 'expires_at': _format_expiry(reservation['expires_at'])}
+
+    def release(self, product_id, reservation_id):
+        """Give a reservation's units back; return it, or None if it is unknown or already expired"""
+        with self._transaction() as conn:
+            row = conn.execute(
+                'SELECT * FROM reservations WHERE reservation_id = ? AND product_id = ? AND expires_at > ?',
+                (reservation_id, product_id, time.time())
+            ).fetchone()
+            if row is not None:
+                conn.execute('DELETE FROM reservations WHERE reservation_id = ?', (reservation_id,))
+        if row is None:
+            return None
+        return {**dict(row), 'expires_at': _format_expiry(row['expires_at'])}
+
+    def set_stock(self, product_id, stock=None, adjust=None):
+        """Set stock to ``stock`` or change it by ``adjust``; return the new status or None.
+
+        Raises InsufficientStock if the result would not cover active reservations.
+        """
+        now = time.time()
+        with self._locked((product_id,)), self._transaction() as conn:
+            levels = self._available(conn, product_id, now)
+            if levels is None:
+                return None
+            current, reserved = levels
+            new_stock = stock if stock is not None else current + adjust
+            if new_stock < reserved:
+                raise InsufficientStock(
+                    product_id, reserved, new_stock,
+                    f'Product {product_id}: stock {new_stock} would not cover {reserved} reserved units'
+                )
+            conn.execute('UPDATE products SET stock = ? WHERE id = ?', (new_stock, product_id))
+        return {'product_id': product_id, 'stock': new_stock, 'reserved': reserved, 'available': new_stock - reserved}
+
+    def place_order(self, data, reservation_ids=()):
+        """Take the order's stock and create the order in one transaction; return the order.
+
+        Reservations named in ``reservation_ids`` for products in the
+        order are consumed, so their units count towards it; expired or
+        unknown ones are ignored and the order competes for free stock.
+        Raises UnknownProduct or InsufficientStock (and writes nothing) if
+        any line cannot be covered. Product lines are stored with the
+        product's price and category at the time, so revenue can be
+        reported from the order alone.
+        """
+        lines = order_lines(data.get('items'))
+        now = time.time()
+        with self._locked(lines), self._transaction() as conn:
+            if reservation_ids and lines:
+                conn.execute(
+                    f'DELETE FROM reservations WHERE reservation_id IN ({", ".join("?" * len(reservation_ids))}) '
+                    f'AND product_id IN ({", ".join("?" * len(lines))})',
+                    [*reservation_ids, *lines]
+                )
+            for product_id, quantity in sorted(lines.items()):
+                levels = self._available(conn, product_id, now)
+                if levels is None:
+                    raise UnknownProduct(product_id)
+                stock, reserved = levels
+                if stock - reserved < quantity:
+                    raise InsufficientStock(product_id, quantity, stock - reserved)
+                conn.execute('UPDATE products SET stock = stock - ? WHERE id = ?', (quantity, product_id))
+            if lines:
+                rows = conn.execute(
+                    f'SELECT id, price, category FROM products WHERE id IN ({", ".join("?" * len(lines))})', list(lines)
+                )
+                catalog = {row['id']: {'price': row['price'], 'category': row['category']} for row in rows}
+                data = {**data, 'items': [
+                    {**item, **catalog[item['product_id']]} if item.get('product_id') is not None else item
+                    for item in data['items']
+                ]}
+            return db.create_order(data, conn)
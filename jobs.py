@@ -0,0 +1,362 @@
+import csv
+import json
+import multiprocessing
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from rollups import order_figures
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # parquet exports are only offered when pyarrow is installed
+    pyarrow = None
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    owner TEXT,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    artifact TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    dispatcher INTEGER
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+'''
+
+REPORT_TYPES = ('sales', 'revenue', 'users')
+EXPORT_DATASETS = ('orders', 'users')
+EXPORT_FORMATS = ('csv', 'ndjson') + (('parquet',) if pyarrow is not None else ())
+
+JOB_PREFIXES = {'report': 'RPT', 'export': 'EXP'}
+
+BATCH_SIZE = 1000
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    return conn
+
+
+def _now():
+    return datetime.now().isoformat()
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # it exists, under another user
+    return True
+
+
+# Job bodies. These run inside the worker processes and only receive paths
+# and plain parameters, never objects from the web process.
+
+class _Progress:
+    def __init__(self, jobs_path, job_id):
+        self.conn = _connect(jobs_path)
+        self.job_id = job_id
+        self.last = 0.0
+
+    def update(self, fraction, force=False):
+        now = time.monotonic()
+        if force or now - self.last >= 0.5:
+            with self.conn:
+                self.conn.execute('UPDATE jobs SET progress = ? WHERE id = ?', (round(fraction, 4), self.job_id))
+            self.last = now
+
+
+def _order_figures(items, total_amount):
+    """order_figures for a stored order, or None for one whose amounts or items cannot be read"""
+    try:
+        return order_figures({'items': json.loads(items or '[]'), 'total_amount': total_amount})
+    except ValueError:
+        return None
+
+
+def _report_rows(data_conn, report_type):
+    if report_type == 'sales':
+        days = {}
+        for day, items, total_amount in data_conn.execute(
+            'SELECT substr(created_at, 1, 10), items, total_amount FROM orders'
+        ):
+            figures = _order_figures(items, total_amount)
+            orders, total = days.get(day, (0, 0.0))
+            days[day] = (orders + 1, total + (figures[0] if figures else 0.0))
+        yield ('day', 'orders', 'revenue')
+        for day, (orders, revenue) in sorted(days.items()):
+            yield (day, orders, round(revenue, 2))
+    elif report_type == 'users':
+        yield ('day', 'new_users')
+        yield from data_conn.execute(
+            'SELECT substr(created_at, 1, 10) AS day, COUNT(*) FROM users GROUP BY day ORDER BY day'
+        )
+    elif report_type == 'revenue':
+        totals = Counter()
+        for items, total_amount in data_conn.execute('SELECT items, total_amount FROM orders'):
+            figures = _order_figures(items, total_amount)
+            if figures is not None:
+                totals.update(figures[1])
+        yield ('category', 'revenue')
+        for category, revenue in sorted(totals.items()):
+            yield (category, round(revenue, 2))
+
+
+def _write_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows(rows)
+
+
+def run_report(jobs_path, data_path, job_id, params, out_path):
+    progress = _Progress(jobs_path, job_id)
+    data_conn = _connect(data_path)
+    try:
+        _write_csv(out_path, _report_rows(data_conn, params['type']))
+    finally:
+        data_conn.close()
+    progress.update(1.0, force=True)
+
+
+def _batches(cursor, progress, total):
+    done = 0
+    while True:
+        rows = cursor.fetchmany(BATCH_SIZE)
+        if not rows:
+            return
+        yield rows
+        done += len(rows)
+        progress.update(done / total)
+
+
+def _parquet_schema(data_conn, table):
+    types = {'INTEGER': pyarrow.int64(), 'REAL': pyarrow.float64()}
+    return pyarrow.schema([
+        (column['name'], types.get(column['type'].upper(), pyarrow.string()))
+        for column in data_conn.execute(f'PRAGMA table_info({table})')
+    ])
+
+
+def run_export(jobs_path, data_path, job_id, params, out_path):
+    progress = _Progress(jobs_path, job_id)
+    data_conn = _connect(data_path)
+    table = params['dataset']
+    fmt = params['format']
+    try:
+        total = data_conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0] or 1
+        cursor = data_conn.execute(f'SELECT * FROM {table} ORDER BY id')
+        columns = [column[0] for column in cursor.description]
+        batches = _batches(cursor, progress, total)
+        if fmt == 'csv':
+            with open(out_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                for rows in batches:
+                    writer.writerows(rows)
+        elif fmt == 'ndjson':
+            with open(out_path, 'w', encoding='utf-8') as f:
+                for rows in batches:
+                    f.writelines(json.dumps(dict(row)) + '\n' for row in rows)
+        else:
+            schema = _parquet_schema(data_conn, table)
+            with pyarrow.parquet.ParquetWriter(out_path, schema) as writer:
+                for rows in batches:
+                    writer.write_table(pyarrow.Table.from_pylist([dict(row) for row in rows], schema=schema))
+    finally:
+        data_conn.close()
+    progress.update(1.0, force=True)
+
+
+JOB_RUNNERS = {'report': run_report, 'export': run_export}
+
+ARTIFACT_EXTENSIONS = {'csv': 'csv', 'ndjson': 'ndjson', 'parquet': 'parquet'}
+
+
+def execute(jobs_path, data_path, artifact_dir, job_id, kind, params):
+    """Worker-process entry point: run one job and record its outcome"""
+    extension = ARTIFACT_EXTENSIONS[params.get('format', 'csv')]
+    out_path = os.path.join(artifact_dir, f'{job_id}.{extension}')
+    tmp_path = out_path + '.part'
+    conn = _connect(jobs_path)
+    try:
+        JOB_RUNNERS[kind](jobs_path, data_path, job_id, params, tmp_path)
+        os.replace(tmp_path, out_path)
+        with conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'completed', progress = 1, artifact = ?, finished_at = ? WHERE id = ?",
+                (out_path, _now(), job_id)
+            )
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        with conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                (str(e), _now(), job_id)
+            )
+    finally:
+        conn.close()
+
+
+class JobQueue:
+    """SQLite-backed queue of report/export jobs executed by a process pool.
+
+    A dispatcher thread claims queued jobs (atomically, so several web
+    workers can share one queue file) and hands them to the pool; the
+    request thread only inserts a row and returns. A claim records the
+    dispatching process, and jobs left running by a process that has
+    since died are queued again when a queue is opened.
+    """
+
+    def __init__(self, jobs_path, data_path, artifact_dir, workers=2, poll_interval=0.5):
+        self.jobs_path = jobs_path
+        self.data_path = data_path
+        self.artifact_dir = artifact_dir
+        self.workers = workers
+        self.poll_interval = poll_interval
+        os.makedirs(artifact_dir, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        if 'dispatcher' not in {row['name'] for row in conn.execute('PRAGMA table_info(jobs)')}:
+            try:
+                conn.execute('ALTER TABLE jobs ADD COLUMN dispatcher INTEGER')
+            except sqlite3.OperationalError:
+                pass  # another worker added it first
+        self._wakeup = threading.Event()
+        self._slots = threading.Semaphore(workers)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._thread = None
+        self.requeue_stale()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = _connect(self.jobs_path)
+        return conn
+
+    def enqueue(self, kind, params, owner=None):
+        job_id = JOB_PREFIXES[kind] + secrets.token_hex(6).upper()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, owner, params, status, created_at) VALUES (?, ?, ?, ?, 'queued', ?)",
+                (job_id, kind, owner, json.dumps(params), _now())
+            )
+        self.start()
+        self._wakeup.set()
+        return self.get(job_id)
+
+    def requeue_stale(self):
+        """Queue again the running jobs whose dispatching process is gone; return how many"""
+        conn = self._conn()
+        running = conn.execute("SELECT id, dispatcher FROM jobs WHERE status = 'running'").fetchall()
+        # A job claimed under this process's own pid was claimed by an earlier process that reused it
+        stale = [
+            row['id'] for row in running
+            if row['dispatcher'] in (None, os.getpid()) or not _process_alive(row['dispatcher'])
+        ]
+        with conn:
+            for job_id in stale:
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', progress = 0, started_at = NULL, dispatcher = NULL "
+                    "WHERE id = ? AND status = 'running'",
+                    (job_id,)
+                )
+        if stale:
+            self._wakeup.set()
+        return len(stale)
+
+    def get(self, job_id, kind=None):
+        row = self._conn().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None or (kind is not None and row['kind'] != kind):
+            return None
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        return job
+
+    def stats(self):
+        """Queued and running job counts, the oldest queued job's age and whether this process dispatches"""
+        conn = self._conn()
+        counts = dict(conn.execute(
+            "SELECT status, COUNT(*) FROM jobs WHERE status IN ('queued', 'running') GROUP BY status"
+        ).fetchall())
+        oldest = conn.execute("SELECT MIN(created_at) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        return {
+            'queued': counts.get('queued', 0),
+            'running': counts.get('running', 0),
+            'oldest_queued_seconds': round((datetime.now() - datetime.fromisoformat(oldest)).total_seconds(), 1)
+            if oldest else None,
+            'dispatcher_running': self._thread is not None and self._thread.is_alive()
+        }
+
+    def start(self):
+        """Start the dispatcher lazily so forking servers do not inherit it"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self._pool is None:
+                # Spawned, not forked: this process already runs threads whose held locks a fork would copy
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            self._thread = threading.Thread(target=self._dispatch_loop, name='job-dispatcher', daemon=True)
+            self._thread.start()
+
+    def _claim(self):
+        conn = self._conn()
+        with conn:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            claimed = conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, dispatcher = ? WHERE id = ? AND status = 'queued'",
+                (_now(), os.getpid(), row['id'])
+            ).rowcount
+        return self.get(row['id']) if claimed else None
+
+    def _dispatch_loop(self):
+        while True:
+            self._slots.acquire()
+            job = self._claim()
+            if job is None:
+                self._slots.release()
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            future = self._pool.submit(
+                execute, self.jobs_path, self.data_path, self.artifact_dir, job['id'], job['kind'], job['params']
+            )
+            future.add_done_callback(lambda f, job_id=job['id']: self._finished(f, job_id))
+
+    def _finished(self, future, job_id):
+        self._slots.release()
+        error = future.exception()
+        if error is not None:
+            # The worker process died before it could record the failure itself
+            conn = _connect(self.jobs_path)
+            with conn:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ? AND status = 'running'",
+                    (str(error), _now(), job_id)
+                )
+            conn.close()
@@ -3,29 +3,261 @@ import sys
 from functools import wraps
 from datetime import datetime, timedelta
 import hashlib
+import pstats
 import secrets
+import time
 
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_file, send_from_directory
 from flask_restx import Api, Resource, fields, Namespace
+from flask_restx.representations import output_json
+from flask_restx.utils import unpack
 from flask_cors import CORS
+from werkzeug.http import generate_etag, parse_content_range_header
+
+import db
+from api_keys import PERMISSIONS, KeyStore
+from blob_store import BlobStore
+from bulk import BulkRequestError, OperationValidator, read_operations
+from delivery import CHANNELS, TRANSPORTS, DeliveryPipeline
+from events import EventBroker
+from facets import FacetIndex
+from inventory import InsufficientStock, InventoryStore, UnknownProduct, order_lines
+from file_store import FileStore, UploadError
+from metrics import RequestMetrics, add_phase_time
+from profiler import ProfilerBusy, RequestProfiles, StackSampler, collapse
+from jobs import EXPORT_DATASETS, EXPORT_FORMATS, REPORT_TYPES, JobQueue
+from rate_limit import MemoryBucketBackend, RateLimiter, SQLiteBucketBackend
+from response_cache import ResponseCache
+from rollups import RollupEngine, StatusCounters
+from search import InvertedIndex, PrefixIndex, decode_cursor, encode_cursor
+from serializers import compile_model, dumps
+from health import READY, PARTIAL, Degraded, HealthChecker
+from static_cache import StaticAssetCache
+from telemetry import PHYSICAL_MEMORY, TelemetryCollector
 
 app = Flask(__name__, static_folder='static', static_url_path='/static')
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
+app.config['DATA_DIR'] = os.environ.get('DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+app.config['DATABASE'] = os.environ.get('DATABASE_PATH', os.path.join(app.config['DATA_DIR'], 'app.db'))
+# Connection pool: kept-open connections, extra ones allowed under load, seconds to wait for one,
+# seconds before an idle connection is replaced, and a liveness check on every checkout
+app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 8))
+app.config['DB_POOL_OVERFLOW'] = int(os.environ.get('DB_POOL_OVERFLOW', 16))
+app.config['DB_POOL_TIMEOUT'] = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+app.config['DB_POOL_RECYCLE'] = float(os.environ.get('DB_POOL_RECYCLE', 3600))
+app.config['DB_POOL_PRE_PING'] = os.environ.get('DB_POOL_PRE_PING', '1') == '1'
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+# Worker threads running the Flask app under the ASGI entry point (asgi.py)
+app.config['ASGI_THREADS'] = int(os.environ.get('ASGI_THREADS', 32))
+# Notification delivery: transport name from delivery.TRANSPORTS, worker threads, recipients per batch
+app.config['NOTIFICATION_TRANSPORT'] = os.environ.get('NOTIFICATION_TRANSPORT', 'stub')
+app.config['DELIVERY_WORKERS'] = int(os.environ.get('DELIVERY_WORKERS', 16))
+app.config['DELIVERY_BATCH_SIZE'] = 500
+# Let the front-end server send file bodies: X-Sendfile (Apache/lighttpd) or an
+# nginx internal location prefix that maps to DATA_DIR/blobs for X-Accel-Redirect
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE') == '1'
+app.config['FILES_ACCEL_REDIRECT'] = os.environ.get('FILES_ACCEL_REDIRECT')
+# Seconds a stock reservation holds units when the client does not say, and the most it may ask for
+app.config['RESERVATION_TTL'] = int(os.environ.get('RESERVATION_TTL', 600))
+app.config['RESERVATION_MAX_TTL'] = int(os.environ.get('RESERVATION_MAX_TTL', 3600))
+# Seconds between reconciling the live order status counters against the orders table
+app.config['ORDER_STATS_RECONCILE_SECONDS'] = float(os.environ.get('ORDER_STATS_RECONCILE_SECONDS', 300))
+# Longest on-demand sampling profile, and how many per-request cProfile runs (X-Profile header) to keep
+app.config['PROFILE_MAX_SECONDS'] = float(os.environ.get('PROFILE_MAX_SECONDS', 60))
+app.config['PROFILE_KEEP'] = int(os.environ.get('PROFILE_KEEP', 20))
+# Resource usage is sampled every TELEMETRY_INTERVAL seconds; the last TELEMETRY_SAMPLES are kept (1h)
+app.config['TELEMETRY_INTERVAL'] = float(os.environ.get('TELEMETRY_INTERVAL', 5))
+app.config['TELEMETRY_SAMPLES'] = int(os.environ.get('TELEMETRY_SAMPLES', 720))
+# Readiness checks run in the background every HEALTH_CHECK_INTERVAL seconds; probes read the last result
+app.config['HEALTH_CHECK_INTERVAL'] = float(os.environ.get('HEALTH_CHECK_INTERVAL', 5))
+app.config['HEALTH_CHECK_SLOW_MS'] = float(os.environ.get('HEALTH_CHECK_SLOW_MS', 250))
+app.config['HEALTH_CHECK_FAILURES'] = int(os.environ.get('HEALTH_CHECK_FAILURES', 2))
+app.config['HEALTH_POOL_UTILIZATION'] = float(os.environ.get('HEALTH_POOL_UTILIZATION', 0.9))
+app.config['HEALTH_MIN_FREE_BYTES'] = int(os.environ.get('HEALTH_MIN_FREE_BYTES', 1024 ** 3))
+app.config['HEALTH_JOB_BACKLOG_SECONDS'] = float(os.environ.get('HEALTH_JOB_BACKLOG_SECONDS', 300))
+app.config['BULK_MAX_OPERATIONS'] = int(os.environ.get('BULK_MAX_OPERATIONS', 50000))
+app.config['RESPONSE_CACHE_BYTES'] = int(os.environ.get('RESPONSE_CACHE_BYTES', 64 * 1024 * 1024))
+app.config['RESPONSE_CACHE_TTL'] = float(os.environ.get('RESPONSE_CACHE_TTL', 60))
+# Analytics rollups change with every request, so those responses only live briefly
+app.config['ANALYTICS_CACHE_TTL'] = float(os.environ.get('ANALYTICS_CACHE_TTL', 5))
+# 'memory' limits each worker process separately, 'sqlite' shares buckets across workers on a host
+app.config['RATE_LIMIT_BACKEND'] = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+# Permission tier -> (requests per second, burst), applied per API key and namespace
+app.config['RATE_LIMITS'] = {
+    'admin': (50.0, 200),
+    'write': (20.0, 100),
+    'read': (10.0, 50)
+}
+
+db.init_db(
+    app.config['DATABASE'],
+    size=app.config['DB_POOL_SIZE'],
+    max_overflow=app.config['DB_POOL_OVERFLOW'],
+    timeout=app.config['DB_POOL_TIMEOUT'],
+    recycle=app.config['DB_POOL_RECYCLE'],
+    pre_ping=app.config['DB_POOL_PRE_PING']
+)
+
+@app.teardown_appcontext
+def release_db(exception):
+    """Hand the request thread's pooled connection back once the request is done"""
+    db.release()
+
+# Analytics aggregates are maintained on writes and rebuilt from the store at startup
+analytics_rollups = RollupEngine()
+analytics_rollups.rebuild(users=db.iter_users(), orders=db.iter_orders(), products=db.iter_products())
+
+# Order counts by status, moved by the order write paths and periodically repaired from the table
+order_status_counts = StatusCounters(db.count_orders_by_status, app.config['ORDER_STATS_RECONCILE_SECONDS'])
+
+# Full-text product search, kept in step with the product write endpoints
+product_index = InvertedIndex(
+    {'name': 3.0, 'sku': 2.0, 'category': 1.5, 'description': 1.0},
+    stored_fields=('name', 'category', 'price', 'sku')
+)
+product_index.load((product['id'], product) for product in db.iter_products())
+
+# Secondary indexes behind the filter, sort and facet parameters of GET /api/products/
+PRODUCT_SORTS = ('id', '-id', 'price', '-price', 'stock', '-stock')
+product_facets = FacetIndex(('category', 'status'), ranges=('price', 'stock'), thresholds={'stock': (1, 10)})
+product_facets.load((product['id'], product) for product in db.iter_products())
+
+# Typeahead over users for the admin console, kept in step with the user write endpoints
+user_index = PrefixIndex(
+    ('username', 'email', 'first_name', 'last_name', ('first_name', 'last_name')),
+    stored_fields=('username', 'email', 'first_name', 'last_name')
+)
+user_index.load((user['id'], user) for user in db.iter_users())
+
+# Reports and exports run in a process pool fed from a SQLite-backed queue
+job_queue = JobQueue(
+    os.path.join(app.config['DATA_DIR'], 'jobs.db'),
+    app.config['DATABASE'],
+    os.path.join(app.config['DATA_DIR'], 'exports'),
+    workers=app.config['JOB_WORKERS']
+)
+
+# Notification events are published once and fanned out to SSE / long-poll subscribers
+notification_events = EventBroker()
+
+# Sends are queued and delivered in batches off the request thread
+notification_transport = TRANSPORTS[app.config['NOTIFICATION_TRANSPORT']]()
+delivery_pipeline = DeliveryPipeline(
+    {channel: notification_transport for channel in CHANNELS},
+    workers=app.config['DELIVERY_WORKERS'],
+    batch_size=app.config['DELIVERY_BATCH_SIZE']
+)
+
+# Files, avatars and product images share one content-addressed, deduplicated blob store
+blob_store = BlobStore(os.path.join(app.config['DATA_DIR'], 'blobs'))
+file_store = FileStore(app.config['DATA_DIR'], blob_store)
+
+# Stock is only ever taken through atomic check-and-write transactions, never read-modify-write
+inventory = InventoryStore(default_ttl=app.config['RESERVATION_TTL'], max_ttl=app.config['RESERVATION_MAX_TTL'])
+
+def store_request_body():
+    """Stream the uploaded body (raw or multipart 'file') into the blob store"""
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        if upload is None:
+            api.abort(400, "multipart upload requires a 'file' field")
+        return blob_store.put_stream(upload.stream), upload.mimetype
+    return blob_store.put_stream(request.stream), request.mimetype or None
+
+def blob_url(digest):
+    return f'/api/files/blobs/{digest}'
+
+def send_blob(digest, mimetype=None, download_name=None):
+    """Send a blob body (supports Range; zero-copy via sendfile/X-Accel-Redirect)"""
+    mimetype = mimetype or 'application/octet-stream'
+    if app.config['FILES_ACCEL_REDIRECT']:
+        # nginx streams the file itself and handles Range requests
+        response = Response(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = (
+            app.config['FILES_ACCEL_REDIRECT'].rstrip('/') + '/' + blob_store.relative_path(digest)
+        )
+        if download_name:
+            response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+        return response
+    # send_file hands the open file to wsgi.file_wrapper, which uses sendfile() where available
+    return send_file(
+        blob_store.path(digest),
+        mimetype=mimetype,
+        as_attachment=download_name is not None,
+        download_name=download_name,
+        conditional=True,
+        etag=digest
+    )
+
+def on_event_loop():
+    """True when served by the ASGI entry point (asgi.py), which can run async bodies"""
+    return 'asgi.defer' in request.environ
+
+def event_loop_body(async_body):
+    """Hand ``async_body`` to the ASGI event loop and return a placeholder body for the Response.
+
+    The worker thread is free as soon as the view returns, so a request
+    that mostly waits holds a socket rather than a thread.
+    """
+    request.environ['asgi.defer'](async_body)
+    # An iterator rather than a sequence, so the response counts as streamed: no Content-Length or ETag
+    return iter(())
+
+# Per-endpoint latency histograms, status counts and phase breakdown for /api/system/metrics.
+# Registered before any other after_request hook so that it runs last and times them too.
+request_metrics = RequestMetrics()
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+def endpoint_labels():
+    """(namespace, Resource class, method) of the current request; bounded by the routing table"""
+    if request.url_rule is None:
+        return '<unmatched>', '<unmatched>', request.method
+    view = app.view_functions.get(request.endpoint)
+    resource = getattr(view, 'view_class', None)
+    return current_namespace(), resource.__name__ if resource else request.endpoint, request.method
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    total = time.perf_counter() - started
+    phases = g.get('phase_times') or {}
+    phases.setdefault('handler', max(0.0, total - phases.get('auth', 0.0) - phases.get('serialization', 0.0)))
+    # Routing, before/after_request hooks and response finalisation
+    phases['other'] = max(0.0, total - sum(phases.values()))
+    request_metrics.observe(endpoint_labels(), response.status_code, total, phases)
+    return response
+
+# Admin-only profiling: whole-process stack sampling, and cProfile of single requests on request
+stack_sampler = StackSampler(max_duration=app.config['PROFILE_MAX_SECONDS'])
+request_profiles = RequestProfiles(keep=app.config['PROFILE_KEEP'])
+
+@app.after_request
+def add_profile_header(response):
+    profile_id = g.get('profile_id')
+    if profile_id is not None:
+        response.headers['X-Profile-Id'] = profile_id
+    return response
 
 # Enable CORS
 CORS(app)
 
+# Landing page assets are kept in memory, precompressed and revalidated on mtime change
+static_assets = StaticAssetCache(app.static_folder)
+
 # Add home route before API initialization
 @app.route('/')
 def home():
     try:
-        # Read the HTML file directly
-        html_path = os.path.join(app.static_folder, 'index.html')
-        with open(html_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        # Serve the HTML file from the in-memory asset cache
+        return static_assets.response('index.html', request)
     except Exception as e:
         return {
             'message': 'Welcome to Comprehensive API with 50 Features',
@@ -51,6 +283,10 @@ def home():
             'error': str(e)
         }
 
+@app.route('/static/swagger-custom.css')
+def swagger_custom_css():
+    return static_assets.response('swagger-custom.css', request)
+
 # Initialize Flask-RESTX
 api = Api(
     app,
@@ -68,6 +304,14 @@ api = Api(
     security='apikey'
 )
 
+@api.representation('application/json')
+def timed_output_json(data, code, headers=None):
+    """flask_restx's JSON output, counted as the serialization phase"""
+    started = time.perf_counter()
+    response = output_json(data, code, headers)
+    add_phase_time('serialization', time.perf_counter() - started)
+    return response
+
 # Custom Swagger UI configuration
 @api.documentation
 def custom_ui():
@@ -109,35 +353,166 @@ def custom_ui():
     </html>
     '''
 
-# Sample API keys for demonstration
+# Sample API keys for demonstration, seeded into the key store on startup
 VALID_API_KEYS = {
     'demo-key-123': {'name': 'Demo User', 'permissions': ['read', 'write', 'admin']},
     'test-key-456': {'name': 'Test User', 'permissions': ['read', 'write']},
     'readonly-789': {'name': 'Read Only User', 'permissions': ['read']}
 }
 
+# Keys are persisted as SHA-256 hashes and resolved through an in-process LRU cache
+key_store = KeyStore()
+for sample_key, sample_info in VALID_API_KEYS.items():
+    key_store.add(sample_key, sample_info['name'], sample_info['permissions'])
+# Startup is done with the database; don't keep a pooled connection pinned to the main thread
+db.release()
+
+if app.config['RATE_LIMIT_BACKEND'] == 'sqlite':
+    rate_limit_backend = SQLiteBucketBackend(os.path.join(app.config['DATA_DIR'], 'ratelimit.db'))
+else:
+    rate_limit_backend = MemoryBucketBackend()
+rate_limiter = RateLimiter(rate_limit_backend, app.config['RATE_LIMITS'])
+
+def current_namespace():
+    """Namespace of the current request, e.g. 'users' for /api/users/1"""
+    parts = request.path.split('/', 3)
+    return parts[2] if len(parts) > 2 and parts[1] == 'api' else parts[1]
+
+@app.after_request
+def add_rate_limit_headers(response):
+    result = g.get('rate_limit')
+    if result is not None:
+        response.headers.extend(result.headers())
+    return response
+
+# Serialized GET responses, invalidated by tag from the write handlers
+response_cache = ResponseCache(app.config['RESPONSE_CACHE_BYTES'], app.config['RESPONSE_CACHE_TTL'])
+
+def cached(*tags, ttl=None):
+    """Cache a GET handler's response; goes under require_api_key, above any marshalling"""
+    return response_cache.cached(lambda rv: api.make_response(*unpack(rv)), tags, ttl)
+
+# Process, pool and cache usage for /api/system/info and /health, collected off the request path
+telemetry = TelemetryCollector(
+    {'db_pool': db.pool_stats, 'response_cache': response_cache.stats, 'api_key_cache': key_store.cache.stats},
+    interval=app.config['TELEMETRY_INTERVAL'],
+    samples=app.config['TELEMETRY_SAMPLES']
+)
+TELEMETRY_WINDOWS = {'1m': 60, '5m': 300, '15m': 900}
+
+def check_database():
+    stats = db.ping()
+    if stats['utilization'] >= app.config['HEALTH_POOL_UTILIZATION']:
+        raise Degraded(f"Connection pool {stats['utilization']:.0%} checked out", stats)
+    return stats
+
+def check_blob_store():
+    detail = blob_store.check()
+    if detail['free_bytes'] < app.config['HEALTH_MIN_FREE_BYTES']:
+        raise Degraded(f"{detail['free_bytes']} bytes free on the blob volume", detail)
+    return detail
+
+def check_job_queue():
+    detail = job_queue.stats()
+    backlog = detail['oldest_queued_seconds']
+    if backlog is not None and backlog > app.config['HEALTH_JOB_BACKLOG_SECONDS']:
+        raise Degraded(f'Oldest queued job has waited {backlog:.0f}s', detail)
+    return detail
+
+# Liveness never touches a dependency; readiness serves the checker's last round
+health_checker = HealthChecker(
+    {
+        'database': (check_database, True),
+        'blob_store': (check_blob_store, True),
+        # Reports and exports only wait longer while the queue is unavailable
+        'job_queue': (check_job_queue, False)
+    },
+    interval=app.config['HEALTH_CHECK_INTERVAL'],
+    slow=app.config['HEALTH_CHECK_SLOW_MS'] / 1000,
+    failures=app.config['HEALTH_CHECK_FAILURES']
+)
+
+@app.before_request
+def start_monitors():
+    telemetry.start()
+    health_checker.start()
+
+def format_uptime(seconds):
+    days, seconds = divmod(int(seconds), 86400)
+    hours, seconds = divmod(seconds, 3600)
+    return f'{days}d {hours}h {seconds // 60}m' if days else f'{hours}h {seconds // 60}m'
+
+@app.after_request
+def add_etag(response):
+    """Give every successful GET a strong ETag from its body and answer If-None-Match with 304"""
+    if (request.method in ('GET', 'HEAD') and response.status_code == 200
+            and not response.is_streamed and not response.direct_passthrough):
+        # Cached responses and static assets carry their ETag already
+        if 'ETag' not in response.headers:
+            response.add_etag()
+        response.make_conditional(request)
+    return response
+
+def representation_etag(data, model):
+    """The ETag a GET of ``data`` rendered with ``model`` would carry"""
+    return generate_etag(compile_model(model).dumps(data))
+
+def if_match(model):
+    """Precondition for a db update: abort with 412 unless If-Match names the current version"""
+    if not request.if_match:
+        return None
+    def check(current):
+        if not request.if_match.contains(representation_etag(current, model)):
+            api.abort(412, 'Resource was modified; fetch it again and retry with its current ETag')
+    return check
+
+def authenticate(required):
+    """Resolve the request's API key, enforce permissions and rate limits; return the key's info"""
+    api_key = request.headers.get('X-API-Key')
+
+    if not api_key:
+        api.abort(401, 'API key is required')
+
+    user_info = key_store.lookup(api_key)
+    if user_info is None:
+        api.abort(401, 'Invalid API key')
+
+    if required and required.isdisjoint(user_info['permission_set']):
+        api.abort(403, 'Insufficient permissions')
+
+    g.rate_limit = rate_limiter.hit(user_info['key_hash'], current_namespace(), user_info['tier'])
+    if not g.rate_limit.allowed:
+        api.abort(429, 'Rate limit exceeded')
+
+    analytics_rollups.record_visit(user_info['key_hash'])
+    return user_info
+
 def require_api_key(permissions=None):
     """Decorator to require API key authentication"""
+    required = frozenset(permissions or ())
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            api_key = request.headers.get('X-API-Key')
-            
-            if not api_key:
-                api.abort(401, 'API key is required')
-            
-            if api_key not in VALID_API_KEYS:
-                api.abort(401, 'Invalid API key')
-            
-            user_info = VALID_API_KEYS[api_key]
-            
-            if permissions:
-                if not any(perm in user_info['permissions'] for perm in permissions):
-                    api.abort(403, 'Insufficient permissions')
-            
+            started = time.perf_counter()
+            try:
+                user_info = authenticate(required)
+            finally:
+                add_phase_time('auth', time.perf_counter() - started)
+
             # Add user info to request context
             request.current_user = user_info
-            return f(*args, **kwargs)
+            # Handler time excludes serialization done inside it (compiled models)
+            serialized = g.get('phase_times', {}).get('serialization', 0.0)
+            started = time.perf_counter()
+            try:
+                if 'X-Profile' in request.headers and 'admin' in user_info['permission_set']:
+                    # Fetch the report from /api/system/profiles/<X-Profile-Id>
+                    g.profile_id = request_profiles.new_id()
+                    return request_profiles.run(g.profile_id, f, *args, **kwargs)
+                return f(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                add_phase_time('handler', elapsed - (g.phase_times['serialization'] - serialized))
         return decorated_function
     return decorator
 
@@ -199,6 +574,11 @@ order_model = api.model('Order', {
     'updated_at': fields.DateTime(description='Last update timestamp')
 })
 
+# Hot routes serialize through compiled models instead of marshal_with
+user_json = compile_model(user_model)
+product_json = compile_model(product_model)
+order_json = compile_model(order_model)
+
 # Authentication endpoints (Features 1-2)
 @auth_ns.route('/validate')
 class ValidateAPIKey(Resource):
@@ -218,53 +598,208 @@ class GenerateAPIKey(Resource):
     @require_api_key(['admin'])
     def post(self):
         """Generate new API key (Admin only)"""
+        data = request.get_json(silent=True) or {}
+        permissions = data.get('permissions', ['read'])
+        if not permissions or any(perm not in PERMISSIONS for perm in permissions):
+            api.abort(400, f'permissions must be a non-empty subset of {list(PERMISSIONS)}')
         new_key = f"key-{secrets.token_urlsafe(16)}"
-        return {'api_key': new_key, 'message': 'New API key generated'}
+        # Only the hash is stored; the plain key is shown this one time
+        key_store.add(new_key, data.get('name', 'Generated Key'), permissions)
+        return {'api_key': new_key, 'permissions': permissions, 'message': 'New API key generated'}
 
 # User Management endpoints (Features 3-12)
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def run_bulk(table, validator, apply_writes):
+    """Validate a bulk body, write it in one transaction and report per-item results.
+
+    ``apply_writes(operations, written)`` brings the in-memory indexes,
+    rollups and response cache in line with what was written.
+    """
+    try:
+        items = read_operations(request.stream, request.mimetype, app.config['BULK_MAX_OPERATIONS'])
+    except BulkRequestError as e:
+        api.abort(400, str(e))
+    can_delete = 'admin' in request.current_user['permission_set']
+    results = [None] * len(items)
+    positions, operations = [], []
+    for index, item in enumerate(items):
+        try:
+            operation = validator.parse(item)
+        except ValueError as e:
+            results[index] = {'index': index, 'status': 422, 'error': str(e)}
+            continue
+        if operation[0] == 'delete' and not can_delete:
+            results[index] = {'index': index, 'op': 'delete', 'status': 403, 'error': 'Deleting requires admin permission'}
+            continue
+        positions.append(index)
+        operations.append(operation)
+
+    written = db.bulk_write(table, operations)
+    apply_writes(operations, written)
+    for index, (op, _, _), (status, row_id, _, current) in zip(positions, operations, written):
+        results[index] = {'index': index, 'op': op, 'status': status, 'id': row_id}
+        if status >= 400:
+            results[index]['error'] = current
+    failed = sum(result['status'] >= 400 for result in results)
+    body = {'total': len(results), 'succeeded': len(results) - failed, 'failed': failed, 'results': results}
+    return Response(dumps(body), mimetype='application/json')
+
+def validated_body(validator, creating=True):
+    """The request's JSON object, or a 400 if it does not satisfy the validator's model"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        api.abort(400, 'Body must be a JSON object')
+    try:
+        validator.validate(data, creating)
+    except ValueError as e:
+        api.abort(400, str(e))
+    return data
+
+def applied(operations, written):
+    """(op, id, previous, current) for the operations bulk_write carried out"""
+    for (op, _, _), (status, row_id, previous, current) in zip(operations, written):
+        if status < 400:
+            yield op, row_id, previous, current
+
+def final_rows(operations, written):
+    """{id: row after the batch, or None if deleted} for reindexing once per row"""
+    return {row_id: None if op == 'delete' else current
+            for op, row_id, _, current in applied(operations, written)}
+
+BULK_DOC = {
+    'description': 'JSON array (or application/x-ndjson stream) of {"op": "create"|"update"|"delete", '
+                   '"id": ..., "data": {...}} items; items without "op" are creates, or updates when they '
+                   'carry an "id". Deletes need admin permission.'
+}
+
+def stream_rows(rows, model, fmt):
+    """Serialize rows one at a time as NDJSON or as a chunked JSON array"""
+    serialize = compile_model(model).dumps
+    if fmt == 'ndjson':
+        for row in rows:
+            yield serialize(row) + b'\n'
+        return
+    yield b'['
+    separator = b''
+    for row in rows:
+        yield separator + serialize(row)
+        separator = b','
+    yield b']'
+
 @users_ns.route('/')
 class UserList(Resource):
-    @users_ns.doc('list_users')
-    @users_ns.marshal_list_with(user_model)
+    @users_ns.doc('list_users', params={
+        'limit': f'Page size (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE}); unbounded when streaming',
+        'after': 'Cursor: return users with an id greater than this value',
+        'stream': 'Stream rows as they are read: "ndjson" or "json"'
+    })
+    @users_ns.response(200, 'Success', [user_model])
     @require_api_key(['read'])
+    @cached('users:list')
     def get(self):
-        """Get all users"""
-        return [
-            {'id': 1, 'username': 'john_doe', 'email': 'john@example.com', 'first_name': 'John', 'last_name': 'Doe'},
-            {'id': 2, 'username': 'jane_smith', 'email': 'jane@example.com', 'first_name': 'Jane', 'last_name': 'Smith'}
-        ]
+        """Get all users (keyset paginated)"""
+        after = request.args.get('after', 0, type=int)
+        limit = request.args.get('limit', type=int)
+        stream = request.args.get('stream')
+
+        if stream:
+            if stream not in ('ndjson', 'json'):
+                api.abort(400, 'stream must be "ndjson" or "json"')
+            mimetype = 'application/x-ndjson' if stream == 'ndjson' else 'application/json'
+            return Response(stream_rows(db.iter_users(after, limit), user_model, stream), mimetype=mimetype)
+
+        limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+        # Fetch one extra row to know whether another page exists
+        users = db.list_users(after, limit + 1)
+        headers = {}
+        if len(users) > limit:
+            users = users[:limit]
+            next_cursor = users[-1]['id']
+            headers['X-Next-Cursor'] = str(next_cursor)
+            headers['Link'] = f'<{request.base_url}?limit={limit}&after={next_cursor}>; rel="next"'
+        return user_json.response(users, headers=headers)
 
     @users_ns.doc('create_user')
     @users_ns.expect(user_model)
-    @users_ns.marshal_with(user_model, code=201)
+    @users_ns.response(201, 'Created', user_model)
     @require_api_key(['write'])
     def post(self):
         """Create new user"""
-        data = request.json
-        return {'id': 3, 'message': 'User created successfully', **data}, 201
+        data = validated_body(user_bulk)
+        user = db.create_user(data)
+        analytics_rollups.record_user(user)
+        user_index.add(user['id'], user)
+        response_cache.invalidate('users:list')
+        return user_json.response(user, 201)
+
+user_bulk = OperationValidator(user_model)
+
+def apply_user_writes(operations, written):
+    for op, _, previous, current in applied(operations, written):
+        if op == 'create':
+            analytics_rollups.record_user(current)
+        elif op == 'delete':
+            analytics_rollups.record_user_deleted(previous)
+            if previous['avatar']:
+                blob_store.release(previous['avatar'])
+    rows = final_rows(operations, written)
+    for user_id, row in rows.items():
+        if row is None:
+            user_index.remove(user_id)
+    user_index.add_many((user_id, row) for user_id, row in rows.items() if row is not None)
+    response_cache.invalidate('users:list', *(f'user:{user_id}' for user_id in rows))
+
+@users_ns.route('/bulk')
+class UserBulk(Resource):
+    @users_ns.doc('bulk_users', **BULK_DOC)
+    @require_api_key(['write'])
+    def post(self):
+        """Create, update and delete users in one transaction"""
+        return run_bulk('users', user_bulk, apply_user_writes)
 
 @users_ns.route('/<int:user_id>')
 class User(Resource):
     @users_ns.doc('get_user')
-    @users_ns.marshal_with(user_model)
     @require_api_key(['read'])
+    @cached('user:{user_id}')
+    @users_ns.response(200, 'Success', user_model)
     def get(self, user_id):
         """Get user by ID"""
-        return {'id': user_id, 'username': f'user_{user_id}', 'email': f'user{user_id}@example.com'}
+        user = db.get_user(user_id)
+        if user is None:
+            api.abort(404, f'User {user_id} not found')
+        return user_json.response(user)
 
     @users_ns.doc('update_user')
     @users_ns.expect(user_model)
-    @users_ns.marshal_with(user_model)
+    @users_ns.response(200, 'Success', user_model)
     @require_api_key(['write'])
     def put(self, user_id):
         """Update user"""
-        data = request.json
-        return {'id': user_id, 'message': 'User updated successfully', **data}
+        data = validated_body(user_bulk, creating=False)
+        result = db.update_user(user_id, data, check=if_match(user_model))
+        if result is None:
+            api.abort(404, f'User {user_id} not found')
+        user_index.add(user_id, result[1])
+        response_cache.invalidate('users:list', f'user:{user_id}')
+        response = user_json.response(result[1])
+        response.add_etag()
+        return response
 
     @users_ns.doc('delete_user')
     @require_api_key(['admin'])
     def delete(self, user_id):
         """Delete user (Admin only)"""
+        user = db.delete_user(user_id)
+        if user is None:
+            api.abort(404, f'User {user_id} not found')
+        analytics_rollups.record_user_deleted(user)
+        user_index.remove(user_id)
+        response_cache.invalidate('users:list', f'user:{user_id}')
+        if user['avatar']:
+            blob_store.release(user['avatar'])
         return {'message': f'User {user_id} deleted successfully'}, 204
 
 @users_ns.route('/<int:user_id>/profile')
@@ -281,7 +816,14 @@ class UserAvatar(Resource):
     @require_api_key(['write'])
     def post(self, user_id):
         """Upload user avatar"""
-        return {'message': f'Avatar uploaded for user {user_id}'}
+        if db.get_user(user_id) is None:
+            api.abort(404, f'User {user_id} not found')
+        (digest, size), _ = store_request_body()
+        previous = db.set_user_avatar(user_id, digest)
+        if previous:
+            blob_store.release(previous)
+        return {'message': f'Avatar uploaded for user {user_id}', 'sha256': digest, 'size': size,
+                'url': blob_url(digest)}
 
 @users_ns.route('/<int:user_id>/preferences')
 class UserPreferences(Resource):
@@ -301,12 +843,31 @@ class UserActivity(Resource):
 
 @users_ns.route('/search')
 class UserSearch(Resource):
-    @users_ns.doc('search_users')
+    @users_ns.doc('search_users', params={
+        'q': 'Prefix of a username, email, first, last or full name',
+        'limit': 'Maximum results (default 10, max 100)',
+        'cursor': 'next_cursor from the previous page'
+    })
     @require_api_key(['read'])
+    @cached('users:list')
     def get(self):
-        """Search users"""
+        """Search users (typeahead)"""
         query = request.args.get('q', '')
-        return {'query': query, 'results': [{'id': 1, 'username': 'john_doe'}]}
+        limit = max(1, min(request.args.get('limit', 10, type=int), 100))
+        after = None
+        if request.args.get('cursor'):
+            try:
+                after = decode_cursor(request.args['cursor'])
+            except ValueError as e:
+                api.abort(400, str(e))
+        matches, next_position = user_index.search(query, limit, after)
+        next_cursor = encode_cursor(next_position) if next_position else None
+        headers = {'X-Next-Cursor': next_cursor} if next_cursor else {}
+        return {
+            'query': query,
+            'results': [{'id': user_id, **fields, 'matched': key} for user_id, key, fields in matches],
+            'next_cursor': next_cursor
+        }, 200, headers
 
 @users_ns.route('/roles')
 class UserRoles(Resource):
@@ -327,46 +888,150 @@ class UserPermissions(Resource):
 # Product Management endpoints (Features 13-22)
 @products_ns.route('/')
 class ProductList(Resource):
-    @products_ns.doc('list_products')
-    @products_ns.marshal_list_with(product_model)
+    @products_ns.doc('list_products', params={
+        'category': 'Comma-separated categories to include',
+        'status': 'Comma-separated statuses to include',
+        'min_price': 'Minimum price (inclusive)',
+        'max_price': 'Maximum price (inclusive)',
+        'min_stock': 'Minimum stock (inclusive)',
+        'in_stock': 'Only products with stock (same as min_stock=1)',
+        'sort': f'One of {", ".join(PRODUCT_SORTS)} (default id)',
+        'limit': f'Page size (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE})',
+        'after': 'Cursor for id order: return products past this id',
+        'offset': 'Products to skip, for price and stock order',
+        'facets': 'Return {total, items, facets} with per-category and per-status counts'
+    })
+    @products_ns.response(200, 'Success', [product_model])
     @require_api_key(['read'])
+    @cached('products:list')
     def get(self):
-        """Get all products"""
-        return [
-            {'id': 1, 'name': 'Laptop', 'price': 999.99, 'category': 'Electronics', 'stock': 50},
-            {'id': 2, 'name': 'Phone', 'price': 599.99, 'category': 'Electronics', 'stock': 100}
-        ]
+        """Get products, filtered, sorted and faceted from in-memory indexes"""
+        args = request.args
+        sort = args.get('sort', 'id')
+        if sort not in PRODUCT_SORTS:
+            api.abort(400, f'sort must be one of {", ".join(PRODUCT_SORTS)}')
+        limit = max(1, min(args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+        offset = max(0, args.get('offset', 0, type=int))
+        after = args.get('after', type=int)
+        min_stock = 1 if args.get('in_stock', '').lower() in ('1', 'true', 'yes') else args.get('min_stock', type=int)
+        filters = {
+            field: [value for value in args[field].split(',') if value]
+            for field in ('category', 'status') if args.get(field)
+        }
+        ranges = {
+            'price': (args.get('min_price', type=float), args.get('max_price', type=float)),
+            'stock': (min_stock, None)
+        }
+        want_facets = args.get('facets', '').lower() in ('1', 'true', 'yes')
+
+        ids, total, counts = product_facets.query(
+            filters, ranges, sort=sort, after=after, offset=offset, limit=limit + 1, facets=want_facets
+        )
+        headers = {'X-Total-Count': str(total)}
+        if len(ids) > limit:
+            ids = ids[:limit]
+            if sort in ('id', '-id'):
+                headers['X-Next-Cursor'] = str(ids[-1])
+            else:
+                headers['X-Next-Offset'] = str(offset + limit)
+        products = db.get_products(ids)
+        if want_facets:
+            body = dumps({'total': total, 'items': product_json(products), 'facets': counts})
+            return Response(body, headers=headers, mimetype='application/json')
+        return product_json.response(products, headers=headers)
 
     @products_ns.doc('create_product')
     @products_ns.expect(product_model)
-    @products_ns.marshal_with(product_model, code=201)
+    @products_ns.response(201, 'Created', product_model)
     @require_api_key(['write'])
     def post(self):
         """Create new product"""
-        data = request.json
-        return {'id': 3, 'message': 'Product created successfully', **data}, 201
+        data = validated_body(product_bulk)
+        product = db.create_product(data)
+        analytics_rollups.record_product(product)
+        product_index.add(product['id'], product)
+        product_facets.add(product['id'], product)
+        response_cache.invalidate('products:list')
+        return product_json.response(product, 201)
+
+product_bulk = OperationValidator(product_model)
+
+def apply_product_writes(operations, written):
+    for op, _, previous, current in applied(operations, written):
+        if op == 'create':
+            analytics_rollups.record_product(current)
+        elif op == 'delete':
+            analytics_rollups.record_product_deleted(previous)
+    rows = final_rows(operations, written)
+    for digest in db.delete_product_images(product_id for product_id, row in rows.items() if row is None):
+        blob_store.release(digest)
+    for product_id, row in rows.items():
+        if row is None:
+            product_index.remove(product_id)
+            product_facets.remove(product_id)
+        else:
+            product_facets.add(product_id, row)
+    product_index.add_many((product_id, row) for product_id, row in rows.items() if row is not None)
+    response_cache.invalidate('products:list', *(f'product:{product_id}' for product_id in rows))
+
+@products_ns.route('/bulk')
+class ProductBulk(Resource):
+    @products_ns.doc('bulk_products', **BULK_DOC)
+    @require_api_key(['write'])
+    def post(self):
+        """Create, update and delete products in one transaction"""
+        return run_bulk('products', product_bulk, apply_product_writes)
 
 @products_ns.route('/<int:product_id>')
 class Product(Resource):
     @products_ns.doc('get_product')
-    @products_ns.marshal_with(product_model)
     @require_api_key(['read'])
+    @cached('product:{product_id}')
+    @products_ns.response(200, 'Success', product_model)
     def get(self, product_id):
         """Get product by ID"""
-        return {'id': product_id, 'name': f'Product {product_id}', 'price': 99.99}
+        product = db.get_product(product_id)
+        if product is None:
+            api.abort(404, f'Product {product_id} not found')
+        return product_json.response(product)
 
     @products_ns.doc('update_product')
     @products_ns.expect(product_model)
     @require_api_key(['write'])
     def put(self, product_id):
         """Update product"""
-        data = request.json
-        return {'id': product_id, 'message': 'Product updated successfully', **data}
+        data = validated_body(product_bulk, creating=False)
+        precondition = if_match(product_model)
+
+        def check(current):
+            if precondition is not None:
+                precondition(current)
+            # Stock goes through the inventory endpoint, which refuses to drop it below reservations
+            if 'stock' in data and data['stock'] != current['stock']:
+                api.abort(409, f'Change stock with PUT /api/products/{product_id}/inventory')
+
+        result = db.update_product(product_id, data, check=check)
+        if result is None:
+            api.abort(404, f'Product {product_id} not found')
+        product_index.add(product_id, result[1])
+        product_facets.add(product_id, result[1])
+        response_cache.invalidate('products:list', f'product:{product_id}')
+        etag = representation_etag(result[1], product_model)
+        return {'id': product_id, 'message': 'Product updated successfully', **data}, 200, {'ETag': f'"{etag}"'}
 
     @products_ns.doc('delete_product')
     @require_api_key(['admin'])
     def delete(self, product_id):
         """Delete product (Admin only)"""
+        product = db.delete_product(product_id)
+        if product is None:
+            api.abort(404, f'Product {product_id} not found')
+        analytics_rollups.record_product_deleted(product)
+        for digest in db.delete_product_images([product_id]):
+            blob_store.release(digest)
+        product_index.remove(product_id)
+        product_facets.remove(product_id)
+        response_cache.invalidate('products:list', f'product:{product_id}')
         return {'message': f'Product {product_id} deleted successfully'}, 204
 
 @products_ns.route('/<int:product_id>/inventory')
@@ -374,15 +1039,73 @@ class ProductInventory(Resource):
     @products_ns.doc('get_product_inventory')
     @require_api_key(['read'])
     def get(self, product_id):
-        """Get product inventory"""
-        return {'product_id': product_id, 'stock': 50, 'reserved': 5, 'available': 45}
-
-    @products_ns.doc('update_product_inventory')
+        """Get product inventory (reserved counts unexpired reservations only)"""
+        status = inventory.status(product_id)
+        if status is None:
+            api.abort(404, f'Product {product_id} not found')
+        return status
+
+    @products_ns.doc('update_product_inventory', params={
+        'stock': 'Body field: new absolute stock level',
+        'adjust': 'Body field: amount to add to (or, negative, remove from) the current stock'
+    })
     @require_api_key(['write'])
     def put(self, product_id):
-        """Update product inventory"""
-        data = request.json
-        return {'product_id': product_id, 'new_stock': data.get('stock', 0)}
+        """Set or atomically adjust product stock; refused if it would not cover reservations"""
+        data = request.json or {}
+        stock, adjust = data.get('stock'), data.get('adjust')
+        if (stock is None) == (adjust is None):
+            api.abort(400, 'Send exactly one of "stock" or "adjust"')
+        if not isinstance(stock if adjust is None else adjust, int) or (stock is not None and stock < 0):
+            api.abort(400, '"stock" must be a non-negative integer and "adjust" an integer')
+        try:
+            status = inventory.set_stock(product_id, stock=stock, adjust=adjust)
+        except InsufficientStock as e:
+            api.abort(409, str(e))
+        if status is None:
+            api.abort(404, f'Product {product_id} not found')
+        refresh_stock([product_id])
+        return {**status, 'new_stock': status['stock']}
+
+@products_ns.route('/<int:product_id>/reservations')
+class ProductReservations(Resource):
+    @products_ns.doc('reserve_product_stock', params={
+        'quantity': 'Body field: units to hold (default 1)',
+        'ttl': 'Body field: seconds to hold them before they return to stock'
+    })
+    @require_api_key(['write'])
+    def post(self, product_id):
+        """Hold stock for a checkout; pass the reservation_id to POST /api/orders/ to consume it"""
+        data = request.json or {}
+        quantity, ttl = data.get('quantity', 1), data.get('ttl')
+        if not isinstance(quantity, int) or quantity <= 0:
+            api.abort(400, '"quantity" must be a positive integer')
+        if ttl is not None and (not isinstance(ttl, (int, float)) or ttl <= 0):
+            api.abort(400, '"ttl" must be a positive number of seconds')
+        try:
+            reservation = inventory.reserve(product_id, quantity, ttl)
+        except InsufficientStock as e:
+            api.abort(409, str(e))
+        if reservation is None:
+            api.abort(404, f'Product {product_id} not found')
+        return reservation, 201
+
+@products_ns.route('/<int:product_id>/reservations/<string:reservation_id>')
+class ProductReservation(Resource):
+    @products_ns.doc('release_product_reservation')
+    @require_api_key(['write'])
+    def delete(self, product_id, reservation_id):
+        """Release a reservation before it expires"""
+        reservation = inventory.release(product_id, reservation_id)
+        if reservation is None:
+            api.abort(404, f'Reservation {reservation_id} not found or already expired')
+        return reservation
+
+def refresh_stock(product_ids):
+    """Bring the facet index and cached product responses in line after stock changed"""
+    for product in db.get_products(product_ids):
+        product_facets.add(product['id'], product)
+    response_cache.invalidate('products:list', *(f'product:{product_id}' for product_id in product_ids))
 
 @products_ns.route('/<int:product_id>/reviews')
 class ProductReviews(Resource):
@@ -398,61 +1121,171 @@ class ProductImages(Resource):
     @require_api_key(['write'])
     def post(self, product_id):
         """Upload product image"""
-        return {'message': f'Image uploaded for product {product_id}'}
+        if db.get_product(product_id) is None:
+            api.abort(404, f'Product {product_id} not found')
+        (digest, size), content_type = store_request_body()
+        image = db.add_product_image(product_id, digest, content_type)
+        return {'message': f'Image uploaded for product {product_id}', 'image_id': image['id'],
+                'sha256': digest, 'size': size, 'url': blob_url(digest)}
 
 @products_ns.route('/categories')
 class ProductCategories(Resource):
     @products_ns.doc('get_product_categories')
     @require_api_key(['read'])
+    @cached('products:list')
     def get(self):
         """Get product categories"""
         return {'categories': ['Electronics', 'Clothing', 'Books', 'Home & Garden']}
 
 @products_ns.route('/search')
 class ProductSearch(Resource):
-    @products_ns.doc('search_products')
+    @products_ns.doc('search_products', params={
+        'q': 'Search text; the last word is matched as a prefix',
+        'limit': 'Maximum results (default 10, max 100)'
+    })
     @require_api_key(['read'])
+    @cached('products:list')
     def get(self):
         """Search products"""
         query = request.args.get('q', '')
-        return {'query': query, 'results': [{'id': 1, 'name': 'Laptop'}]}
+        limit = max(1, min(request.args.get('limit', 10, type=int), 100))
+        return {
+            'query': query,
+            'results': [
+                {'id': product_id, **fields, 'score': round(score, 4)}
+                for score, product_id, fields in product_index.search(query, limit)
+            ]
+        }
 
 # Order Management endpoints (Features 23-32)
 @orders_ns.route('/')
 class OrderList(Resource):
-    @orders_ns.doc('list_orders')
-    @orders_ns.marshal_list_with(order_model)
+    @orders_ns.doc('list_orders', params={
+        'limit': f'Page size (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE}); unbounded when streaming',
+        'after': 'Cursor: return orders with an id greater than this value',
+        'stream': 'Stream rows as they are read: "ndjson" or "json"'
+    })
     @require_api_key(['read'])
+    @cached('orders:list')
+    @orders_ns.response(200, 'Success', [order_model])
     def get(self):
-        """Get all orders"""
-        return [
-            {'id': 1, 'user_id': 1, 'total_amount': 999.99, 'status': 'completed'},
-            {'id': 2, 'user_id': 2, 'total_amount': 599.99, 'status': 'pending'}
-        ]
-
-    @orders_ns.doc('create_order')
+        """Get all orders (keyset paginated)"""
+        after = request.args.get('after', 0, type=int)
+        limit = request.args.get('limit', type=int)
+        stream = request.args.get('stream')
+
+        if stream:
+            if stream not in ('ndjson', 'json'):
+                api.abort(400, 'stream must be "ndjson" or "json"')
+            mimetype = 'application/x-ndjson' if stream == 'ndjson' else 'application/json'
+            return Response(stream_rows(db.iter_orders(after, limit), order_model, stream), mimetype=mimetype)
+
+        limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+        # Fetch one extra row to know whether another page exists
+        orders = db.list_orders(after, limit + 1)
+        headers = {}
+        if len(orders) > limit:
+            orders = orders[:limit]
+            next_cursor = orders[-1]['id']
+            headers['X-Next-Cursor'] = str(next_cursor)
+            headers['Link'] = f'<{request.base_url}?limit={limit}&after={next_cursor}>; rel="next"'
+        return order_json.response(orders, headers=headers)
+
+    @orders_ns.doc('create_order', params={
+        'items': 'Body field: [{"product_id": .., "quantity": ..}]; their stock is taken with the order',
+        'reservation_ids': 'Body field: reservations (from POST /api/products/<id>/reservations) to consume'
+    })
     @orders_ns.expect(order_model)
+    @orders_ns.response(409, 'Not enough stock for an item')
     @require_api_key(['write'])
     def post(self):
-        """Create new order"""
-        data = request.json
-        return {'id': 3, 'message': 'Order created successfully', **data}, 201
+        """Create new order, taking its items' stock atomically"""
+        data = validated_body(order_body)
+        reservation_ids = data.get('reservation_ids') or []
+        if not isinstance(reservation_ids, list) or not all(isinstance(rid, str) for rid in reservation_ids):
+            api.abort(400, '"reservation_ids" must be a list of strings')
+        order_data = {key: value for key, value in data.items() if key != 'reservation_ids'}
+        try:
+            order = inventory.place_order(order_data, reservation_ids)
+        except (ValueError, UnknownProduct) as e:
+            api.abort(400, str(e))
+        except InsufficientStock as e:
+            api.abort(409, str(e))
+        analytics_rollups.record_order(order)
+        order_status_counts.record(order['status'])
+        response_cache.invalidate('orders:list')
+        stocked = order_lines(order['items'])
+        if stocked:
+            refresh_stock(sorted(stocked))
+        return {'message': 'Order created successfully', **order}, 201
+
+def no_bulk_items(items):
+    if items:
+        raise ValueError('items can only be sent to POST /api/orders/, which takes their stock')
+
+# Single order bodies carry checked lines; bulk ones carry none, as they bypass the inventory
+order_body = OperationValidator(order_model, checks={'items': order_lines})
+order_bulk = OperationValidator(order_model, checks={'items': no_bulk_items})
+
+def apply_order_writes(operations, written):
+    tags = ['orders:list']
+    for op, order_id, previous, current in applied(operations, written):
+        if op == 'create':
+            analytics_rollups.record_order(current)
+            order_status_counts.record(current['status'])
+        elif op == 'update':
+            analytics_rollups.record_order_changed(previous, current)
+            order_status_counts.transition(previous['status'], current['status'])
+        else:
+            analytics_rollups.record_order_deleted(previous)
+            order_status_counts.record(previous['status'], -1)
+        tags.append(f'order:{order_id}')
+    response_cache.invalidate(*tags)
+
+@orders_ns.route('/bulk')
+class OrderBulk(Resource):
+    @orders_ns.doc('bulk_orders', **BULK_DOC)
+    @require_api_key(['write'])
+    def post(self):
+        """Create, update and delete orders in one transaction (orders with items go through POST /api/orders/)"""
+        return run_bulk('orders', order_bulk, apply_order_writes)
 
 @orders_ns.route('/<int:order_id>')
 class Order(Resource):
     @orders_ns.doc('get_order')
-    @orders_ns.marshal_with(order_model)
     @require_api_key(['read'])
+    @cached('order:{order_id}')
+    @orders_ns.response(200, 'Success', order_model)
     def get(self, order_id):
         """Get order by ID"""
-        return {'id': order_id, 'user_id': 1, 'total_amount': 999.99, 'status': 'completed'}
+        order = db.get_order(order_id)
+        if order is None:
+            api.abort(404, f'Order {order_id} not found')
+        return order_json.response(order)
 
     @orders_ns.doc('update_order')
     @require_api_key(['write'])
     def put(self, order_id):
         """Update order"""
-        data = request.json
-        return {'id': order_id, 'message': 'Order updated successfully', **data}
+        data = validated_body(order_body, creating=False)
+        precondition = if_match(order_model)
+
+        def check(current):
+            if precondition is not None:
+                precondition(current)
+            # The items' stock was taken when the order was placed
+            if 'items' in data and data['items'] != current['items']:
+                api.abort(409, 'Order items cannot be changed once the order is placed')
+
+        result = db.update_order(order_id, data, check=check)
+        if result is None:
+            api.abort(404, f'Order {order_id} not found')
+        previous, updated = result
+        analytics_rollups.record_order_changed(previous, updated)
+        order_status_counts.transition(previous['status'], updated['status'])
+        response_cache.invalidate('orders:list', f'order:{order_id}')
+        etag = representation_etag(updated, order_model)
+        return {'id': order_id, 'message': 'Order updated successfully', **data}, 200, {'ETag': f'"{etag}"'}
 
 @orders_ns.route('/<int:order_id>/status')
 class OrderStatus(Resource):
@@ -460,8 +1293,18 @@ class OrderStatus(Resource):
     @require_api_key(['write'])
     def put(self, order_id):
         """Update order status"""
-        data = request.json
-        return {'order_id': order_id, 'new_status': data.get('status')}
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get('status'), str) or not data['status']:
+            api.abort(400, '"status" must be a non-empty string')
+        result = db.update_order(order_id, {'status': data['status']}, check=if_match(order_model))
+        if result is None:
+            api.abort(404, f'Order {order_id} not found')
+        previous, updated = result
+        analytics_rollups.record_status_change(previous['status'], updated['status'])
+        order_status_counts.transition(previous['status'], updated['status'])
+        response_cache.invalidate('orders:list', f'order:{order_id}')
+        etag = representation_etag(updated, order_model)
+        return {'order_id': order_id, 'new_status': data['status']}, 200, {'ETag': f'"{etag}"'}
 
 @orders_ns.route('/<int:order_id>/items')
 class OrderItems(Resource):
@@ -500,81 +1343,107 @@ class OrderStatistics(Resource):
     @orders_ns.doc('get_order_statistics')
     @require_api_key(['read'])
     def get(self):
-        """Get order statistics"""
-        return {'total_orders': 1000, 'pending_orders': 50, 'completed_orders': 950}
+        """Get order statistics (live counters, no table scan)"""
+        counts = order_status_counts.counts()
+        reconciled_at = order_status_counts.reconciled_at
+        return {
+            'total_orders': sum(counts.values()),
+            'pending_orders': counts.get('pending', 0),
+            'completed_orders': counts.get('completed', 0),
+            'by_status': counts,
+            'reconciled_at': reconciled_at.isoformat() if reconciled_at else None
+        }
 
 # Analytics endpoints (Features 33-42)
+# Served from the incrementally maintained rollups: cost is O(buckets), not O(rows)
+def window_args():
+    days = max(1, min(request.args.get('days', 7, type=int), 366))
+    months = max(1, min(request.args.get('months', 6, type=int), 36))
+    return days, months
+
 @analytics_ns.route('/dashboard')
 class AnalyticsDashboard(Resource):
     @analytics_ns.doc('get_analytics_dashboard')
     @require_api_key(['read'])
+    @cached('analytics', ttl=app.config['ANALYTICS_CACHE_TTL'])
     def get(self):
         """Get analytics dashboard data"""
+        summary = analytics_rollups.summary()
         return {
-            'total_users': 1000,
-            'total_products': 500,
-            'total_orders': 2000,
-            'revenue': 50000.00
+            'total_users': summary['total_users'],
+            'total_products': summary['total_products'],
+            'total_orders': summary['total_orders'],
+            'revenue': summary['revenue']
         }
 
 @analytics_ns.route('/sales')
 class SalesAnalytics(Resource):
-    @analytics_ns.doc('get_sales_analytics')
+    @analytics_ns.doc('get_sales_analytics', params={'days': 'Daily buckets (default 7)', 'months': 'Monthly buckets (default 6)'})
     @require_api_key(['read'])
+    @cached('analytics', ttl=app.config['ANALYTICS_CACHE_TTL'])
     def get(self):
         """Get sales analytics"""
+        days, months = window_args()
         return {
-            'daily_sales': [100, 150, 200, 180, 220],
-            'monthly_sales': [3000, 3500, 4000, 4200],
-            'top_products': [{'id': 1, 'name': 'Laptop', 'sales': 50}]
+            'daily_sales': analytics_rollups.daily_series('orders', days),
+            'monthly_sales': analytics_rollups.monthly_series('orders', months),
+            'top_products': analytics_rollups.top_products()
         }
 
 @analytics_ns.route('/users')
 class UserAnalytics(Resource):
-    @analytics_ns.doc('get_user_analytics')
+    @analytics_ns.doc('get_user_analytics', params={'days': 'Daily buckets (default 7)'})
     @require_api_key(['read'])
+    @cached('analytics', ttl=app.config['ANALYTICS_CACHE_TTL'])
     def get(self):
         """Get user analytics"""
+        days, _ = window_args()
         return {
-            'new_users': [10, 15, 20, 18, 22],
-            'active_users': [800, 850, 900, 920],
-            'user_retention': 0.85
+            'new_users': analytics_rollups.daily_series('new_users', days),
+            'active_users': analytics_rollups.daily_series('active_users', days),
+            'user_retention': analytics_rollups.summary()['user_retention']
         }
 
 @analytics_ns.route('/traffic')
 class TrafficAnalytics(Resource):
-    @analytics_ns.doc('get_traffic_analytics')
+    @analytics_ns.doc('get_traffic_analytics', params={'days': 'Daily buckets (default 7)'})
     @require_api_key(['read'])
+    @cached('analytics', ttl=app.config['ANALYTICS_CACHE_TTL'])
     def get(self):
         """Get traffic analytics"""
+        days, _ = window_args()
         return {
-            'page_views': [1000, 1200, 1500, 1300],
-            'unique_visitors': [500, 600, 750, 650],
-            'bounce_rate': 0.35
+            'page_views': analytics_rollups.daily_series('page_views', days),
+            'unique_visitors': analytics_rollups.daily_series('unique_visitors', days),
+            'bounce_rate': analytics_rollups.bounce_rate()
         }
 
 @analytics_ns.route('/revenue')
 class RevenueAnalytics(Resource):
-    @analytics_ns.doc('get_revenue_analytics')
+    @analytics_ns.doc('get_revenue_analytics', params={'days': 'Daily buckets (default 7)', 'months': 'Monthly buckets (default 6)'})
     @require_api_key(['read'])
+    @cached('analytics', ttl=app.config['ANALYTICS_CACHE_TTL'])
     def get(self):
         """Get revenue analytics"""
+        days, months = window_args()
         return {
-            'daily_revenue': [1000, 1500, 2000, 1800],
-            'monthly_revenue': [30000, 35000, 40000, 42000],
-            'revenue_by_category': {'Electronics': 25000, 'Clothing': 15000}
+            'daily_revenue': [round(v, 2) for v in analytics_rollups.daily_series('revenue', days)],
+            'monthly_revenue': [round(v, 2) for v in analytics_rollups.monthly_series('revenue', months)],
+            'revenue_by_category': analytics_rollups.summary()['revenue_by_category']
         }
 
 @analytics_ns.route('/conversion')
 class ConversionAnalytics(Resource):
     @analytics_ns.doc('get_conversion_analytics')
     @require_api_key(['read'])
+    @cached('analytics', ttl=app.config['ANALYTICS_CACHE_TTL'])
     def get(self):
         """Get conversion analytics"""
+        summary = analytics_rollups.summary()
         return {
-            'conversion_rate': 0.05,
-            'funnel_data': [1000, 500, 250, 50],
-            'conversion_by_source': {'organic': 0.06, 'paid': 0.04}
+            'conversion_rate': summary['conversion_rate'],
+            'funnel_data': summary['funnel'],
+            'conversion_by_source': summary['conversion_by_source']
         }
 
 @analytics_ns.route('/performance')
@@ -582,25 +1451,88 @@ class PerformanceAnalytics(Resource):
     @analytics_ns.doc('get_performance_analytics')
     @require_api_key(['read'])
     def get(self):
-        """Get performance analytics"""
+        """Get performance analytics (measured request latency since startup)"""
+        summary = request_metrics.summary()
+        endpoints = request_metrics.endpoints()
         return {
-            'page_load_time': 2.5,
-            'api_response_time': 150,
-            'error_rate': 0.01
+            'api_response_time': summary['mean_ms'],
+            'error_rate': summary['error_rate'],
+            **summary,
+            'since': datetime.fromtimestamp(summary['since']).isoformat(),
+            'by_namespace': {
+                namespace: request_metrics.summary(namespace) for namespace in sorted(
+                    {row['namespace'] for row in endpoints}
+                )
+            },
+            'slowest_endpoints': endpoints[:10]
         }
 
+def job_status(job, url_prefix):
+    """Public view of a queued report/export job"""
+    status = {
+        'status': job['status'],
+        'progress': job['progress'],
+        'created_at': job['created_at'],
+        'finished_at': job['finished_at']
+    }
+    if job['status'] == 'completed':
+        status['download_url'] = f'{url_prefix}/{job["id"]}/download'
+    if job['status'] == 'failed':
+        status['error'] = job['error']
+    return status
+
+def owned_by_caller(record):
+    """Whether the calling API key created ``record``; admins may act on anyone's"""
+    return record['owner'] == request.current_user['key_hash'] or 'admin' in request.current_user['permission_set']
+
+def get_owned_job(job_id, kind):
+    job = job_queue.get(job_id, kind)
+    # Someone else's job is reported as missing rather than forbidden, so ids cannot be probed
+    if job is None or not owned_by_caller(job):
+        api.abort(404, f'{kind.capitalize()} {job_id} not found')
+    return job
+
+def send_job_artifact(job_id, kind):
+    job = get_owned_job(job_id, kind)
+    if job['status'] != 'completed':
+        api.abort(409, f'{kind.capitalize()} {job_id} is {job["status"]}')
+    # conditional=True gives Range / If-Range / ETag handling for resumable downloads
+    return send_file(job['artifact'], as_attachment=True, conditional=True)
+
 @analytics_ns.route('/reports')
 class AnalyticsReports(Resource):
     @analytics_ns.doc('generate_analytics_report')
     @require_api_key(['read'])
     def post(self):
         """Generate analytics report"""
-        data = request.json
+        data = request.get_json(silent=True) or {}
+        report_type = data.get('type', 'sales')
+        if report_type not in REPORT_TYPES:
+            api.abort(400, f'type must be one of {list(REPORT_TYPES)}')
+        job = job_queue.enqueue('report', {'type': report_type}, owner=request.current_user['key_hash'])
         return {
-            'report_id': 'RPT123456',
-            'type': data.get('type', 'sales'),
-            'status': 'generating'
-        }
+            'report_id': job['id'],
+            'type': report_type,
+            'status': job['status'],
+            'status_url': f'/api/analytics/reports/{job["id"]}'
+        }, 202
+
+@analytics_ns.route('/reports/<string:report_id>')
+class AnalyticsReportStatus(Resource):
+    @analytics_ns.doc('get_analytics_report_status')
+    @require_api_key(['read'])
+    def get(self, report_id):
+        """Get analytics report status and progress"""
+        job = get_owned_job(report_id, 'report')
+        return {'report_id': report_id, 'type': job['params']['type'], **job_status(job, '/api/analytics/reports')}
+
+@analytics_ns.route('/reports/<string:report_id>/download')
+class AnalyticsReportDownload(Resource):
+    @analytics_ns.doc('download_analytics_report')
+    @require_api_key(['read'])
+    def get(self, report_id):
+        """Download a finished analytics report (supports Range)"""
+        return send_job_artifact(report_id, 'report')
 
 @analytics_ns.route('/export')
 class AnalyticsExport(Resource):
@@ -608,12 +1540,38 @@ class AnalyticsExport(Resource):
     @require_api_key(['read'])
     def post(self):
         """Export analytics data"""
-        data = request.json
+        data = request.get_json(silent=True) or {}
+        fmt = data.get('format', 'csv')
+        dataset = data.get('dataset', 'orders')
+        if fmt not in EXPORT_FORMATS:
+            api.abort(400, f'format must be one of {list(EXPORT_FORMATS)}')
+        if dataset not in EXPORT_DATASETS:
+            api.abort(400, f'dataset must be one of {list(EXPORT_DATASETS)}')
+        job = job_queue.enqueue('export', {'format': fmt, 'dataset': dataset}, owner=request.current_user['key_hash'])
         return {
-            'export_id': 'EXP123456',
-            'format': data.get('format', 'csv'),
-            'download_url': '/downloads/analytics_export.csv'
-        }
+            'export_id': job['id'],
+            'format': fmt,
+            'dataset': dataset,
+            'status': job['status'],
+            'status_url': f'/api/analytics/export/{job["id"]}'
+        }, 202
+
+@analytics_ns.route('/export/<string:export_id>')
+class AnalyticsExportStatus(Resource):
+    @analytics_ns.doc('get_analytics_export_status')
+    @require_api_key(['read'])
+    def get(self, export_id):
+        """Get analytics export status and progress"""
+        job = get_owned_job(export_id, 'export')
+        return {'export_id': export_id, 'format': job['params']['format'], **job_status(job, '/api/analytics/export')}
+
+@analytics_ns.route('/export/<string:export_id>/download')
+class AnalyticsExportDownload(Resource):
+    @analytics_ns.doc('download_analytics_export')
+    @require_api_key(['read'])
+    def get(self, export_id):
+        """Download a finished analytics export (supports Range)"""
+        return send_job_artifact(export_id, 'export')
 
 @analytics_ns.route('/alerts')
 class AnalyticsAlerts(Resource):
@@ -629,18 +1587,90 @@ class AnalyticsAlerts(Resource):
         }
 
 # File Management endpoints (Features 43-47)
+def file_details(record):
+    return {
+        'file_id': record['file_id'],
+        'filename': record['filename'],
+        'content_type': record['content_type'],
+        'size': record['size'],
+        'sha256': record['sha256'],
+        'uploaded_at': record['uploaded_at'],
+        'url': f'/api/files/{record["file_id"]}/download'
+    }
+
+def get_owned_file(file_id):
+    record = file_store.get(file_id)
+    if record is None or not owned_by_caller(record):
+        api.abort(404, f'File {file_id} not found')
+    return record
+
+def get_owned_upload(upload_id):
+    upload = file_store.get_upload(upload_id)
+    if upload is None or not owned_by_caller(upload):
+        api.abort(404, f'Upload {upload_id} not found')
+    return upload
+
 @files_ns.route('/upload')
 class FileUpload(Resource):
-    @files_ns.doc('upload_file')
+    @files_ns.doc('upload_file', params={'filename': 'File name when sending a raw request body'})
     @require_api_key(['write'])
     def post(self):
-        """Upload file"""
-        return {
-            'file_id': 'FILE123456',
-            'filename': 'document.pdf',
-            'size': 1024000,
-            'url': '/files/FILE123456'
-        }
+        """Upload file (raw body or multipart 'file' field, streamed to disk)"""
+        owner = request.current_user['key_hash']
+        if request.mimetype == 'multipart/form-data':
+            upload = request.files.get('file')
+            if upload is None:
+                api.abort(400, "multipart upload requires a 'file' field")
+            record = file_store.save_stream(upload.stream, upload.filename, upload.mimetype, owner)
+        else:
+            filename = request.args.get('filename') or request.headers.get('X-Filename') or 'upload'
+            record = file_store.save_stream(request.stream, filename, request.mimetype or None, owner)
+        return file_details(record), 201
+
+@files_ns.route('/uploads')
+class ResumableUploadList(Resource):
+    @files_ns.doc('create_resumable_upload')
+    @require_api_key(['write'])
+    def post(self):
+        """Start a resumable upload; send the body in chunks with Content-Range"""
+        data = request.get_json(silent=True) or {}
+        size = data.get('size')
+        if not isinstance(size, int) or size < 0:
+            api.abort(400, 'size (total bytes) is required')
+        upload = file_store.create_upload(
+            data.get('filename', 'upload'), size, data.get('content_type'), request.current_user['key_hash']
+        )
+        return {'upload_id': upload['upload_id'], 'offset': 0, 'size': size,
+                'upload_url': f'/api/files/uploads/{upload["upload_id"]}'}, 201
+
+@files_ns.route('/uploads/<string:upload_id>')
+class ResumableUpload(Resource):
+    @files_ns.doc('get_resumable_upload')
+    @require_api_key(['write'])
+    def get(self, upload_id):
+        """Get the byte offset to resume an upload from"""
+        upload = get_owned_upload(upload_id)
+        return {'upload_id': upload_id, 'offset': upload['offset'], 'size': upload['total_size']}
+
+    @files_ns.doc('append_resumable_upload')
+    @require_api_key(['write'])
+    def put(self, upload_id):
+        """Upload one chunk (Content-Range: bytes start-end/total); completes on the last byte"""
+        content_range = parse_content_range_header(request.headers.get('Content-Range'))
+        if content_range is None or content_range.units != 'bytes':
+            api.abort(400, 'Content-Range: bytes start-end/total header is required')
+        get_owned_upload(upload_id)
+        try:
+            upload = file_store.append(
+                upload_id, request.stream, content_range.start, content_range.stop - content_range.start
+            )
+            if upload['offset'] == upload['total_size']:
+                return file_details(file_store.complete(upload_id)), 201
+        except KeyError:
+            api.abort(404, f'Upload {upload_id} not found')
+        except UploadError as e:
+            api.abort(409, str(e))
+        return {'upload_id': upload_id, 'offset': upload['offset'], 'size': upload['total_size']}
 
 @files_ns.route('/<string:file_id>')
 class FileDetail(Resource):
@@ -648,17 +1678,15 @@ class FileDetail(Resource):
     @require_api_key(['read'])
     def get(self, file_id):
         """Get file details"""
-        return {
-            'file_id': file_id,
-            'filename': 'document.pdf',
-            'size': 1024000,
-            'uploaded_at': '2025-01-07T10:00:00Z'
-        }
+        return file_details(get_owned_file(file_id))
 
     @files_ns.doc('delete_file')
     @require_api_key(['write'])
     def delete(self, file_id):
         """Delete file"""
+        get_owned_file(file_id)
+        if not file_store.delete(file_id):
+            api.abort(404, f'File {file_id} not found')
         return {'message': f'File {file_id} deleted successfully'}, 204
 
 @files_ns.route('/<string:file_id>/download')
@@ -666,24 +1694,36 @@ class FileDownload(Resource):
     @files_ns.doc('download_file')
     @require_api_key(['read'])
     def get(self, file_id):
-        """Download file"""
-        return {
-            'download_url': f'/downloads/{file_id}',
-            'expires_at': '2025-01-07T11:00:00Z'
-        }
+        """Download file (supports Range; zero-copy via sendfile/X-Accel-Redirect)"""
+        record = get_owned_file(file_id)
+        return send_blob(record['sha256'], record['content_type'], record['filename'] or record['file_id'])
+
+@files_ns.route('/blobs/<string:sha256>')
+class BlobDownload(Resource):
+    @files_ns.doc('download_blob')
+    @require_api_key(['read'])
+    def get(self, sha256):
+        """Download stored content by its SHA-256 (avatars, product images)"""
+        if not blob_store.exists(sha256):
+            api.abort(404, f'Blob {sha256} not found')
+        response = send_blob(sha256)
+        # Content-addressed URLs never change meaning
+        response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+        return response
 
 @files_ns.route('/list')
 class FileList(Resource):
-    @files_ns.doc('list_files')
+    @files_ns.doc('list_files', params={'limit': 'Page size (default 100)', 'after': 'Cursor: file_id to continue after'})
     @require_api_key(['read'])
     def get(self):
-        """List files"""
+        """List the caller's files (every file for admins)"""
+        limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+        user = request.current_user
+        owner = None if 'admin' in user['permission_set'] else user['key_hash']
+        files = file_store.list(request.args.get('after', ''), limit, owner)
         return {
-            'files': [
-                {'file_id': 'FILE123456', 'filename': 'document.pdf', 'size': 1024000},
-                {'file_id': 'FILE789012', 'filename': 'image.jpg', 'size': 512000}
-            ],
-            'total': 2
+            'files': [{'file_id': f['file_id'], 'filename': f['filename'], 'size': f['size']} for f in files],
+            'total': len(files)
         }
 
 @files_ns.route('/<string:file_id>/share')
@@ -701,28 +1741,22 @@ class FileShare(Resource):
 # Notification endpoints (Features 48-50)
 @notifications_ns.route('/')
 class NotificationList(Resource):
-    @notifications_ns.doc('list_notifications')
+    @notifications_ns.doc('list_notifications', params={'limit': 'Page size (default 100)', 'after': 'Cursor: notification id to continue after'})
     @require_api_key(['read'])
     def get(self):
         """Get notifications"""
-        return {
-            'notifications': [
-                {'id': 1, 'title': 'New order received', 'message': 'Order #123 has been placed', 'read': False},
-                {'id': 2, 'title': 'Payment confirmed', 'message': 'Payment for order #122 confirmed', 'read': True}
-            ]
-        }
+        after = request.args.get('after', 0, type=int)
+        limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+        return {'notifications': db.list_notifications(after, limit)}
 
     @notifications_ns.doc('create_notification')
     @require_api_key(['write'])
     def post(self):
         """Create notification"""
         data = request.json
-        return {
-            'id': 3,
-            'title': data.get('title'),
-            'message': data.get('message'),
-            'created_at': '2025-01-07T10:00:00Z'
-        }, 201
+        notification = db.create_notification(data)
+        notification_events.publish('notification.created', notification)
+        return notification, 201
 
 @notifications_ns.route('/<int:notification_id>/read')
 class NotificationRead(Resource):
@@ -730,6 +1764,9 @@ class NotificationRead(Resource):
     @require_api_key(['write'])
     def put(self, notification_id):
         """Mark notification as read"""
+        if not db.mark_notification_read(notification_id):
+            api.abort(404, f'Notification {notification_id} not found')
+        notification_events.publish('notification.read', {'notification_id': notification_id})
         return {'notification_id': notification_id, 'read': True}
 
 @notifications_ns.route('/send')
@@ -737,13 +1774,86 @@ class NotificationSend(Resource):
     @notifications_ns.doc('send_notification')
     @require_api_key(['write'])
     def post(self):
-        """Send notification"""
+        """Send notification (queued; returns a tracking id)"""
         data = request.json
+        recipients = data.get('recipients', [])
+        channel = data.get('type', 'email')
+        if not isinstance(recipients, list):
+            api.abort(400, 'recipients must be a list')
+        if channel not in CHANNELS:
+            api.abort(400, f'type must be one of {list(CHANNELS)}')
+        payload = {'title': data.get('title'), 'message': data.get('message')}
+        delivery = delivery_pipeline.submit(channel, recipients, payload)
+        notification_events.publish('notification.sent', {
+            'tracking_id': delivery['tracking_id'], 'type': channel, 'recipients': len(recipients)
+        })
         return {
-            'message': 'Notification sent successfully',
-            'recipients': data.get('recipients', []),
-            'type': data.get('type', 'email')
-        }
+            'message': 'Notification queued for delivery',
+            'tracking_id': delivery['tracking_id'],
+            'recipients': len(recipients),
+            'type': channel,
+            'status_url': f'/api/notifications/send/{delivery["tracking_id"]}'
+        }, 202
+
+@notifications_ns.route('/send/<string:tracking_id>')
+class NotificationDelivery(Resource):
+    @notifications_ns.doc('get_notification_delivery')
+    @require_api_key(['read'])
+    def get(self, tracking_id):
+        """Get delivery progress for a sent notification"""
+        delivery = delivery_pipeline.status(tracking_id)
+        if delivery is None:
+            api.abort(404, f'Delivery {tracking_id} not found')
+        return delivery
+
+@notifications_ns.route('/stream')
+class NotificationStream(Resource):
+    @notifications_ns.doc('stream_notifications', params={'last_event_id': 'Resume after this event id (or send Last-Event-ID)'})
+    @require_api_key(['read'])
+    def get(self):
+        """Subscribe to notification events (Server-Sent Events)"""
+        last_id = request.headers.get('Last-Event-ID', type=int)
+        if last_id is None:
+            last_id = request.args.get('last_event_id', notification_events.last_id, type=int)
+        if on_event_loop():
+            body = event_loop_body(notification_events.astream(last_id))
+        else:
+            body = notification_events.stream(last_id)
+        return Response(
+            body,
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
+@notifications_ns.route('/poll')
+class NotificationPoll(Resource):
+    @notifications_ns.doc('poll_notifications', params={
+        'last_event_id': 'Return events after this id (default: only new events)',
+        'timeout': 'Seconds to hold the request open when nothing is pending (max 30)'
+    })
+    @require_api_key(['read'])
+    def get(self):
+        """Long-poll for notification events (fallback for clients without SSE)"""
+        last_id = request.args.get('last_event_id', notification_events.last_id, type=int)
+        timeout = max(0.0, min(request.args.get('timeout', 25.0, type=float), 30.0))
+        # Nothing below needs the database; don't hold a pooled connection while waiting
+        db.release()
+        if on_event_loop() and timeout:
+            return Response(event_loop_body(poll_body(last_id, timeout)), mimetype='application/json',
+                            headers={'Cache-Control': 'no-cache'})
+        return poll_result(notification_events.wait(min(last_id, notification_events.last_id), timeout), last_id)
+
+def poll_result(events, last_id):
+    if events is None:
+        return {'events': [], 'last_event_id': notification_events.last_id, 'reset': True}
+    return {
+        'events': [event.to_dict() for event in events],
+        'last_event_id': events[-1].id if events else last_id
+    }
+
+async def poll_body(last_id, timeout):
+    events = await notification_events.wait_async(min(last_id, notification_events.last_id), timeout)
+    yield dumps(poll_result(events, last_id))
 
 # System endpoints (No auth required for health check)
 @system_ns.route('/health')
@@ -751,28 +1861,153 @@ class SystemHealth(Resource):
     @system_ns.doc('system_health_check')
     def get(self):
         """System health check (No auth required)"""
+        uptime = telemetry.uptime()
         return {
             'status': 'healthy',
             'timestamp': datetime.now().isoformat(),
             'version': '1.0.0',
-            'uptime': '24h 30m'
+            'uptime': format_uptime(uptime),
+            'uptime_seconds': round(uptime, 1),
+            'readiness': health_checker.report()[0]
         }
 
+@system_ns.route('/health/live')
+class SystemLiveness(Resource):
+    @system_ns.doc('system_liveness')
+    def get(self):
+        """Liveness probe: answers whenever the process can serve a request; no I/O (No auth required)"""
+        return {'status': 'alive'}
+
+@system_ns.route('/health/ready')
+class SystemReadiness(Resource):
+    @system_ns.doc('system_readiness', responses={200: 'Ready or degraded', 503: 'Not ready'})
+    def get(self):
+        """Readiness probe from the background dependency checks (No auth required).
+
+        503 while starting up, when a critical dependency is down, or when
+        the checks have stopped completing.
+        """
+        status, age, dependencies = health_checker.report()
+        return {
+            'status': status,
+            'timestamp': datetime.now().isoformat(),
+            'checked_seconds_ago': round(age, 3) if age is not None else None,
+            'check_interval': health_checker.interval,
+            'dependencies': dependencies
+        }, 200 if status in (READY, PARTIAL) else 503
+
 @system_ns.route('/info')
 class SystemInfo(Resource):
     @system_ns.doc('get_system_info')
     @require_api_key(['admin'])
     def get(self):
-        """Get system information (Admin only)"""
+        """Get system information (Admin only).
+
+        Current values are the collector's latest reading; each window
+        reports CPU over the whole span and means/peaks of the rest.
+        """
+        current = telemetry.latest()
+        rss = current['rss_bytes']
         return {
             'version': '1.0.0',
             'environment': 'production',
-            'database': 'connected',
-            'cache': 'redis',
-            'memory_usage': '45%',
-            'cpu_usage': '23%'
+            'uptime_seconds': round(telemetry.uptime(), 1),
+            'memory_usage': f'{rss / PHYSICAL_MEMORY * 100:.1f}%' if rss and PHYSICAL_MEMORY else None,
+            'cpu_usage': f"{current['cpu_percent']:.1f}%",
+            'sampled_at': datetime.fromtimestamp(current['time']).isoformat(),
+            'sample_interval': telemetry.interval,
+            'process': {
+                'rss_bytes': rss,
+                'physical_memory_bytes': PHYSICAL_MEMORY,
+                'cpu_percent': current['cpu_percent'],
+                'cpu_seconds': round(current['cpu_seconds'], 3),
+                'open_fds': current['open_fds'],
+                'threads': current['threads'],
+                'python_threads': current['python_threads'],
+                'gc_pending': current['gc_pending'],
+                'gc_collections': current['gc_collections'],
+                'gc_seconds': round(current['gc_seconds'], 6)
+            },
+            'database': current['sources'].get('db_pool'),
+            'cache': {
+                'response': current['sources'].get('response_cache'),
+                'api_keys': current['sources'].get('api_key_cache')
+            },
+            'windows': {label: telemetry.window(seconds) for label, seconds in TELEMETRY_WINDOWS.items()}
         }
 
+@system_ns.route('/profile')
+class SystemProfile(Resource):
+    @system_ns.doc('profile_system', params={
+        'seconds': 'How long to sample (default 10, capped by PROFILE_MAX_SECONDS)',
+        'interval_ms': 'Milliseconds between samples (default 5)',
+        'idle': '1 to keep threads parked in waits/selects',
+        'threads': '1 to prefix each stack with its thread name'
+    })
+    @require_api_key(['admin'])
+    def get(self):
+        """Sample every thread's stack for a while and return collapsed stacks (Admin only).
+
+        The output feeds flamegraph.pl, speedscope or inferno directly.
+        """
+        seconds = request.args.get('seconds', 10.0, type=float)
+        interval = request.args.get('interval_ms', 5.0, type=float) / 1000
+        # This thread only waits while sampling; don't hold a pooled connection meanwhile
+        db.release()
+        try:
+            stacks, ticks, elapsed = stack_sampler.sample(
+                seconds, interval,
+                include_idle=request.args.get('idle') == '1',
+                by_thread=request.args.get('threads') == '1'
+            )
+        except ProfilerBusy as e:
+            api.abort(409, str(e))
+        return Response(collapse(stacks), mimetype='text/plain', headers={
+            'X-Profile-Ticks': str(ticks),
+            'X-Profile-Samples': str(sum(stacks.values())),
+            'X-Profile-Seconds': f'{elapsed:.3f}'
+        })
+
+@system_ns.route('/profiles')
+class SystemRequestProfiles(Resource):
+    @system_ns.doc('list_request_profiles')
+    @require_api_key(['admin'])
+    def get(self):
+        """List the kept per-request profiles, newest first (Admin only).
+
+        Send any admin request with an X-Profile header to profile it;
+        the response carries the profile's X-Profile-Id.
+        """
+        return {'profiles': [
+            {'id': profile_id, 'seconds': round(elapsed, 6), 'url': f'/api/system/profiles/{profile_id}'}
+            for profile_id, elapsed in request_profiles.ids()
+        ]}
+
+@system_ns.route('/profiles/<string:profile_id>')
+class SystemRequestProfile(Resource):
+    @system_ns.doc('get_request_profile', params={
+        'sort': 'pstats sort key (default cumulative; e.g. tottime, calls)',
+        'limit': 'Number of functions to list (default 50)'
+    })
+    @require_api_key(['admin'])
+    def get(self, profile_id):
+        """pstats report of one profiled request (Admin only)"""
+        sort = request.args.get('sort', 'cumulative')
+        if sort not in pstats.Stats.sort_arg_dict_default:
+            api.abort(400, f'Unknown sort key {sort!r}')
+        report = request_profiles.report(profile_id, sort, request.args.get('limit', 50, type=int))
+        if report is None:
+            api.abort(404, f'Profile {profile_id} not found')
+        return Response(report, mimetype='text/plain')
+
+@system_ns.route('/metrics')
+class SystemMetrics(Resource):
+    @system_ns.doc('get_system_metrics')
+    @require_api_key(['admin'])
+    def get(self):
+        """Request metrics in Prometheus text format (Admin only; scrapers send X-API-Key)"""
+        return Response(request_metrics.prometheus(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api-info')
 def api_info():
     return {
@@ -799,5 +2034,7 @@ def api_info():
     }
 
 if __name__ == '__main__':
+    # Development server; in production run `uvicorn asgi:application` so that long polls, SSE
+    # streams and downloads wait on an event loop instead of each holding a thread
     app.run(host='0.0.0.0', port=5000, debug=True)
 
@@ -0,0 +1,229 @@
+import threading
+import time
+from array import array
+from collections import Counter
+
+from flask import g, has_request_context
+
+# Sub-buckets per power of two: values are kept to within 1/64 (~1.6%) of their true size
+SUB_BUCKET_BITS = 7
+_HALF = 1 << (SUB_BUCKET_BITS - 1)
+# Values are recorded in microseconds and clamped at about 1.2 hours
+MAX_MICROS = (1 << 32) - 1
+_BUCKETS = (1 << SUB_BUCKET_BITS) + (32 - SUB_BUCKET_BITS) * _HALF
+
+# Upper bounds (seconds) of the cumulative buckets written in the Prometheus exposition
+PROMETHEUS_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+PHASES = ('auth', 'handler', 'serialization', 'other')
+
+
+def _bucket(micros):
+    if micros < 1 << SUB_BUCKET_BITS:
+        return micros
+    shift = micros.bit_length() - SUB_BUCKET_BITS
+    return (1 << SUB_BUCKET_BITS) + (shift - 1) * _HALF + (micros >> shift) - _HALF
+
+
+def _bucket_bounds(index):
+    """[low, high) in microseconds of the values counted in bucket ``index``"""
+    if index < 1 << SUB_BUCKET_BITS:
+        return index, index + 1
+    shift, offset = divmod(index - (1 << SUB_BUCKET_BITS), _HALF)
+    shift += 1
+    low = (offset + _HALF) << shift
+    return low, low + (1 << shift)
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of durations.
+
+    Each power-of-two range of microseconds is split into 64 linear
+    sub-buckets, so any recorded value and any percentile read back is
+    within ~1.6% of the truth, from 1µs to over an hour, in a fixed
+    ~1,700-slot array. Recording is one ``bit_length`` and an array
+    increment; histograms can be merged by adding their arrays.
+    """
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = array('q', bytes(8 * _BUCKETS))
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[_bucket(min(int(seconds * 1e6), MAX_MICROS))] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        counts = self.counts
+        for index, value in enumerate(other.counts):
+            if value:
+                counts[index] += value
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, fraction):
+        """Duration in seconds below which ``fraction`` of the recorded values fall"""
+        if not self.count:
+            return 0.0
+        rank = max(1, round(fraction * self.count))
+        seen = 0
+        for index, value in enumerate(self.counts):
+            seen += value
+            if seen >= rank:
+                low, high = _bucket_bounds(index)
+                # Middle of the bucket, but never past the largest value actually seen
+                return min((low + high) / 2e6, self.max)
+        return self.max
+
+    def cumulative(self, bounds):
+        """Counts of values <= each bound (seconds), for Prometheus ``le`` buckets"""
+        result = []
+        seen, index = 0, 0
+        for bound in bounds:
+            limit = bound * 1e6
+            while index < _BUCKETS and _bucket_bounds(index)[1] <= limit:
+                seen += self.counts[index]
+                index += 1
+            result.append(seen)
+        return result
+
+
+def add_phase_time(phase, seconds):
+    """Attribute ``seconds`` of the current request to ``phase`` (no-op outside a request)"""
+    if has_request_context():
+        phases = g.setdefault('phase_times', Counter())
+        phases[phase] += seconds
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _Series:
+    __slots__ = ('latency', 'phases', 'statuses')
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.phases = {phase: LatencyHistogram() for phase in PHASES}
+        self.statuses = Counter()
+
+
+class RequestMetrics:
+    """Per-endpoint request latency, phase breakdown and status counts.
+
+    An endpoint is ``(namespace, Resource class, HTTP method)``, which
+    keeps label cardinality bounded by the routing table rather than by
+    URLs. Series are created on first use and guarded by one lock;
+    recording takes it once per request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self.started = time.time()
+
+    def observe(self, endpoint, status, seconds, phases):
+        with self._lock:
+            series = self._series.get(endpoint)
+            if series is None:
+                series = self._series[endpoint] = _Series()
+            series.latency.record(seconds)
+            series.statuses[status] += 1
+            for phase, phase_seconds in phases.items():
+                series.phases[phase].record(phase_seconds)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self.started = time.time()
+
+    def _merged(self, namespace=None):
+        merged = LatencyHistogram()
+        statuses = Counter()
+        with self._lock:
+            for (series_namespace, _, _), series in self._series.items():
+                if namespace is None or series_namespace == namespace:
+                    merged.merge(series.latency)
+                    statuses.update(series.statuses)
+        return merged, statuses
+
+    def summary(self, namespace=None):
+        """Request count, error rate and latency percentiles (ms), over all endpoints or one namespace"""
+        latency, statuses = self._merged(namespace)
+        errors = sum(count for status, count in statuses.items() if status >= 500)
+        return {
+            'requests': latency.count,
+            'error_rate': round(errors / latency.count, 4) if latency.count else 0.0,
+            'client_error_rate': round(
+                sum(count for status, count in statuses.items() if 400 <= status < 500) / latency.count, 4
+            ) if latency.count else 0.0,
+            'mean_ms': round(latency.total / latency.count * 1000, 3) if latency.count else 0.0,
+            'p50_ms': round(latency.percentile(0.50) * 1000, 3),
+            'p95_ms': round(latency.percentile(0.95) * 1000, 3),
+            'p99_ms': round(latency.percentile(0.99) * 1000, 3),
+            'max_ms': round(latency.max * 1000, 3),
+            'since': self.started
+        }
+
+    def endpoints(self):
+        """Per-endpoint percentiles and status counts, slowest p99 first"""
+        with self._lock:
+            rows = [
+                {
+                    'namespace': namespace, 'resource': resource, 'method': method,
+                    'requests': series.latency.count,
+                    'p50_ms': round(series.latency.percentile(0.50) * 1000, 3),
+                    'p95_ms': round(series.latency.percentile(0.95) * 1000, 3),
+                    'p99_ms': round(series.latency.percentile(0.99) * 1000, 3),
+                    'phases_p50_ms': {
+                        phase: round(histogram.percentile(0.50) * 1000, 3)
+                        for phase, histogram in series.phases.items() if histogram.count
+                    },
+                    'statuses': {str(status): count for status, count in sorted(series.statuses.items())}
+                }
+                for (namespace, resource, method), series in self._series.items()
+            ]
+        return sorted(rows, key=lambda row: row['p99_ms'], reverse=True)
+
+    def prometheus(self):
+        """Prometheus text exposition (version 0.0.4) of every series"""
+        lines = [
+            '# HELP api_requests_total Requests by endpoint and status code.',
+            '# TYPE api_requests_total counter'
+        ]
+        latency_lines = [
+            '# HELP api_request_duration_seconds Request latency by endpoint.',
+            '# TYPE api_request_duration_seconds histogram'
+        ]
+        phase_lines = [
+            '# HELP api_request_phase_seconds Time spent per request phase by endpoint.',
+            '# TYPE api_request_phase_seconds histogram'
+        ]
+        with self._lock:
+            for (namespace, resource, method), series in sorted(self._series.items()):
+                labels = f'namespace="{_label(namespace)}",resource="{_label(resource)}",method="{method}"'
+                for status, count in sorted(series.statuses.items()):
+                    lines.append(f'api_requests_total{{{labels},status="{status}"}} {count}')
+                _histogram_lines(latency_lines, 'api_request_duration_seconds', labels, series.latency)
+                for phase, histogram in series.phases.items():
+                    if histogram.count:
+                        _histogram_lines(phase_lines, 'api_request_phase_seconds', f'{labels},phase="{phase}"',
+                                         histogram)
+        return '\n'.join(lines + latency_lines + phase_lines) + '\n'
+
+
+def _histogram_lines(lines, name, labels, histogram):
+    for bound, count in zip(PROMETHEUS_BUCKETS, histogram.cumulative(PROMETHEUS_BUCKETS)):
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+    lines.append(f'{name}_sum{{{labels}}} {histogram.total:.6f}')
+    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
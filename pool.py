@@ -0,0 +1,167 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    """No connection became available within the pool's timeout"""
+
+
+class _Slot:
+    __slots__ = ('conn', 'created')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created = time.monotonic()
+
+
+class ConnectionPool:
+    """Bounded pool of reusable database connections.
+
+    Up to ``size`` connections are kept open between checkouts; under
+    load up to ``max_overflow`` more are opened and closed again when
+    returned. A checkout waits up to ``timeout`` seconds once every
+    connection is in use. Idle connections older than ``recycle``
+    seconds are replaced, and with ``pre_ping`` each checkout runs a
+    trivial query first so a broken connection is swapped for a fresh
+    one rather than handed to the caller. Connections keep their
+    compiled statement cache across checkouts, which is what makes
+    reusing them worthwhile.
+    """
+
+    def __init__(self, connect, size=5, max_overflow=10, timeout=30.0, recycle=3600.0, pre_ping=True, ping=None):
+        self._connect = connect
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self._ping = ping or (lambda conn: conn.execute('SELECT 1').fetchone())
+        # Most recently returned first, so the warmest connections are reused
+        self._idle = []
+        self._open = 0
+        self._checked_out = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._closes = 0
+        self._closed = False
+        self._available = threading.Condition(threading.Lock())
+
+    def _new_slot(self):
+        try:
+            return _Slot(self._connect())
+        except BaseException:
+            with self._available:
+                self._open -= 1
+                self._available.notify()
+            raise
+
+    def _discard(self, slot):
+        self._closes += 1
+        try:
+            slot.conn.close()
+        except Exception:
+            pass
+
+    def _usable(self, slot):
+        if self.recycle is not None and time.monotonic() - slot.created > self.recycle:
+            return False
+        if self.pre_ping:
+            try:
+                self._ping(slot.conn)
+            except Exception:
+                return False
+        return True
+
+    def acquire(self):
+        """Check a connection out; every acquire must be paired with ``release``"""
+        deadline = None
+        with self._available:
+            while True:
+                if self._closed:
+                    raise PoolTimeout('Connection pool is closed')
+                if self._idle:
+                    slot = self._idle.pop()
+                    break
+                if self._open < self.size + self.max_overflow:
+                    self._open += 1
+                    slot = None
+                    break
+                if deadline is None:
+                    self._waits += 1
+                    deadline = time.monotonic() + self.timeout
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f'No connection available within {self.timeout}s '
+                        f'(size {self.size}, overflow {self.max_overflow})'
+                    )
+                self._available.wait(remaining)
+            self._checked_out += 1
+        try:
+            if slot is not None and not self._usable(slot):
+                self._discard(slot)
+                slot = None
+            if slot is None:
+                slot = self._new_slot()
+        except BaseException:
+            with self._available:
+                self._checked_out -= 1
+            raise
+        return slot
+
+    def release(self, slot):
+        """Return a checked-out connection, rolling back anything left uncommitted"""
+        keep = not self._closed
+        if keep:
+            try:
+                if slot.conn.in_transaction:
+                    slot.conn.rollback()
+            except Exception:
+                # Closed or broken; let it go rather than pool it
+                keep = False
+        with self._available:
+            self._checked_out -= 1
+            if keep and len(self._idle) < self.size:
+                self._idle.append(slot)
+                slot = None
+            else:
+                self._open -= 1
+            self._available.notify()
+        if slot is not None:
+            self._discard(slot)
+
+    @contextmanager
+    def connection(self):
+        slot = self.acquire()
+        try:
+            yield slot.conn
+        finally:
+            self.release(slot)
+
+    def dispose(self):
+        """Close idle connections and refuse further checkouts"""
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._available.notify_all()
+        for slot in idle:
+            self._discard(slot)
+
+    def stats(self):
+        with self._available:
+            return {
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'open': self._open,
+                'idle': len(self._idle),
+                'checked_out': self._checked_out,
+                'utilization': round(self._checked_out / (self.size + self.max_overflow), 4)
+                if self.size + self.max_overflow else 0.0,
+                'overflow': max(0, self._open - self.size),
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'closed': self._closes
+            }
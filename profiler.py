@@ -0,0 +1,150 @@
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+
+# (file name, function) of frames where a thread is parked rather than working
+IDLE_FRAMES = {
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('selectors.py', 'select'),
+    ('socketserver.py', 'serve_forever'),
+    ('socket.py', 'accept'),
+    ('socket.py', 'readinto'),
+    ('queue.py', 'get'),
+    ('thread.py', '_worker'),
+    ('connection.py', '_recv'),
+}
+
+
+class ProfilerBusy(Exception):
+    """A sampling profile is already running in this process"""
+
+
+def _frame_label(code):
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class StackSampler:
+    """Time-boxed statistical profiler over every thread of the process.
+
+    Every ``interval`` seconds it reads all thread stacks with
+    ``sys._current_frames()`` and counts each root-to-leaf stack of
+    function labels, so the cost is one stack walk per thread per tick
+    and nothing at all between profiles. Output is the collapsed-stack
+    format (``frame;frame;frame count``) read by flamegraph.pl,
+    speedscope and inferno. One profile runs at a time per process.
+    """
+
+    def __init__(self, max_duration=60.0, min_interval=0.001):
+        self.max_duration = max_duration
+        self.min_interval = min_interval
+        self._running = threading.Lock()
+
+    def sample(self, duration, interval=0.005, include_idle=False, by_thread=False):
+        """Sample for ``duration`` seconds; return (Counter of stack -> samples, ticks, elapsed)"""
+        duration = min(max(duration, 0.0), self.max_duration)
+        interval = max(interval, self.min_interval)
+        if not self._running.acquire(blocking=False):
+            raise ProfilerBusy('A profile is already running')
+        try:
+            return self._sample(duration, interval, include_idle, by_thread)
+        finally:
+            self._running.release()
+
+    def _sample(self, duration, interval, include_idle, by_thread):
+        me = threading.get_ident()
+        labels = {}
+        stacks = Counter()
+        ticks = 0
+        start = time.perf_counter()
+        deadline = start + duration
+        next_tick = start
+        while True:
+            names = {thread.ident: thread.name for thread in threading.enumerate()} if by_thread else None
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                leaf = codes[0]
+                if not include_idle and (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_FRAMES:
+                    continue
+                parts = []
+                for code in reversed(codes):
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = _frame_label(code)
+                    parts.append(label)
+                if by_thread:
+                    parts.insert(0, f'thread {names.get(ident, ident)}')
+                stacks[';'.join(parts)] += 1
+            ticks += 1
+            next_tick += interval
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if next_tick > now:
+                time.sleep(min(next_tick, deadline) - now)
+            else:
+                # Fell behind (a busy GIL); skip the missed ticks rather than bursting
+                next_tick = now
+        return stacks, ticks, time.perf_counter() - start
+
+
+def collapse(stacks):
+    """Collapsed-stack text, heaviest stacks first"""
+    return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+
+class RequestProfiles:
+    """cProfile runs of individual requests, kept for later download.
+
+    ``run`` profiles one call under an id from ``new_id`` (handed out
+    first so the caller can report it even if the call raises); the last
+    ``keep`` profiles are retained in memory.
+    """
+
+    def __init__(self, keep=20):
+        self.keep = keep
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+        self._counter = itertools.count(1)
+
+    def new_id(self):
+        return f'{next(self._counter)}-{secrets.token_hex(4)}'
+
+    def run(self, profile_id, func, *args, **kwargs):
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._profiles[profile_id] = (profile, elapsed)
+                while len(self._profiles) > self.keep:
+                    self._profiles.popitem(last=False)
+
+    def ids(self):
+        with self._lock:
+            return [(profile_id, elapsed) for profile_id, (_, elapsed) in reversed(self._profiles.items())]
+
+    def report(self, profile_id, sort='cumulative', limit=50):
+        """pstats text for one profile, or None if it is unknown or has been evicted"""
+        with self._lock:
+            entry = self._profiles.get(profile_id)
+        if entry is None:
+            return None
+        out = io.StringIO()
+        stats = pstats.Stats(entry[0], stream=out)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return out.getvalue()
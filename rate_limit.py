@@ -0,0 +1,140 @@
+import heapq
+import math
+import os
+import sqlite3
+import threading
+import time
+
+# Tier -> (requests per second, burst capacity)
+DEFAULT_LIMITS = {
+    'admin': (50.0, 200),
+    'write': (20.0, 100),
+    'read': (10.0, 50)
+}
+
+
+class RateLimitResult:
+    __slots__ = ('allowed', 'limit', 'remaining', 'reset_after', 'retry_after')
+
+    def __init__(self, allowed, limit, tokens, rate):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = max(0, int(tokens))
+        # Seconds until the bucket is full again / until one token is available
+        self.reset_after = math.ceil((limit - tokens) / rate)
+        self.retry_after = 0 if allowed else max(1, math.ceil((1 - tokens) / rate))
+
+    def headers(self):
+        headers = {
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(self.remaining),
+            'X-RateLimit-Reset': str(self.reset_after)
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(self.retry_after)
+        return headers
+
+
+def _refill(tokens, updated, now, rate, capacity):
+    return min(capacity, tokens + max(0.0, now - updated) * rate)
+
+
+class MemoryBucketBackend:
+    """Token buckets in a dict, guarded by striped locks.
+
+    Only requests whose bucket names hash to the same stripe contend, so
+    different keys almost never wait on each other. Limits are per process.
+    Past ``max_buckets`` one request prunes down to ``low_water`` of it,
+    so a client spraying new keys pays for a prune once per batch of
+    keys rather than on every request.
+    """
+
+    def __init__(self, stripes=64, max_buckets=100000, low_water=0.9):
+        self._buckets = {}
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self.max_buckets = max_buckets
+        self.low_water = int(max_buckets * low_water)
+        self._pruning = threading.Lock()
+
+    def take(self, bucket, rate, capacity):
+        now = time.monotonic()
+        with self._locks[hash(bucket) % len(self._locks)]:
+            state = self._buckets.get(bucket)
+            tokens = capacity if state is None else _refill(state[0], state[1], now, rate, capacity)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[bucket] = (tokens, now, now + (capacity - tokens) / rate)
+        # Requests arriving while another one prunes go on without waiting
+        if len(self._buckets) > self.max_buckets and self._pruning.acquire(blocking=False):
+            try:
+                self._prune(now)
+            finally:
+                self._pruning.release()
+        return allowed, tokens
+
+    def _prune(self, now):
+        # A bucket that has refilled completely is identical to a missing one
+        for bucket, state in list(self._buckets.items()):
+            if state[2] <= now:
+                self._buckets.pop(bucket, None)
+        excess = len(self._buckets) - self.low_water
+        if excess > 0:
+            oldest = heapq.nsmallest(excess, list(self._buckets.items()), key=lambda item: item[1][1])
+            for bucket, _ in oldest:
+                self._buckets.pop(bucket, None)
+
+
+class SQLiteBucketBackend:
+    """Token buckets in a SQLite file shared by every worker on the host"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._local = threading.local()
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS buckets (bucket TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+        )
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+        return conn
+
+    def take(self, bucket, rate, capacity):
+        conn = self._connection()
+        now = time.time()
+        # BEGIN IMMEDIATE serialises the read-modify-write across processes
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM buckets WHERE bucket = ?', (bucket,)).fetchone()
+            tokens = capacity if row is None else _refill(row[0], row[1], now, rate, capacity)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            conn.execute(
+                'INSERT OR REPLACE INTO buckets (bucket, tokens, updated) VALUES (?, ?, ?)', (bucket, tokens, now)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed, tokens
+
+
+class RateLimiter:
+    """Per-key, per-namespace token buckets sized by permission tier"""
+
+    def __init__(self, backend=None, limits=None):
+        self.backend = backend or MemoryBucketBackend()
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+
+    def hit(self, key_id, namespace, tier):
+        rate, capacity = self.limits.get(tier, self.limits['read'])
+        allowed, tokens = self.backend.take(f'{key_id}:{namespace}', rate, capacity)
+        return RateLimitResult(allowed, capacity, tokens, rate)
@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, request
+
+# Response headers worth replaying from a cached entry; per-request headers
+# (rate limits, request ids) are added again by the after_request hooks
+CACHED_HEADERS = ('Content-Type', 'ETag', 'X-Total-Count', 'X-Next-Cursor', 'X-Next-Offset', 'Link')
+
+
+class _Entry:
+    __slots__ = ('body', 'status', 'headers', 'tags', 'expires')
+
+    def __init__(self, body, status, headers, tags, expires):
+        self.body = body
+        self.status = status
+        self.headers = headers
+        self.tags = tags
+        self.expires = expires
+
+
+class ResponseCache:
+    """In-process cache of serialized GET responses with tag invalidation.
+
+    Entries hold the response bytes, keyed by path, query arguments and
+    the caller's permission tier, and are evicted by TTL and, once the
+    total body size passes ``max_bytes``, least recently used first.
+    Each entry carries tags such as ``product:7`` or ``products:list``;
+    write handlers call ``invalidate`` with the tags they affect. A
+    response computed while one of its tags was invalidated is not
+    stored, so a slow read cannot put stale data back after a write.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, default_ttl=60.0, enabled=True):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._versions = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self):
+        tier = getattr(request, 'current_user', {}).get('tier')
+        return request.path, tuple(sorted(request.args.items(multi=True))), tier
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._size -= len(entry.body)
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires <= time.monotonic():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def versions(self, tags):
+        with self._lock:
+            return tuple(self._versions.get(tag, 0) for tag in tags)
+
+    def put(self, key, entry, versions):
+        if len(entry.body) > self.max_bytes:
+            return
+        with self._lock:
+            if versions != tuple(self._versions.get(tag, 0) for tag in entry.tags):
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            self._size += len(entry.body)
+            for tag in entry.tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while self._size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, *tags):
+        """Drop every entry carrying any of ``tags``"""
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+                for key in list(self._tags.get(tag, ())):
+                    self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def cached(self, make_response, tags=(), ttl=None):
+        """Decorator caching a view's serialized response.
+
+        Place it under ``require_api_key`` (which sets the tier used in the
+        key) and above ``marshal_with``. ``tags`` may reference the view's
+        keyword arguments, e.g. ``'product:{product_id}'``.
+        ``make_response`` turns a view's return value into a Response.
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                if not self.enabled:
+                    return f(*args, **kwargs)
+                key = self._key()
+                entry = self.get(key)
+                if entry is None:
+                    entry_tags = tuple(tag.format(**kwargs) for tag in tags)
+                    versions = self.versions(entry_tags)
+                    rv = f(*args, **kwargs)
+                    response = rv if isinstance(rv, Response) else make_response(rv)
+                    if response.status_code != 200 or response.is_streamed or response.direct_passthrough:
+                        return response
+                    # Hash the body once per fill rather than on every hit
+                    response.add_etag()
+                    entry = _Entry(
+                        response.get_data(),
+                        response.status_code,
+                        [(name, response.headers[name]) for name in CACHED_HEADERS if name in response.headers],
+                        entry_tags,
+                        time.monotonic() + ttl
+                    )
+                    self.put(key, entry, versions)
+                    response.headers['X-Cache'] = 'MISS'
+                    return response
+                response = Response(entry.body, status=entry.status, headers=entry.headers)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+            return decorated_function
+        return decorator
@@ -0,0 +1,386 @@
+import logging
+import threading
+import time
+from array import array
+from collections import Counter
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+FUNNEL_STAGES = ('visit', 'signup', 'order', 'completed')
+
+# Metric -> array typecode ('q' for counts, 'd' for money)
+SERIES = {
+    'orders': 'q',
+    'revenue': 'd',
+    'new_users': 'q',
+    'active_users': 'q',
+    'page_views': 'q',
+    'unique_visitors': 'q'
+}
+
+# Distinct-id sets are only kept for the most recent days
+DISTINCT_WINDOW_DAYS = 2
+
+
+def _as_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    if value:
+        try:
+            return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            pass
+    return datetime.now()
+
+
+def day_index(value=None):
+    return _as_datetime(value).date().toordinal()
+
+
+def month_index(value=None):
+    moment = _as_datetime(value)
+    return moment.year * 12 + moment.month - 1
+
+
+def _amount(value, name):
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        raise ValueError(f'{name} must be a number, not {value!r}')
+    return float(value)
+
+
+def order_figures(order):
+    """(revenue, {category: revenue}, {product_id: units}) for an order.
+
+    Items placed through the inventory carry their product's price and
+    category; an order without priced items books its total_amount as
+    uncategorized revenue. Raises ValueError for an order whose amounts
+    or items are not of the expected types.
+    """
+    items = order.get('items') or []
+    if not isinstance(items, list):
+        raise ValueError('items must be a list')
+    by_category, units = Counter(), Counter()
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError('order items must be objects')
+        quantity = item.get('quantity')
+        quantity = 1 if quantity is None else quantity
+        if not isinstance(quantity, int) or isinstance(quantity, bool):
+            raise ValueError(f'quantity must be an integer, not {quantity!r}')
+        product_id = item.get('product_id')
+        if product_id is not None:
+            if not isinstance(product_id, int) or isinstance(product_id, bool):
+                raise ValueError(f'product_id must be an integer, not {product_id!r}')
+            units[product_id] += quantity
+        if item.get('price') is not None:
+            category = item.get('category')
+            category = category if isinstance(category, str) and category else 'Uncategorized'
+            by_category[category] += _amount(item['price'], 'price') * quantity
+    total = order.get('total_amount')
+    amount = _amount(total, 'total_amount') if total is not None else sum(by_category.values())
+    if not by_category and amount:
+        by_category['Uncategorized'] = amount
+    return amount, by_category, units
+
+
+class Series:
+    """Dense column of per-bucket values indexed by day or month ordinal"""
+
+    def __init__(self, typecode):
+        self.typecode = typecode
+        self.start = None
+        self.values = array(typecode)
+
+    def add(self, index, amount=1):
+        if self.start is None:
+            self.start = index
+        elif index < self.start:
+            self.values = array(self.typecode, bytes(self.values.itemsize * (self.start - index))) + self.values
+            self.start = index
+        offset = index - self.start
+        missing = offset + 1 - len(self.values)
+        if missing > 0:
+            self.values.frombytes(bytes(self.values.itemsize * missing))
+        self.values[offset] += amount
+
+    def window(self, end, count):
+        """Values of the ``count`` buckets ending at ``end``, zero-filled"""
+        result = [0] * count
+        if self.start is None:
+            return result
+        first = end - count + 1
+        lo = max(first, self.start)
+        hi = min(end, self.start + len(self.values) - 1)
+        if lo <= hi:
+            result[lo - first:hi - first + 1] = self.values[lo - self.start:hi - self.start + 1].tolist()
+        return result
+
+    def total(self):
+        return sum(self.values)
+
+
+class RollupEngine:
+    """Incrementally maintained daily/monthly aggregates for the analytics namespace.
+
+    Writes and deletes call the ``record_*`` methods; reads are bounded by the number
+    of buckets requested, never by table size. State is per process and can
+    be rebuilt from the store with ``rebuild``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.daily = {name: Series(typecode) for name, typecode in SERIES.items()}
+        self.monthly = {name: Series(typecode) for name, typecode in SERIES.items()}
+        self.totals = Counter()
+        self.revenue_total = 0.0
+        self.revenue_by_category = Counter()
+        self.product_sales = Counter()
+        self.product_names = {}
+        self.funnel = array('q', bytes(8 * len(FUNNEL_STAGES)))
+        self.orders_by_source = Counter()
+        self.customers = set()
+        self.repeat_customers = set()
+        self.single_visits = Counter()
+        self._distinct = {}
+
+    def _add(self, metric, when, amount=1):
+        self.daily[metric].add(day_index(when), amount)
+        self.monthly[metric].add(month_index(when), amount)
+
+    def _count_today(self, kind, ident, when):
+        """Return how many times ``ident`` has been seen for ``kind`` that day"""
+        day = day_index(when)
+        seen = self._distinct.get((kind, day))
+        if seen is None:
+            seen = self._distinct[(kind, day)] = {}
+            for stale in [key for key in self._distinct if key[1] <= day - DISTINCT_WINDOW_DAYS]:
+                del self._distinct[stale]
+                self.single_visits.pop(stale[1], None)
+        seen[ident] = count = seen.get(ident, 0) + 1
+        return count
+
+    def _stage(self, name, amount=1):
+        self.funnel[FUNNEL_STAGES.index(name)] += amount
+
+    # Write side
+
+    def record_visit(self, visitor_id, when=None):
+        day = day_index(when)
+        with self._lock:
+            self._add('page_views', when)
+            count = self._count_today('visitor', visitor_id, when)
+            # Visitors with exactly one request so far today count as bounces
+            if count == 1:
+                self._add('unique_visitors', when)
+                self._stage('visit')
+                self.single_visits[day] += 1
+            elif count == 2:
+                self.single_visits[day] -= 1
+
+    def record_user(self, user):
+        with self._lock:
+            self.totals['users'] += 1
+            self._add('new_users', user.get('created_at'))
+            self._stage('signup')
+
+    def record_user_deleted(self, user):
+        # Signups stay in the daily series; they happened
+        with self._lock:
+            self.totals['users'] -= 1
+
+    def record_product(self, product):
+        with self._lock:
+            self.totals['products'] += 1
+            if product.get('id') is not None:
+                self.product_names[product['id']] = product.get('name')
+
+    def record_product_deleted(self, product):
+        # Its name is kept so past sales still show up under it
+        with self._lock:
+            self.totals['products'] -= 1
+
+    def record_order(self, order):
+        when = order.get('created_at')
+        user_id = order.get('user_id')
+        with self._lock:
+            self._count_order(order, 1)
+            if user_id is not None:
+                if user_id in self.customers:
+                    self.repeat_customers.add(user_id)
+                else:
+                    self.customers.add(user_id)
+                if self._count_today('active', user_id, when) == 1:
+                    self._add('active_users', when)
+
+    def record_order_deleted(self, order):
+        with self._lock:
+            self._count_order(order, -1)
+
+    def _count_order(self, order, sign, figures=None):
+        when = order.get('created_at')
+        amount, by_category, units = figures or order_figures(order)
+        self.totals['orders'] += sign
+        self.revenue_total += sign * amount
+        self._add('orders', when, sign)
+        self._add('revenue', when, sign * amount)
+        self._stage('order', sign)
+        self.orders_by_source[order.get('source') or 'direct'] += sign
+        if order.get('status') == 'completed':
+            self._stage('completed', sign)
+        for category, revenue in by_category.items():
+            self.revenue_by_category[category] += sign * revenue
+        for product_id, quantity in units.items():
+            self.product_sales[product_id] += sign * quantity
+
+    def record_order_changed(self, previous, current):
+        """Move an updated order's figures (amount, status) from its old version to its new one"""
+        amounts = order_figures(previous), order_figures(current)
+        with self._lock:
+            self._count_order(previous, -1, amounts[0])
+            self._count_order(current, 1, amounts[1])
+
+    def record_status_change(self, old_status, new_status):
+        if old_status == new_status:
+            return
+        with self._lock:
+            if new_status == 'completed':
+                self._stage('completed')
+            elif old_status == 'completed':
+                self._stage('completed', -1)
+
+    def rebuild(self, users=(), orders=(), products=()):
+        """Replay the store into fresh buckets (startup or reconciliation)"""
+        with self._lock:
+            self._reset()
+        for kind, record, rows in (('user', self.record_user, users), ('product', self.record_product, products),
+                                   ('order', self.record_order, orders)):
+            for row in rows:
+                try:
+                    record(row)
+                except (TypeError, ValueError) as e:
+                    # One unreadable row must not keep the process from starting
+                    logger.warning('Skipping %s %s in the analytics rollups: %s', kind, row.get('id'), e)
+
+    # Read side
+
+    def daily_series(self, metric, days=7, end=None):
+        with self._lock:
+            return self.daily[metric].window(day_index(end), days)
+
+    def monthly_series(self, metric, months=6, end=None):
+        with self._lock:
+            return self.monthly[metric].window(month_index(end), months)
+
+    def bounce_rate(self, when=None):
+        day = day_index(when)
+        with self._lock:
+            visitors = len(self._distinct.get(('visitor', day), ()))
+            return round(self.single_visits[day] / visitors, 4) if visitors else 0.0
+
+    def top_products(self, limit=5):
+        with self._lock:
+            return [
+                {'id': product_id, 'name': self.product_names.get(product_id), 'sales': sales}
+                for product_id, sales in self.product_sales.most_common(limit) if sales > 0
+            ]
+
+    def summary(self):
+        with self._lock:
+            funnel = self.funnel.tolist()
+            visits = funnel[0]
+            return {
+                'total_users': self.totals['users'],
+                'total_products': self.totals['products'],
+                'total_orders': self.totals['orders'],
+                'revenue': round(self.revenue_total, 2),
+                'revenue_by_category': {k: round(v, 2) for k, v in self.revenue_by_category.items() if round(v, 2)},
+                'funnel': funnel,
+                'conversion_rate': round(funnel[3] / visits, 4) if visits else 0.0,
+                'conversion_by_source': {
+                    source: round(count / visits, 4) if visits else 0.0
+                    for source, count in self.orders_by_source.items() if count
+                },
+                'user_retention': round(len(self.repeat_customers) / len(self.customers), 4) if self.customers else 0.0
+            }
+
+
+class StatusCounters:
+    """Live ``status -> count`` for orders, kept in step by the write paths.
+
+    A status change moves one unit between two counters under one lock,
+    so readers never see it half applied, and reads are a dict copy.
+    ``scan`` (the authoritative ``GROUP BY`` over the store) is run once
+    at startup and then every ``interval`` seconds by a background thread
+    to repair drift, e.g. from writes made by other worker processes. A
+    scan only replaces the counters if no local write was recorded while
+    it ran; otherwise it is retried on the next round.
+    """
+
+    def __init__(self, scan, interval=300.0):
+        self.scan = scan
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        # Bumped by every local write; lets reconcile detect writes that raced its scan
+        self._sequence = 0
+        self.reconciled_at = None
+        self.corrections = 0
+        self._thread = None
+        self.reconcile()
+
+    def record(self, status, amount=1):
+        with self._lock:
+            self._counts[status or 'pending'] += amount
+            self._sequence += 1
+        self._start()
+
+    def transition(self, old_status, new_status):
+        if old_status == new_status:
+            return
+        with self._lock:
+            self._counts[old_status or 'pending'] -= 1
+            self._counts[new_status or 'pending'] += 1
+            self._sequence += 1
+        self._start()
+
+    def counts(self):
+        self._start()
+        with self._lock:
+            return {status: count for status, count in self._counts.items() if count}
+
+    def reconcile(self):
+        """Replace the counters with a fresh scan; return False if a concurrent write made it stale"""
+        with self._lock:
+            sequence = self._sequence
+        scanned = Counter(self.scan())
+        with self._lock:
+            if sequence != self._sequence:
+                return False
+            if self.reconciled_at is not None and +scanned != +self._counts:
+                self.corrections += 1
+            self._counts = scanned
+            self.reconciled_at = datetime.now()
+        return True
+
+    def _start(self):
+        """Start the reconciler lazily so forking servers do not inherit it"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._reconcile_loop, name='order-status-reconciler',
+                                                daemon=True)
+                self._thread.start()
+
+    def _reconcile_loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.reconcile()
+            except Exception:
+                # A locked or briefly unavailable database just delays the next repair
+                continue
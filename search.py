@@ -0,0 +1,371 @@
+import base64
+import binascii
+import heapq
+import json
+import math
+import re
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, OrderedDict
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(str(text).lower()) if text else []
+
+
+def trigrams(term):
+    padded = f'  {term} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def encode_cursor(position):
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError for anything it did not produce"""
+    try:
+        key, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor') from None
+    if not isinstance(key, str) or not isinstance(doc_id, int):
+        raise ValueError('Invalid cursor')
+    return key, doc_id
+
+
+class InvertedIndex:
+    """In-memory full-text index with BM25 ranking and typeahead matching.
+
+    Documents are indexed over weighted fields. The last query token is
+    matched as a prefix (found by bisecting the sorted vocabulary), and
+    tokens with no exact or prefix hit fall back to trigram similarity so
+    small typos still return results. Documents are added, replaced and
+    removed incrementally; recent query results are cached until the next
+    write.
+    """
+
+    k1 = 1.2
+    b = 0.75
+    max_expansions = 50
+
+    def __init__(self, fields, stored_fields=(), cache_size=1024):
+        # fields: {field_name: weight}
+        self.fields = fields
+        self.stored_fields = stored_fields
+        self.cache_size = cache_size
+        # (tokens, limit) -> results; emptied by every write
+        self._results = OrderedDict()
+        # Terms first seen during add_many, merged into the vocabulary when it finishes
+        self._pending = None
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self):
+        self._results.clear()
+        self.postings = {}
+        self.doc_terms = {}
+        self.doc_lengths = {}
+        self.stored = {}
+        self.total_length = 0.0
+        self.vocabulary = []
+        self.trigram_terms = {}
+
+    def __len__(self):
+        return len(self.doc_terms)
+
+    def _terms_for(self, doc):
+        terms = Counter()
+        for field, weight in self.fields.items():
+            for token in tokenize(doc.get(field)):
+                terms[token] += weight
+        return terms
+
+    def _add_term(self, term):
+        if self._pending is not None:
+            # add_many() sorts and builds trigrams once at the end
+            self._pending.append(term)
+            return
+        self.vocabulary.insert(bisect_left(self.vocabulary, term), term)
+        for gram in trigrams(term):
+            self.trigram_terms.setdefault(gram, set()).add(term)
+
+    def _drop_term(self, term):
+        del self.postings[term]
+        index = bisect_left(self.vocabulary, term)
+        if index < len(self.vocabulary) and self.vocabulary[index] == term:
+            del self.vocabulary[index]
+        elif self._pending is not None:
+            self._pending.remove(term)
+            return
+        for gram in trigrams(term):
+            grams = self.trigram_terms.get(gram)
+            if grams is not None:
+                grams.discard(term)
+                if not grams:
+                    del self.trigram_terms[gram]
+
+    def add(self, doc_id, doc):
+        """Index ``doc``, replacing any previous version of ``doc_id``"""
+        terms = self._terms_for(doc)
+        with self._lock:
+            self._results.clear()
+            self._remove(doc_id)
+            for term, frequency in terms.items():
+                postings = self.postings.get(term)
+                if postings is None:
+                    postings = self.postings[term] = {}
+                    self._add_term(term)
+                postings[doc_id] = frequency
+            length = sum(terms.values())
+            self.doc_terms[doc_id] = tuple(terms)
+            self.doc_lengths[doc_id] = length
+            self.total_length += length
+            self.stored[doc_id] = {field: doc.get(field) for field in self.stored_fields}
+
+    def add_many(self, docs):
+        """Add or replace ``(doc_id, doc)`` pairs, merging new terms into the vocabulary once"""
+        with self._lock:
+            self._pending = []
+            try:
+                for doc_id, doc in docs:
+                    self.add(doc_id, doc)
+            finally:
+                pending, self._pending = self._pending, None
+                pending.sort()
+                # Two sorted runs: timsort merges them in linear time
+                self.vocabulary.extend(pending)
+                self.vocabulary.sort()
+                for term in pending:
+                    for gram in trigrams(term):
+                        self.trigram_terms.setdefault(gram, set()).add(term)
+
+    def load(self, docs):
+        """Replace the index contents with ``(doc_id, doc)`` pairs in one pass"""
+        with self._lock:
+            self._clear()
+            self.add_many(docs)
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._results.clear()
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self.postings[term]
+            del postings[doc_id]
+            if not postings:
+                self._drop_term(term)
+        self.total_length -= self.doc_lengths.pop(doc_id)
+        self.stored.pop(doc_id, None)
+
+    def _prefix_terms(self, prefix):
+        start = bisect_left(self.vocabulary, prefix)
+        end = bisect_left(self.vocabulary, prefix + '\uffff', start)
+        return self.vocabulary[start:min(end, start + self.max_expansions)]
+
+    def _similar_terms(self, token):
+        grams = trigrams(token)
+        overlap = Counter()
+        for gram in grams:
+            overlap.update(self.trigram_terms.get(gram, ()))
+        threshold = max(2, len(grams) // 2)
+        return [term for term, shared in overlap.most_common(self.max_expansions) if shared >= threshold]
+
+    def _expand(self, token, is_last):
+        """Return {term: boost} candidates for one query token"""
+        candidates = {}
+        if token in self.postings:
+            candidates[token] = 1.0
+        if is_last:
+            for term in self._prefix_terms(token):
+                candidates.setdefault(term, 0.8)
+        if not candidates:
+            for term in self._similar_terms(token):
+                candidates[term] = 0.5
+        return candidates
+
+    def search(self, query, limit=10):
+        """Return [(score, doc_id, stored_fields)] best first; all tokens must match"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        key = (tuple(tokens), limit)
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                return cached
+            results = self._search(tokens, limit)
+            if self.cache_size:
+                self._results[key] = results
+                if len(self._results) > self.cache_size:
+                    self._results.popitem(last=False)
+            return results
+
+    def _search(self, tokens, limit):
+        count = len(self.doc_terms)
+        if not count:
+            return []
+        average_length = self.total_length / count
+        expanded = [self._expand(token, position == len(tokens) - 1) for position, token in enumerate(tokens)]
+        if not all(expanded):
+            return []
+
+        k1, b = self.k1, self.b
+        doc_lengths = self.doc_lengths
+
+        def weighted(terms):
+            result = []
+            for term, boost in terms.items():
+                postings = self.postings[term]
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                result.append((postings, boost * idf * (k1 + 1)))
+            return result
+
+        # BM25 length normalisation: k1 * (1 - b + b * length / average_length)
+        base, slope = k1 * (1 - b), k1 * b / average_length
+
+        # Start from the most selective token and only probe its candidates afterwards
+        expanded.sort(key=lambda terms: sum(len(self.postings[term]) for term in terms))
+        scores = {}
+        for postings, weight in weighted(expanded[0]):
+            if not scores:
+                scores = {
+                    doc_id: weight * frequency / (frequency + base + slope * doc_lengths[doc_id])
+                    for doc_id, frequency in postings.items()
+                }
+                continue
+            for doc_id, frequency in postings.items():
+                score = weight * frequency / (frequency + base + slope * doc_lengths[doc_id])
+                if score > scores.get(doc_id, 0.0):
+                    scores[doc_id] = score
+        for terms in expanded[1:]:
+            term_weights = weighted(terms)
+            narrowed = {}
+            for doc_id, total in scores.items():
+                best = 0.0
+                doc_norm = base + slope * doc_lengths[doc_id]
+                for postings, weight in term_weights:
+                    frequency = postings.get(doc_id)
+                    if frequency:
+                        best = max(best, weight * frequency / (frequency + doc_norm))
+                if best:
+                    narrowed[doc_id] = total + best
+            scores = narrowed
+            if not scores:
+                return []
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(score, doc_id, self.stored[doc_id]) for doc_id, score in best]
+
+
+class PrefixIndex:
+    """Sorted-array prefix index for typeahead lookups.
+
+    Every indexed value is stored lower-cased as a ``(key, doc_id)`` entry
+    in one sorted list, so a prefix query is a bisect followed by a short
+    forward scan. A field may be a tuple of field names whose values are
+    joined with spaces (e.g. a full name). Results are ordered by the
+    matching key, and a document matching on several keys is reported
+    once, at its smallest match, which keeps cursors stable across pages.
+    """
+
+    def __init__(self, fields, stored_fields=()):
+        self.fields = fields
+        self.stored_fields = stored_fields
+        self._entries = []
+        self._keys = {}
+        self.stored = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _keys_for(self, doc):
+        keys = set()
+        for field in self.fields:
+            if isinstance(field, tuple):
+                value = ' '.join(str(doc[name]) for name in field if doc.get(name))
+            else:
+                value = doc.get(field)
+            if value:
+                keys.add(str(value).strip().lower())
+        keys.discard('')
+        return tuple(sorted(keys))
+
+    def add(self, doc_id, doc):
+        """Index ``doc``, replacing any previous version of ``doc_id``"""
+        keys = self._keys_for(doc)
+        with self._lock:
+            self._remove(doc_id)
+            for key in keys:
+                insort(self._entries, (key, doc_id))
+            self._keys[doc_id] = keys
+            self.stored[doc_id] = {field: doc.get(field) for field in self.stored_fields}
+
+    def add_many(self, docs):
+        """Add or replace ``(doc_id, doc)`` pairs, re-sorting the entries once"""
+        # The last version of a document wins
+        docs = {doc_id: (self._keys_for(doc), doc) for doc_id, doc in docs}
+        with self._lock:
+            for doc_id in docs:
+                self._remove(doc_id)
+            for doc_id, (keys, doc) in docs.items():
+                self._entries.extend((key, doc_id) for key in keys)
+                self._keys[doc_id] = keys
+                self.stored[doc_id] = {field: doc.get(field) for field in self.stored_fields}
+            self._entries.sort()
+
+    def load(self, docs):
+        """Replace the index contents with ``(doc_id, doc)`` pairs, sorting once"""
+        entries, all_keys, stored = [], {}, {}
+        for doc_id, doc in docs:
+            keys = all_keys[doc_id] = self._keys_for(doc)
+            entries.extend((key, doc_id) for key in keys)
+            stored[doc_id] = {field: doc.get(field) for field in self.stored_fields}
+        entries.sort()
+        with self._lock:
+            self._entries, self._keys, self.stored = entries, all_keys, stored
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        for key in self._keys.pop(doc_id, ()):
+            index = bisect_left(self._entries, (key, doc_id))
+            if index < len(self._entries) and self._entries[index] == (key, doc_id):
+                del self._entries[index]
+        self.stored.pop(doc_id, None)
+
+    def search(self, prefix, limit=10, after=None):
+        """Return ([(doc_id, matched_key, stored)], next_position) for ``prefix``.
+
+        ``after`` is a position returned by a previous call; ``next_position``
+        is None when there are no further matches.
+        """
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return [], None
+        results = []
+        with self._lock:
+            entries = self._entries
+            start = bisect_left(entries, (prefix,))
+            if after is not None:
+                start = max(start, bisect_right(entries, tuple(after)))
+            for index in range(start, len(entries)):
+                key, doc_id = entries[index]
+                if not key.startswith(prefix):
+                    break
+                if next(k for k in self._keys[doc_id] if k.startswith(prefix)) != key:
+                    continue
+                if len(results) == limit:
+                    last_doc, last_key, _ = results[-1]
+                    return results, (last_key, last_doc)
+                results.append((doc_id, key, self.stored[doc_id]))
+        return results, None
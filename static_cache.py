@@ -0,0 +1,123 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+from email.utils import formatdate
+
+from flask import Response
+from werkzeug.exceptions import NotFound
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+
+class CachedAsset:
+    """A static file held in memory together with its precompressed variants"""
+
+    def __init__(self, path, data, stat):
+        self.path = path
+        self.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.mtime = int(stat.st_mtime)
+        self.size = stat.st_size
+        self.signature = (stat.st_mtime_ns, stat.st_size)
+        self.last_modified = formatdate(self.mtime, usegmt=True)
+        self.digest = hashlib.sha256(data).hexdigest()[:32]
+        self.checked_at = time.monotonic()
+
+        # Encoding -> (body, etag); only keep variants that actually save bytes
+        self.variants = {'identity': (data, f'"{self.digest}"')}
+        gz = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(gz) < len(data):
+            self.variants['gzip'] = (gz, f'"{self.digest}-gzip"')
+        if brotli is not None:
+            br = brotli.compress(data, quality=11)
+            if len(br) < len(data):
+                self.variants['br'] = (br, f'"{self.digest}-br"')
+
+
+class StaticAssetCache:
+    """Serve small static files from memory with ETag/Last-Modified support.
+
+    Files are read and compressed once. The file is re-stat'ed at most once
+    every ``check_interval`` seconds and reloaded when its mtime or size
+    changes, so steady-state requests do not touch the filesystem.
+    """
+
+    def __init__(self, directory, check_interval=2.0):
+        self.directory = directory
+        self.check_interval = check_interval
+        self._assets = {}
+        self._missing = {}
+        self._lock = threading.Lock()
+
+    def _load(self, name):
+        path = os.path.join(self.directory, name)
+        if not os.path.isfile(path):
+            self._assets.pop(name, None)
+            self._missing[name] = time.monotonic()
+            raise NotFound()
+        current = self._assets.get(name)
+        stat = os.stat(path)
+        if current is not None and current.signature == (stat.st_mtime_ns, stat.st_size):
+            current.checked_at = time.monotonic()
+            return current
+        with open(path, 'rb') as f:
+            asset = CachedAsset(path, f.read(), stat)
+        self._assets[name] = asset
+        self._missing.pop(name, None)
+        return asset
+
+    def get(self, name):
+        """Return the cached asset, revalidating against disk when due"""
+        now = time.monotonic()
+        asset = self._assets.get(name)
+        if asset is not None and now - asset.checked_at < self.check_interval:
+            return asset
+        missing_since = self._missing.get(name)
+        if missing_since is not None and now - missing_since < self.check_interval:
+            raise NotFound()
+        with self._lock:
+            return self._load(name)
+
+    def response(self, name, request):
+        """Build a (possibly 304) response for ``name`` honouring the request's validators"""
+        asset = self.get(name)
+        encoding = self._choose_encoding(asset, request)
+        body, etag = asset.variants[encoding]
+
+        headers = {
+            'ETag': etag,
+            'Last-Modified': asset.last_modified,
+            'Cache-Control': 'public, no-cache',
+            'Vary': 'Accept-Encoding',
+        }
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+
+        if self._not_modified(asset, request):
+            return Response(status=304, headers=headers)
+        return Response(body, mimetype=asset.mimetype, headers=headers)
+
+    @staticmethod
+    def _choose_encoding(asset, request):
+        accepted = request.accept_encodings
+        for encoding in ('br', 'gzip'):
+            if encoding in asset.variants and accepted[encoding]:
+                return encoding
+        return 'identity'
+
+    @staticmethod
+    def _not_modified(asset, request):
+        if request.if_none_match:
+            if request.if_none_match.star_tag:
+                return True
+            # Any representation of the same content satisfies the client
+            return any(tag.split('-')[0] == asset.digest for tag in request.if_none_match)
+        since = request.if_modified_since
+        if since is not None:
+            return asset.mtime <= int(since.timestamp())
+        return False
@@ -0,0 +1,211 @@
+import gc
+import os
+import threading
+import time
+from collections import deque
+
+# Source fields that only ever grow; a window reports how much they grew
+COUNTER_FIELDS = ('hits', 'misses', 'waits', 'timeouts', 'closed')
+# Source fields that go up and down; a window reports their mean and peak
+GAUGE_FIELDS = ('utilization', 'checked_out', 'open', 'overflow', 'entries', 'bytes')
+
+
+def _sysconf(name, default):
+    try:
+        return os.sysconf(name)
+    except (AttributeError, ValueError, OSError):
+        return default
+
+
+PAGE_SIZE = _sysconf('SC_PAGE_SIZE', 4096)
+CLOCK_TICKS = _sysconf('SC_CLK_TCK', 100)
+PHYSICAL_MEMORY = _sysconf('SC_PHYS_PAGES', 0) * PAGE_SIZE or None
+
+
+def _boot_time():
+    try:
+        with open('/proc/stat', 'rb') as f:
+            for line in f:
+                if line.startswith(b'btime '):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def read_proc_stat():
+    """(rss_bytes, os_threads, start_ticks) from /proc/self/stat, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/stat', 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    # The command name is parenthesised and may itself contain spaces or ')'
+    fields = data[data.rindex(b')') + 2:].split()
+    return int(fields[21]) * PAGE_SIZE, int(fields[17]), int(fields[19])
+
+
+def count_open_fds():
+    try:
+        return len(os.listdir('/proc/self/fd'))
+    except OSError:
+        return None
+
+
+class TelemetryCollector:
+    """Process resource usage sampled into a ring buffer by one thread.
+
+    Every ``interval`` seconds the collector reads RSS, thread count and
+    start time from ``/proc/self/stat``, counts ``/proc/self/fd``, takes
+    CPU time from ``os.times()`` and the GC counters, and calls each of
+    ``sources`` (name -> callable returning a flat dict of numbers, such
+    as pool or cache stats). The last ``samples`` readings are kept, so
+    readers only copy what was already collected: ``latest()`` for
+    current values and ``window(seconds)`` for rates, means and peaks.
+    Where ``/proc`` is missing the fields it provides are None.
+    """
+
+    def __init__(self, sources=None, interval=5.0, samples=720):
+        self.sources = dict(sources or {})
+        self.interval = interval
+        self._samples = deque(maxlen=samples)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._started_at = None
+        self._boot_time = _boot_time()
+        self._gc_seconds = 0.0
+        self._gc_began = None
+        gc.callbacks.append(self._on_gc)
+
+    def _on_gc(self, phase, info):
+        if phase == 'start':
+            self._gc_began = time.perf_counter()
+        elif self._gc_began is not None:
+            self._gc_seconds += time.perf_counter() - self._gc_began
+            self._gc_began = None
+
+    def started_at(self):
+        """Wall-clock start time of this process (re-read after a fork)"""
+        pid = os.getpid()
+        if self._pid != pid:
+            proc = read_proc_stat()
+            if proc is not None and self._boot_time is not None:
+                self._started_at = self._boot_time + proc[2] / CLOCK_TICKS
+            else:
+                self._started_at = time.time()
+            self._pid = pid
+        return self._started_at
+
+    def uptime(self):
+        return max(0.0, time.time() - self.started_at())
+
+    def sample(self):
+        """Take one reading and append it to the buffer; return it"""
+        now = time.time()
+        times = os.times()
+        proc = read_proc_stat()
+        reading = {
+            'time': now,
+            'cpu_seconds': times.user + times.system,
+            'rss_bytes': proc[0] if proc else None,
+            'open_fds': count_open_fds(),
+            'threads': proc[1] if proc else threading.active_count(),
+            'python_threads': threading.active_count(),
+            'gc_pending': list(gc.get_count()),
+            'gc_collections': [generation['collections'] for generation in gc.get_stats()],
+            'gc_seconds': self._gc_seconds,
+            'sources': {}
+        }
+        for name, source in self.sources.items():
+            try:
+                reading['sources'][name] = source()
+            except Exception as e:
+                reading['sources'][name] = {'error': str(e)}
+        with self._lock:
+            previous = self._samples[-1] if self._samples else None
+            if previous is not None and now > previous['time']:
+                since, cpu_before = previous['time'], previous['cpu_seconds']
+            else:
+                since, cpu_before = self.started_at(), 0.0
+            reading['cpu_percent'] = round(
+                (reading['cpu_seconds'] - cpu_before) / max(now - since, 1e-9) * 100, 2
+            )
+            self._samples.append(reading)
+        return reading
+
+    def latest(self):
+        """The most recent reading (taking the first one now if there is none yet)"""
+        self.start()
+        with self._lock:
+            if self._samples:
+                return self._samples[-1]
+        return self.sample()
+
+    def window(self, seconds):
+        """Rates, means and peaks over the readings of the last ``seconds``; None if fewer than two"""
+        self.start()
+        with self._lock:
+            cutoff = time.time() - seconds
+            readings = [reading for reading in self._samples if reading['time'] >= cutoff]
+        if len(readings) < 2:
+            return None
+        first, last = readings[0], readings[-1]
+        elapsed = last['time'] - first['time']
+        rss = [reading['rss_bytes'] for reading in readings if reading['rss_bytes'] is not None]
+        fds = [reading['open_fds'] for reading in readings if reading['open_fds'] is not None]
+        return {
+            'seconds': round(elapsed, 3),
+            'samples': len(readings),
+            'cpu_percent': round((last['cpu_seconds'] - first['cpu_seconds']) / elapsed * 100, 2),
+            'cpu_percent_max': max(reading['cpu_percent'] for reading in readings[1:]),
+            'rss_bytes_mean': round(sum(rss) / len(rss)) if rss else None,
+            'rss_bytes_max': max(rss) if rss else None,
+            'open_fds_max': max(fds) if fds else None,
+            'threads_max': max(reading['threads'] for reading in readings),
+            'gc_collections': [
+                after - before for before, after in zip(first['gc_collections'], last['gc_collections'])
+            ],
+            'gc_seconds': round(last['gc_seconds'] - first['gc_seconds'], 6),
+            'sources': {
+                name: _source_window(name, readings) for name in last['sources']
+            }
+        }
+
+    def start(self):
+        """Start the sampling thread lazily so forking servers do not inherit it"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                # The thread only stops existing across a fork; the parent's readings are not ours
+                self._samples.clear()
+                self._thread = threading.Thread(target=self._sample_loop, name='telemetry-collector', daemon=True)
+                self._thread.start()
+
+    def _sample_loop(self):
+        while True:
+            try:
+                self.sample()
+            except Exception:
+                # A failed reading leaves a gap in the buffer rather than stopping the collector
+                pass
+            time.sleep(self.interval)
+
+
+def _source_window(name, readings):
+    values = [reading['sources'].get(name) or {} for reading in readings]
+    first, last = values[0], values[-1]
+    result = {}
+    for field in COUNTER_FIELDS:
+        if isinstance(first.get(field), (int, float)) and isinstance(last.get(field), (int, float)):
+            result[field] = last[field] - first[field]
+    if 'hits' in result and 'misses' in result:
+        lookups = result['hits'] + result['misses']
+        result['hit_rate'] = round(result['hits'] / lookups, 4) if lookups else None
+    for field in GAUGE_FIELDS:
+        series = [value[field] for value in values if isinstance(value.get(field), (int, float))]
+        if series:
+            result[f'{field}_mean'] = round(sum(series) / len(series), 2)
+            result[f'{field}_max'] = max(series)
+    return result
@@ -1,12 +1,34 @@
-from flask import Blueprint, jsonify, request
+import json
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from src.models.user import User, db
 
 user_bp = Blueprint('user', __name__)
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
 @user_bp.route('/users', methods=['GET'])
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    after = request.args.get('after', 0, type=int)
+    limit = request.args.get('limit', type=int)
+    query = User.query.filter(User.id > after).order_by(User.id)
+
+    if request.args.get('stream') == 'ndjson':
+        # yield_per keeps only one batch of ORM objects alive at a time
+        if limit:
+            query = query.limit(limit)
+        def generate():
+            for user in query.yield_per(500):
+                yield json.dumps(user.to_dict()) + '\n'
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+    users = query.limit(limit + 1).all()
+    response = jsonify([user.to_dict() for user in users[:limit]])
+    if len(users) > limit:
+        response.headers['X-Next-Cursor'] = str(users[limit - 1].id)
+    return response
 
 @user_bp.route('/users', methods=['POST'])
 def create_user():